@@ -0,0 +1,106 @@
+"""Microbenchmark of parsing 'wall.get' pages: the old way (decoding with
+'json', walking every attachment for the first url, building posts one
+by one) against 'model.parser'. Recorded responses can be given with
+'--payload', otherwise pages are generated.
+
+    python -m benchmarks.bench_parser --pages 50
+    python -m benchmarks.bench_parser --payload page1.json page2.json
+"""
+
+import argparse
+import json
+import time
+from typing import Callable, List
+
+from benchmarks.payloads import make_items, make_page
+from model import parser
+from model.service import Post
+
+
+def legacy_links(item: dict):
+    """Get link on attachment like 'ServiceWall.get_links' did."""
+    for key, value in item.items():
+        if key == "url":
+            return value
+        if hasattr(value, "items"):
+            return legacy_links(value)
+        if isinstance(value, list):
+            try:
+                return legacy_links(value[-1])
+            except IndexError:
+                continue
+    return None
+
+
+def legacy_parse(data: bytes) -> List[Post]:
+    """Parse page the old way."""
+    posts = []
+    for item in json.loads(data)["response"]["items"]:
+        links = []
+        is_attachments = item.get("attachments", None)
+        if is_attachments:
+            for element in item["attachments"]:
+                links.append(legacy_links(element))
+        posts.append(
+            Post(
+                item["id"],
+                item["date"],
+                item["text"],
+                len(item["attachments"]) if is_attachments else 0,
+                links,
+                item.get("likes", {}).get("count", 0),
+                item["comments"]["count"],
+                item.get("reposts", {}).get("count", 0),
+            )
+        )
+    return posts
+
+
+def parse(data: bytes) -> dict:
+    """Parse page with 'model.parser'."""
+    return parser.read_items(parser.loads(data)["response"]["items"])[0]
+
+
+def measure(func: Callable[[bytes], object], pages: List[bytes], repeat: int):
+    """Get the best time of parsing all pages."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for page in pages:
+            func(page)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    arguments = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    arguments.add_argument("--payload", nargs="*", help="recorded wall.get responses")
+    arguments.add_argument("--pages", type=int, default=50)
+    arguments.add_argument("--attachments", type=float, default=1.0)
+    arguments.add_argument("--repeat", type=int, default=5)
+    options = arguments.parse_args()
+
+    if options.payload:
+        pages = []
+        for path in options.payload:
+            with open(path, "rb") as file:
+                pages.append(file.read())
+    else:
+        items = make_items(options.pages * 100, attachments=options.attachments)
+        pages = [
+            make_page(items[start : start + 100], len(items))
+            for start in range(0, len(items), 100)
+        ]
+    posts = sum(len(json.loads(page)["response"]["items"]) for page in pages)
+
+    old = measure(legacy_parse, pages, options.repeat)
+    new = measure(parse, pages, options.repeat)
+    decoder = "orjson" if parser.orjson is not None else "json"
+    print(f"{len(pages)} pages, {posts} posts, decoder: {decoder}")
+    print(f"legacy: {old * 1000:.1f} ms ({posts / old:.0f} posts/s)")
+    print(f"parser: {new * 1000:.1f} ms ({posts / new:.0f} posts/s)")
+    print(f"speedup: {old / new:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""Module generating 'wall.get' responses shaped like the real ones,
+for benchmarks which can't use recorded payloads.
+"""
+
+import json
+import random
+from typing import List
+
+SIZES = "smxyzw"
+
+
+def make_photo(owner_id: int, id: int) -> dict:
+    """Make photo attachment with all its sizes."""
+    return {
+        "type": "photo",
+        "photo": {
+            "id": id,
+            "owner_id": owner_id,
+            "album_id": -7,
+            "date": 1600000000,
+            "sizes": [
+                {
+                    "type": kind,
+                    "url": f"https://sun.userapi.com/{id}/{kind}.jpg",
+                    "width": 75 * (index + 1),
+                    "height": 50 * (index + 1),
+                }
+                for index, kind in enumerate(SIZES)
+            ],
+            "text": "",
+        },
+    }
+
+
+def make_video(owner_id: int, id: int) -> dict:
+    """Make video attachment with its previews."""
+    return {
+        "type": "video",
+        "video": {
+            "id": id,
+            "owner_id": owner_id,
+            "title": "video",
+            "duration": 60,
+            "image": [
+                {"url": f"https://sun.userapi.com/{id}/{width}.jpg", "width": width}
+                for width in (130, 320, 800)
+            ],
+        },
+    }
+
+
+def make_link(owner_id: int, id: int) -> dict:
+    """Make link attachment with a photo preview."""
+    attachment = {
+        "type": "link",
+        "link": {"url": f"https://example.com/{id}", "title": "link"},
+    }
+    attachment["link"]["photo"] = make_photo(owner_id, id)["photo"]
+    return attachment
+
+
+def make_doc(owner_id: int, id: int) -> dict:
+    """Make document attachment."""
+    return {
+        "type": "doc",
+        "doc": {
+            "id": id,
+            "owner_id": owner_id,
+            "title": "doc.pdf",
+            "url": f"https://vk.com/doc{owner_id}_{id}",
+        },
+    }
+
+
+def make_poll(owner_id: int, id: int) -> dict:
+    """Make poll attachment."""
+    return {
+        "type": "poll",
+        "poll": {
+            "id": id,
+            "owner_id": owner_id,
+            "question": "poll",
+            "answers": [{"id": i, "text": str(i)} for i in range(4)],
+        },
+    }
+
+
+ATTACHMENTS = {
+    "photo": make_photo,
+    "video": make_video,
+    "link": make_link,
+    "doc": make_doc,
+    "poll": make_poll,
+}
+
+
+def make_items(
+    count: int,
+    owner_id: int = -1,
+    newest: int = 1600000000,
+    step: int = 3600,
+    attachments: float = 1.0,
+    mix: str = "photo,photo,photo,video,link,doc,poll",
+    seed: int = 0,
+) -> List[dict]:
+    """Make items of the wall from the newest post to the oldest one.
+    :param count: count of posts
+    :type count: int
+    :param owner_id: id of the wall
+    :type owner_id: int
+    :param newest: date of the newest post
+    :type newest: int
+    :param step: count of seconds between posts
+    :type step: int
+    :param attachments: mean count of attachments in a post
+    :type attachments: float
+    :param mix: comma separated types of attachments to choose from
+    :type mix: str
+    :param seed: seed of random generator
+    :type seed: int
+    :return: items
+    :rtype: list
+    """
+    generator = random.Random(seed)
+    kinds = mix.split(",") if mix else []
+    items = []
+    for index in range(count):
+        item = {
+            "id": count - index,
+            "from_id": owner_id,
+            "owner_id": owner_id,
+            "date": newest - index * step,
+            "marked_as_ads": 0,
+            "post_type": "post",
+            "text": "text " * generator.randint(0, 40),
+            "comments": {"count": generator.randint(0, 50), "can_post": 1},
+            "likes": {"count": generator.randint(0, 500), "user_likes": 0},
+            "reposts": {"count": generator.randint(0, 20), "user_reposted": 0},
+            "views": {"count": generator.randint(0, 10000)},
+        }
+        amount = int(generator.expovariate(1 / attachments)) if attachments else 0
+        if kinds and amount:
+            item["attachments"] = [
+                ATTACHMENTS[generator.choice(kinds)](owner_id, index * 10 + number)
+                for number in range(min(amount, 10))
+            ]
+        items.append(item)
+    return items
+
+
+def make_page(items: List[dict], total: int) -> bytes:
+    """Make encoded 'wall.get' response with given items."""
+    return json.dumps({"response": {"count": total, "items": items}}).encode()
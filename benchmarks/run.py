@@ -0,0 +1,162 @@
+"""Benchmark suite of the app against a local fake VK API. It measures
+getting posts with 'ServiceWall.get_all_posts', 'Wall.get_statistic'
+for every duration, export with 'Wall.get_csv' and drawing with
+'create_plot' in PNG and SVG. Results are saved in JSON and can be
+compared with results of the previous run to catch regressions.
+
+    python -m benchmarks.run --posts 20000 --latency 0.02 --output new.json
+    python -m benchmarks.run --compare old.json
+"""
+
+import argparse
+import json
+import platform
+import statistics
+import sys
+import time
+from typing import Callable, Dict
+
+import numpy as np
+
+import model.service
+from benchmarks.payloads import make_items
+from benchmarks.server import FakeVKServer
+from model.client import Wall
+from model.limits import AdaptiveLimiter, TokenBucket
+from model.service import ServiceWall
+
+DURATIONS = ("year", "quarter", "month", "week", "day", "hour", "15min")
+OWNER_ID = -1
+
+
+def measure(func: Callable[[], object], repeat: int) -> Dict[str, float]:
+    """Run function several times and get the best and the mean time."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return {"best": min(times), "mean": statistics.mean(times), "runs": repeat}
+
+
+def run(options: argparse.Namespace) -> dict:
+    """Run all benchmarks with given options.
+    :return: results by names of benchmarks
+    :rtype: dict
+    """
+    items = make_items(
+        options.posts,
+        owner_id=OWNER_ID,
+        newest=int(time.time()),
+        step=options.step,
+        attachments=options.attachments,
+        mix=options.mix,
+    )
+    results = {}
+    server = FakeVKServer({str(OWNER_ID): items}, options.latency, options.limit)
+    with server:
+        model.service.API = server.url
+        model.service.bucket = TokenBucket(options.client_rate, burst=36)
+        model.service.limiter = AdaptiveLimiter(36, maximum=36)
+        service = ServiceWall(OWNER_ID, execute=options.execute)
+
+        def fetch():
+            nonlocal service
+            service = ServiceWall(OWNER_ID, execute=options.execute)
+            service.get_all_posts()
+
+        result = measure(fetch, options.repeat)
+        result["posts_per_second"] = options.posts / result["best"]
+        result["requests"] = server.requests / options.repeat
+        result["throttled"] = server.throttled / options.repeat
+        results["get_all_posts"] = result
+
+    wall = Wall(OWNER_ID)
+    wall._posts = service._posts
+    wall._fetched = True
+    for duration in DURATIONS:
+        results[f"get_statistic_{duration}"] = measure(
+            lambda: list(wall.get_statistic(duration)), options.repeat
+        )
+    fields = ("id", "text", "attachments", "links", "likes", "comments", "reposts")
+    results["get_csv"] = measure(
+        lambda: sum(map(len, wall.get_csv(*fields))), options.repeat
+    )
+
+    from view.app import create_plot
+
+    data = [
+        (item.period, item.posts, item.likes, item.comments, item.reposts)
+        for item in wall.get_statistic("month")
+    ]
+    results["create_plot"] = measure(lambda: create_plot(data), options.repeat)
+    results["create_plot_svg"] = measure(
+        lambda: create_plot(data, "svg"), options.repeat
+    )
+    return results
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list:
+    """Find benchmarks which got slower than in baseline by more than
+    'threshold' of its time and by more than a millisecond.
+    :return: messages about regressions
+    :rtype: list with str
+    """
+    regressions = []
+    for name, result in results.items():
+        old = baseline.get("results", {}).get(name)
+        if not old:
+            continue
+        slower = result["best"] - old["best"]
+        if slower > old["best"] * threshold and slower > 0.001:
+            regressions.append(
+                f"{name}: {old['best'] * 1000:.1f} ms -> {result['best'] * 1000:.1f} ms"
+            )
+    return regressions
+
+
+def main() -> None:
+    arguments = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    arguments.add_argument("--posts", type=int, default=10000)
+    arguments.add_argument("--step", type=int, default=3600, help="seconds")
+    arguments.add_argument("--attachments", type=float, default=1.0)
+    arguments.add_argument("--mix", default="photo,photo,photo,video,link,doc,poll")
+    arguments.add_argument("--latency", type=float, default=0.0, help="seconds")
+    arguments.add_argument("--limit", type=float, help="server requests per second")
+    arguments.add_argument("--client-rate", type=float, default=1000)
+    arguments.add_argument("--execute", action="store_true")
+    arguments.add_argument("--repeat", type=int, default=3)
+    arguments.add_argument("--output", default="benchmark.json")
+    arguments.add_argument("--compare", help="results of the previous run")
+    arguments.add_argument("--threshold", type=float, default=0.2)
+    options = arguments.parse_args()
+
+    report = {
+        "environment": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+        },
+        "parameters": {
+            key: value
+            for key, value in vars(options).items()
+            if key not in ("output", "compare", "threshold")
+        },
+        "results": run(options),
+    }
+    with open(options.output, "w") as file:
+        json.dump(report, file, indent=2)
+    for name, result in report["results"].items():
+        print(f"{name}: {result['best'] * 1000:.1f} ms")
+
+    if options.compare:
+        with open(options.compare) as file:
+            regressions = compare(report["results"], json.load(file), options.threshold)
+        for regression in regressions:
+            print(f"regression {regression}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""Module with class 'FakeVKServer', a local stand-in for VK API for
+benchmarks and tests. It serves 'wall.get' and 'execute' for synthetic
+walls made by 'benchmarks.payloads', answers with given latency and says
+that requests are too frequent (error 6) over given rate, like VK does.
+Tests can also make it fail next calls or calls for given owners with
+given error codes and look at calls it got.
+"""
+
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Tuple, Union
+from urllib.parse import parse_qs, urlparse
+
+EXECUTE_CALL = re.compile(r"API\.wall\.get\((\{.*?\})\)")
+
+
+class FakeVKServer:
+    """Local VK API serving synthetic walls.
+    :param walls: items of every wall by owner id
+    :type walls: dict
+    :param latency: count of seconds to wait before every answer
+    :type latency: float
+    :param rate: max count of requests per second, not limited if None
+    :type rate: float or None
+    :param items: items of walls of other owners
+    :type items: list or None
+    """
+
+    def __init__(
+        self,
+        walls: Dict[str, List[dict]],
+        latency: float = 0,
+        rate: Union[float, None] = None,
+        items: Union[List[dict], None] = None,
+    ) -> None:
+        self.walls = walls
+        self.latency = latency
+        self.rate = rate
+        self.items = items or []
+        self.requests = 0
+        self.throttled = 0
+        self.calls: List[Tuple[str, dict]] = []
+        self.failures: List[int] = []
+        self.errors: Dict[str, int] = {}
+        self._allowed = time.monotonic()
+        self._lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                query = url.query
+                if self.command == "POST":
+                    length = int(self.headers.get("Content-Length", 0))
+                    query = f"{query}&{self.rfile.read(length).decode()}"
+                params = {key: value[0] for key, value in parse_qs(query).items()}
+                body = json.dumps(
+                    server.handle(url.path.rsplit("/", 1)[-1], params)
+                ).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            do_POST = do_GET
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.httpd.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}/method"
+        self._thread = threading.Thread(
+            target=self.httpd.serve_forever, args=(0.05,), daemon=True
+        )
+
+    def __enter__(self) -> "FakeVKServer":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def allow(self, method: str, params: dict) -> bool:
+        """Count request and check if it's not over the rate."""
+        with self._lock:
+            self.requests += 1
+            self.calls.append((method, params))
+            if self.rate is None:
+                return True
+            now = time.monotonic()
+            if self._allowed > now + 1:
+                self.throttled += 1
+                return False
+            self._allowed = max(self._allowed, now) + 1 / self.rate
+            return True
+
+    def wall_get(self, params: dict) -> dict:
+        """Get page of the wall."""
+        items = self.walls.get(str(params.get("owner_id")), self.items)
+        offset = int(params.get("offset", 0))
+        count = int(params.get("count", 20))
+        return {"count": len(items), "items": items[offset : offset + count]}
+
+    def handle(self, method: str, params: dict) -> dict:
+        """Answer call of API method."""
+        allowed = self.allow(method, params)
+        time.sleep(self.latency)
+        if not allowed:
+            return {"error": {"error_code": 6, "error_msg": "Too many requests"}}
+        with self._lock:
+            code = self.failures.pop(0) if self.failures else None
+        if method == "wall.get":
+            code = self.errors.get(str(params.get("owner_id")), code)
+        if code is not None:
+            return {"error": {"error_code": code, "error_msg": f"error {code}"}}
+        if method == "wall.get":
+            return {"response": self.wall_get(params)}
+        if method == "execute":
+            calls = EXECUTE_CALL.findall(params["code"])
+            return {"response": [self.wall_get(json.loads(call)) for call in calls]}
+        return {"error": {"error_code": 3, "error_msg": "Unknown method passed"}}
+
+    def method_calls(self, method: str) -> List[dict]:
+        """Get parameters of calls of given method."""
+        with self._lock:
+            return [params for name, params in self.calls if name == method]
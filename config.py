@@ -3,7 +3,20 @@ import os
 import secrets
 
 API = "https://api.vk.com/method"
+API_RATE = float(os.environ.get("VK_API_RATE", 20))
 V = 5.131
 
 SECRET_KEY = secrets.token_urlsafe(16)
 TOKEN = os.environ.get("VK_API_TOKEN")
+
+POSTS_DB = os.environ.get("VK_POSTS_DB")
+REFRESH_WINDOW = int(os.environ.get("VK_REFRESH_WINDOW", 0))
+
+CACHE_TTL = int(os.environ.get("VK_CACHE_TTL", 300))
+CACHE_MAX_POSTS = int(os.environ.get("VK_CACHE_MAX_POSTS", 1000000))
+
+JOB_WORKERS = int(os.environ.get("VK_JOB_WORKERS", 4))
+
+TIMEZONE = os.environ.get("VK_TIMEZONE")
+
+PLOT_RENDERER = os.environ.get("VK_PLOT_RENDERER", "builtin")
@@ -0,0 +1,127 @@
+"""Module with class 'AsyncServiceWall' which gets posts from the wall
+like 'ServiceWall' but pulls 'wall.get' pages through one asyncio event
+loop instead of thread pools. All requests go through one shared
+'aiohttp.ClientSession', so its connection pool is reused and count
+of simultaneous requests is limited by 'concurrency'. Calls are retried
+and limited by the same shared rate and concurrency limits as calls
+of 'ServiceWall', waiting for the limits happens in the event loop.
+"""
+
+import asyncio
+from typing import Union
+
+import aiohttp
+
+from model import metrics, parser, service
+from model.service import PostTable, ServiceWall, VKError
+
+
+class AsyncServiceWall(ServiceWall):
+    """Service class to save info about all posts from the wall since
+    given date using asyncio.
+    :param id: id of the user or the group, group id should start with '-'
+    :type id: int
+    :param date: date to get posts since
+    :type date: str or None, after init it will be int
+    :param concurrency: max count of simultaneous requests
+    :type concurrency: int
+    """
+
+    def __init__(
+        self, id: int, date: Union[str, None] = None, concurrency: int = 36
+    ) -> None:
+        super().__init__(id, date)
+        self.concurrency = concurrency
+
+    async def fetch_posts(
+        self,
+        session: aiohttp.ClientSession,
+        semaphore: asyncio.Semaphore,
+        offset: int = 0,
+    ) -> bool:
+        """Get 100 or less posts from the wall and put it in '_pages'.
+        :param session: session to make request with
+        :type session: aiohttp.ClientSession
+        :param semaphore: semaphore limiting simultaneous requests
+        :type semaphore: asyncio.Semaphore
+        :param offset: shift in search
+        :type offset: int
+        :return: if search should be continued
+        :rtype: bool
+        """
+        url = self.get_url("wall.get", owner_id=self.id, count=100, offset=offset)
+        async with semaphore:
+            page = await self.call_async(session, url)
+        return self.parse_page(page.get("items", {}))
+
+    async def call_async(
+        self, session: aiohttp.ClientSession, url: str
+    ) -> Union[dict, list]:
+        """Call VK API method like 'call' but with given session.
+        :param session: session to make request with
+        :type session: aiohttp.ClientSession
+        :param url: url of the call
+        :type url: str
+        :return: 'response' part of the answer
+        :rtype: dict or list
+        :raises VKError: if VK returns an error which can't be retried
+        or the call fails too many times
+        """
+        error = VKError(0, "no attempts were made")
+        method = url.split("?", 1)[0].rsplit("/", 1)[-1]
+        for attempt in range(service.RETRIES):
+            if attempt:
+                await asyncio.sleep(service.get_backoff(attempt))
+            limiter = await service.limiter.enter_async()
+            try:
+                await service.bucket.acquire_async()
+                with metrics.VK_CALL_SECONDS.time(method=method):
+                    async with session.get(url) as response:
+                        answer = parser.loads(await response.read())
+            except (aiohttp.ClientError, ValueError) as exception:
+                error = VKError(0, str(exception))
+                metrics.VK_ERRORS.inc(code=0)
+                continue
+            finally:
+                limiter.__exit__(None, None, None)
+            try:
+                return service.get_response(answer)
+            except VKError as exception:
+                if exception.code not in service.RETRY_ERRORS:
+                    raise
+                error = exception
+        raise error
+
+    async def fetch_all_posts(
+        self, session: Union[aiohttp.ClientSession, None] = None
+    ) -> None:
+        """Get all suitable posts from the wall and put it in '_posts'.
+        Pages are requested in windows of 'concurrency' offsets until
+        one of them says that search should be stopped.
+        :param session: shared session, a new one is created if not given
+        :type session: aiohttp.ClientSession or None
+        """
+        if session is None:
+            connector = aiohttp.TCPConnector(limit=self.concurrency)
+            async with aiohttp.ClientSession(connector=connector) as session:
+                return await self.fetch_all_posts(session)
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+        step = 100 * self.concurrency
+        start = 0
+        while True:
+            result = await asyncio.gather(
+                *(
+                    self.fetch_posts(session, semaphore, offset)
+                    for offset in range(start, start + step, 100)
+                )
+            )
+            if not all(result):
+                break
+            start += step
+        self._posts = PostTable.concat(self._pages).sort(reverse=True)
+        self._pages = []
+
+    def get_all_posts(self) -> None:
+        """Get all suitable posts from the wall in new event loop."""
+        asyncio.run(self.fetch_all_posts())
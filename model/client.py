@@ -1,16 +1,24 @@
 """Module with class 'Wall' which uses 'ServiceWall' to get info about posts
 on the interesting wall since interesting date. Afterthat 'Wall' can get
 ststistic on count of posts and average counts of likes, comments and reposts
-in some period (year, month, day or hour). Also it can write choosen
-info about posts in csv file.
+in some period (year, month, day or hour). Also it can give choosen
+info about posts in csv format. 'compare_walls' gets posts of several walls
+at once and gives their statistic for the same periods.
 """
 
 import csv
 import datetime
-import time
-from typing import Tuple, Union
+import io
+import itertools
+from typing import Collection, Iterable, Iterator, List, Sequence, Tuple, Union
 
-from model.service import ServiceWall
+import numpy as np
+
+from model import distribution, metrics, periods, rollup
+from model.service import PostTable, Progress, ServiceWall, get_walls_posts
+from model.storage import PostStore
+
+versions = itertools.count(1)
 
 
 class Statistic:
@@ -26,17 +34,75 @@ class Statistic:
     :type comments: float
     :param reposts: count of reposts
     :type reposts: float
+    :param median: medians of likes, comments and reposts by their names
+    :type median: dict or None
+    :param p90: 90th percentiles of likes, comments and reposts
+    :type p90: dict or None
+    :param p99: 99th percentiles of likes, comments and reposts
+    :type p99: dict or None
+    :param top: ids of posts with the most likes
+    :type top: list or None
     """
 
-    __slots__ = ("period", "posts", "likes", "comments", "reposts")
+    __slots__ = (
+        "period",
+        "posts",
+        "likes",
+        "comments",
+        "reposts",
+        "median",
+        "p90",
+        "p99",
+        "top",
+    )
 
-    def __init__(self, period, posts, likes, comments, reposts):
+    def __init__(
+        self,
+        period,
+        posts,
+        likes,
+        comments,
+        reposts,
+        median=None,
+        p90=None,
+        p99=None,
+        top=None,
+    ):
 
         self.period = period
         self.posts = posts
         self.likes = likes
         self.comments = comments
         self.reposts = reposts
+        self.median = median
+        self.p90 = p90
+        self.p99 = p99
+        self.top = top
+
+    @classmethod
+    def from_sums(
+        cls, period: str, posts: int, likes: int, comments: int, reposts: int
+    ) -> "Statistic":
+        """Create statistic from count of posts and total counts of likes,
+        comments and reposts. Averages are rounded to 2 digits.
+        :param period: period, for example '23.12.2020'
+        :type period: str
+        :param posts: count of posts
+        :type posts: int
+        :param likes: total count of likes
+        :type likes: int
+        :param comments: total count of comments
+        :type comments: int
+        :param reposts: total count of reposts
+        :type reposts: int
+        :return: statistic for the period
+        :rtype: Statistic
+        """
+        if posts:
+            likes = round(likes / posts, 2)
+            comments = round(comments / posts, 2)
+            reposts = round(reposts / posts, 2)
+        return cls(period, posts, likes, comments, reposts)
 
 
 class Wall:
@@ -49,146 +115,640 @@ class Wall:
     :type date: str or None
     :param group: is it a group id
     :type group: bool
+    :param execute: should posts be got in batches with 'execute' method
+    :type execute: bool
+    :param store: storage to keep posts between runs
+    :type store: PostStore or None
+    :param window: count of seconds before the newest kept post to get
+    again on refresh to update counts of likes, comments and reposts
+    :type window: int
+    :param progress: progress to update while posts are got
+    :type progress: Progress or None
+    :param fields: fields of posts to keep, all of them if not given.
+    Texts and links which aren't kept are got later with 'fill' when they
+    are needed. Walls with store always keep all fields
+    :type fields: collection with str or None
+    :param version: number of the posts' version, changes every time
+    posts are got, 0 if they weren't got yet
+    :type version: int
     """
 
     def __init__(
-        self, id: int, date: Union[str, None] = None, group: bool = False
+        self,
+        id: int,
+        date: Union[str, None] = None,
+        group: bool = False,
+        execute: bool = False,
+        store: Union[PostStore, None] = None,
+        window: int = 0,
+        progress: Union[Progress, None] = None,
+        fields: Union[Collection[str], None] = None,
     ) -> None:
         self.id = -id if group else id
         self.date = date
-        self._posts = []
+        self.execute = execute
+        self.store = store
+        self.window = window
+        self.progress = progress
+        self.fields = None if store is not None or fields is None else set(fields)
+        self.version = 0
+        self._posts = PostTable()
+        self._rollup = None
+        self._rolled = 0
+        self._source = None
+        self._fetched = False
 
     @property
-    def posts(self) -> list:
+    def posts(self) -> PostTable:
         """Top up '_posts' using ServiceWall.
-        :return: list with Post objects
-        :rtype: list"""
-        if not self._posts:
-            wall = ServiceWall(self.id, self.date)
+        :return: table with posts sorted by date from the newest
+        :rtype: PostTable"""
+        if not self._posts and not self._fetched:
+            with metrics.STAGE_SECONDS.time(stage="fetch"):
+                if self.store is not None:
+                    self._posts = self.refresh()
+                else:
+                    wall = ServiceWall(
+                        self.id,
+                        self.date,
+                        self.execute,
+                        progress=self.progress,
+                        fields=self.fields,
+                    )
+                    wall.get_all_posts()
+                    self._posts = wall._posts
+            self._fetched = True
+            self.version = next(versions)
+        return self._posts
+
+    @property
+    def rollup(self) -> rollup.Rollup:
+        """Hourly sums of posts. It's built once for every version of posts.
+        Walls got by 'get_since' take it from the wall they came from.
+        :return: rollup of posts
+        :rtype: Rollup"""
+        posts = self.posts
+        if self._rollup is None or self._rolled != self.version:
+            source = self._source
+            built = None
+            if source is not None and source.version == self.version:
+                built = source.rollup
+            if built is not None and source._rolled == self.version:
+                self._rollup = built.since(self.since)
+            else:
+                self._rollup = rollup.Rollup.from_posts(posts)
+            self._rolled = self.version
+        return self._rollup
+
+    @property
+    def since(self) -> int:
+        """Timestamp of the date since which posts are got."""
+        return ServiceWall.parse_date(self.date)
+
+    def covers(self, date: Union[str, None]) -> bool:
+        """Check if posts since given date are already got.
+        :param date: date to get posts since
+        :type date: str or None
+        :rtype: bool
+        """
+        return self._fetched and ServiceWall.parse_date(date) >= self.since
+
+    def keeps(self, fields: Union[Collection[str], None]) -> bool:
+        """Check if given fields of posts are kept.
+        :param fields: fields of posts, all of them if not given
+        :type fields: collection with str or None
+        :rtype: bool
+        """
+        if self.fields is None:
+            return True
+        return set(PostTable.FIELDS if fields is None else fields) <= self.fields
+
+    def fill(self, fields: Union[Collection[str], None]) -> None:
+        """Make the wall keep given fields of posts. If posts are already
+        got without them, posts since the wall's date are got again.
+        Fields are changed only when new posts are in place, so other
+        threads don't take old posts for filled ones.
+        :param fields: fields of posts, all of them if not given
+        :type fields: collection with str or None
+        """
+        if self.keeps(fields):
+            return
+        kept = None if fields is None else self.fields | set(fields)
+        if self._fetched:
+            wall = ServiceWall(
+                self.id,
+                self.date,
+                self.execute,
+                progress=self.progress,
+                fields=kept,
+            )
             wall.get_all_posts()
             self._posts = wall._posts
-        return self._posts
+            self.version = next(versions)
+        self.fields = kept
 
-    def get_csv(
-        self, *args: Tuple[str], path: str = "model/files/to_download.csv"
-    ) -> None:
-        """Writes chosen info about posts on the wall in csv file.
+    def extend(self, date: Union[str, None]) -> None:
+        """Make the wall keep posts since given date if it's earlier than
+        the current one. If posts are already got, only missing older
+        posts are requested and added to the end of '_posts'.
+        :param date: date to get posts since
+        :type date: str or None
+        """
+        if ServiceWall.parse_date(date) < self.since:
+            if not self._fetched:
+                self.date = date
+            elif self.store is not None:
+                wall = Wall(
+                    self.id,
+                    date,
+                    False,
+                    self.execute,
+                    self.store,
+                    self.window,
+                    self.progress,
+                )
+                self._posts = wall.posts
+                self.date = date
+                self.version = next(versions)
+            else:
+                wall = ServiceWall(
+                    self.id, date, self.execute, self.since, self.progress, self.fields
+                )
+                wall.get_all_posts()
+                self._posts = PostTable.concat([self._posts, wall._posts])
+                self.date = date
+                merged = self._rollup is not None and self._rolled == self.version
+                self.version = next(versions)
+                if merged:
+                    self._rollup = self._rollup.merge(
+                        rollup.Rollup.from_posts(wall._posts)
+                    )
+                    self._rolled = self.version
+        self.posts
+
+    def get_since(self, date: Union[str, None]) -> "Wall":
+        """Get wall with posts of this wall since given date, which should
+        be covered by this wall. Posts are found by binary search and their
+        columns share memory with this wall. The rollup is taken from this
+        wall only when it's needed.
+        :param date: date to get posts since
+        :type date: str or None
+        :return: wall with posts since the date
+        :rtype: Wall
+        """
+        posts = self.posts
+        count = np.searchsorted(-posts.date, -ServiceWall.parse_date(date), "right")
+        wall = Wall(
+            self.id,
+            date,
+            False,
+            self.execute,
+            self.store,
+            self.window,
+            fields=self.fields,
+        )
+        wall._posts = posts[: int(count)]
+        wall._fetched = True
+        wall.version = self.version
+        if rollup.aligned([wall.since]):
+            wall._source = self
+        return wall
+
+    def refresh(self) -> PostTable:
+        """Get posts from VK in 'store' and load posts of the wall from it.
+        If the wall is already kept, only posts newer than the newest kept
+        one (minus 'window' seconds) and posts older than kept ones are got.
+        :return: table with posts sorted by date from the newest
+        :rtype: PostTable
+        """
+        since = self.since
+        kept = self.store.get_since(self.id)
+        newest = self.store.get_newest_date(self.id)
+        if kept is None or newest is None:
+            wall = ServiceWall(self.id, self.date, self.execute, progress=self.progress)
+            wall.get_all_posts()
+            self.store.save(self.id, wall._posts, since)
+        else:
+            wall = ServiceWall(self.id, self.date, self.execute, progress=self.progress)
+            wall.date = max(since, newest - self.window)
+            wall.get_all_posts()
+            self.store.save(self.id, wall._posts)
+            if since < kept:
+                wall = ServiceWall(
+                    self.id, self.date, self.execute, kept, self.progress
+                )
+                wall.get_all_posts()
+                self.store.save(self.id, wall._posts, since)
+        return self.store.load(self.id, since)
+
+    def get_csv(self, *args: Tuple[str], chunk: int = 1000) -> Iterator[str]:
+        """Get chosen info about posts on the wall in csv format part by part,
+        so it can be streamed without keeping the whole file.
         :param args: what info should be written (id, text, attachments, links,
         likes, comments, reposts)
         :type args: tuple with str
-        :param path: path to csv file to write info in
-        :type path: str
+        :param chunk: count of posts in one part
+        :type chunk: int
+        :return: header and parts of csv file
+        :rtype: iterator with str
         """
-        with open(path, "w") as report:
-            writer = csv.writer(report)
-            writer.writerow(args)
-            for post in self.posts:
-                writer.writerow((str(post.__getattribute__(arg)) for arg in args))
+        self.fill(args)
+        posts = self.posts
+        columns = [posts.column(arg) for arg in args]
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(args)
+        yield buffer.getvalue()
+        for start in range(0, len(posts), chunk):
+            buffer.seek(0)
+            buffer.truncate()
+            rows = (
+                (
+                    column[start : start + chunk].tolist()
+                    if isinstance(column, np.ndarray)
+                    else column[start : start + chunk]
+                )
+                for column in columns
+            )
+            writer.writerows(zip(*(map(str, column) for column in rows)))
+            yield buffer.getvalue()
+
+    def locate(self, date: int, id: int) -> int:
+        """Get position of the post following the given one. Posts are
+        found by binary search on dates, so the position doesn't change
+        when newer posts are added. If the post was deleted, the position
+        is the first post with the same date and less id or older.
+        :param date: date of the post
+        :type date: int
+        :param id: id of the post
+        :type id: int
+        :return: position in posts
+        :rtype: int
+        """
+        posts = self.posts
+        low = int(np.searchsorted(-posts.date, -date, "left"))
+        high = int(np.searchsorted(-posts.date, -date, "right"))
+        same = posts.id[low:high]
+        found = np.flatnonzero(same == id)
+        if len(found):
+            return low + int(found[0]) + 1
+        return low + int(np.count_nonzero(same > id))
+
+    def get_records(
+        self,
+        fields: Sequence[str],
+        start: int = 0,
+        stop: Union[int, None] = None,
+        chunk: int = 1000,
+    ) -> Iterator[List[dict]]:
+        """Get chosen fields of posts as dicts part by part, so they can be
+        streamed without making all of them at once.
+        :param fields: fields of posts (id, date, text, attachments, links,
+        likes, comments, reposts)
+        :type fields: sequence with str
+        :param start: position of the first post
+        :type start: int
+        :param stop: position after the last post, the end if not given
+        :type stop: int or None
+        :param chunk: count of posts in one part
+        :type chunk: int
+        :return: parts with dicts of posts
+        :rtype: iterator with lists
+        """
+        self.fill(fields)
+        posts = self.posts
+        columns = [posts.column(field) for field in fields]
+        stop = len(posts) if stop is None else min(stop, len(posts))
+        for begin in range(start, stop, chunk):
+            end = min(begin + chunk, stop)
+            rows = (
+                (
+                    column[begin:end].tolist()
+                    if isinstance(column, np.ndarray)
+                    else column[begin:end]
+                )
+                for column in columns
+            )
+            yield [dict(zip(fields, row)) for row in zip(*rows)]
 
     @staticmethod
-    def get_statistic_for_period(posts: list, period: str, point: int) -> dict:
+    def get_statistic_for_period(
+        posts: PostTable, period: str, point: int
+    ) -> "Statistic":
         """Pick statistic (count of posts, average count of likes, comments,
-        reposts) for one period.
-        :param posts: list of posts to get statistic info
-        :type posts: list
+        reposts) for one period. Posts should be sorted by date from the newest.
+        :param posts: table of posts to get statistic info
+        :type posts: PostTable
         :param period: period to get posts (for example '3.2021')
         :type period: str
         :param point: timestamp of the beginning of the period
         :type point: int
-        :return: dict of statistics with period as key
-        :rtype: dict
-        """
-        posts_count, likes_count, comments_count, reposts_count = 0, 0, 0, 0
-        for post in posts:
-            if post.date < point:
-                break
-            posts_count += 1
-            likes_count += post.likes
-            comments_count += post.comments
-            reposts_count += post.reposts
-        if posts_count:
-            likes_count = round(likes_count / posts_count, 2)
-            comments_count = round(comments_count / posts_count, 2)
-            reposts_count = round(reposts_count / posts_count, 2)
-
-        return Statistic(
-            period, posts_count, likes_count, comments_count, reposts_count
+        :return: statistic for the period
+        :rtype: Statistic
+        """
+        return Wall.aggregate_boundaries(posts, [period], [point])[0]
+
+    @staticmethod
+    def aggregate_boundaries(
+        posts: PostTable, labels: Sequence[str], points: np.ndarray
+    ) -> List[Statistic]:
+        """Pick statistic for all periods at once with 'periods.sum_periods'.
+        :param posts: table of posts sorted by date from the newest
+        :type posts: PostTable
+        :param labels: names of periods from the newest
+        :type labels: sequence of str
+        :param points: timestamps of beginnings of periods
+        :type points: array of int
+        :return: statistics for all periods
+        :rtype: list with Statistic
+        """
+        counts, sums = periods.sum_periods(
+            posts.date, points, (posts.likes, posts.comments, posts.reposts)
         )
+        return [Statistic.from_sums(*values) for values in zip(labels, counts, *sums)]
 
     @staticmethod
-    def change_period(duration: str, period: str, point: float) -> Tuple[str, float]:
-        """Change period on previous.
-        :param duration: duration of period (year, month, day, hour)
+    def iter_periods(
+        duration: str, tz: Union[datetime.tzinfo, None] = None
+    ) -> Iterator[Tuple[str, int]]:
+        """Get periods from the current one to the past endlessly.
+        :param duration: duration of period (year, quarter, month, week,
+        day, hour or N minutes like '15min')
         :type duration: str
-        :param period: what exactly period (for example '3.2021')
-        :type period: str
-        :param point: timestamp of the beginning of the period
-        :type point: float
-        :return: tuple with new period and point of its beginning
-        :rtype: tuple
-        """
-        if duration == "month":
-            month, year = tuple(map(int, period.split(".")))
-            if month > 1:
-                month -= 1
-            else:
-                year -= 1
-                month = 12
-            period = f"0{month}.{year}" if month < 10 else f"{month}.{year}"
-            point = time.mktime(time.strptime(period, "%m.%Y"))
+        :param tz: timezone of periods, local time is used if not given
+        :type tz: tzinfo or None
+        :return: periods with timestamps of their beginnings
+        :rtype: iterator with tuples
+        """
+        return periods.iter_periods(duration, tz)
 
-        if duration == "year":
-            period = str(int(period) - 1)
-            point = time.mktime(time.strptime(period, "%Y"))
+    def get_statistic(
+        self, duration: str = "month", tz: Union[datetime.tzinfo, None] = None
+    ) -> Iterator[Statistic]:
+        """Pick statistic (count of posts, average count of likes, comments,
+        reposts) for all periods. Beginnings of periods are got at once.
+        :param duration: duration of period to get statistics (year, quarter,
+        month, week, day, hour or N minutes like '15min')
+        :type point: str
+        :param tz: timezone of periods, local time is used if not given
+        :type tz: tzinfo or None
+        :return: statistics from the current period to the period of the oldest post
+        :rtype: iterator with Statistic
+        """
+        posts = self.posts
+        if not len(posts):
+            return
+        with metrics.STAGE_SECONDS.time(stage="statistic"):
+            labels, points = periods.get_boundaries(duration, int(posts.date[-1]), tz)
+            statistic = self.summarize(labels, points)
+        yield from statistic
 
-        if duration == "day":
-            seconds_in_day = 86400
-            point = point - seconds_in_day
-            period = datetime.datetime.fromtimestamp(point).strftime("%d.%m.%Y")
+    def get_distribution(
+        self,
+        duration: str = "month",
+        tz: Union[datetime.tzinfo, None] = None,
+        top: int = 3,
+    ) -> List[Statistic]:
+        """Pick statistic like 'get_statistic' with medians, 90th and 99th
+        percentiles of likes, comments and reposts and ids of posts with
+        the most likes for all periods.
+        :param duration: duration of period to get statistics (year, quarter,
+        month, week, day, hour or N minutes like '15min')
+        :type duration: str
+        :param tz: timezone of periods, local time is used if not given
+        :type tz: tzinfo or None
+        :param top: count of top posts for period
+        :type top: int
+        :return: statistics from the current period to the period of the oldest post
+        :rtype: list with Statistic
+        """
+        posts = self.posts
+        if not len(posts):
+            return []
+        with metrics.STAGE_SECONDS.time(stage="distribution"):
+            labels, points = periods.get_boundaries(duration, int(posts.date[-1]), tz)
+            statistic = self.aggregate_boundaries(posts, labels, points)
+            for item, extra in zip(
+                statistic, distribution.describe(posts, points, top)
+            ):
+                item.median = extra["median"]
+                item.p90 = extra["p90"]
+                item.p99 = extra["p99"]
+                item.top = extra["top"]
+        return statistic
 
-        if duration == "hour":
-            seconds_in_hour = 3600
-            point = point - seconds_in_hour
-            period = datetime.datetime.fromtimestamp(point).strftime("%H.%d.%m.%Y")
+    def summarize(self, labels: Sequence[str], points: np.ndarray) -> List[Statistic]:
+        """Pick statistic for periods with given beginnings. If periods start
+        on hours, it's picked from hourly sums of 'rollup', otherwise
+        from posts.
+        :param labels: names of periods from the newest
+        :type labels: sequence of str
+        :param points: timestamps of beginnings of periods
+        :type points: array of int
+        :return: statistics for all periods
+        :rtype: list with Statistic
+        """
+        if not rollup.aligned(points):
+            return self.aggregate_boundaries(self.posts, labels, points)
+        return [
+            Statistic.from_sums(*values)
+            for values in zip(labels, *self.rollup.aggregate(points))
+        ]
 
-        return period, point
+    def iter_pages(self) -> Iterator[PostTable]:
+        """Get posts page by page from the newest if they weren't got yet.
+        Posts are kept in the wall when all pages are given. Walls with
+        store and walls with got posts give all posts as one page.
+        :return: pages with posts
+        :rtype: iterator with PostTable
+        """
+        if self._fetched or self._posts or self.store is not None:
+            yield self.posts
+            return
+        wall = ServiceWall(
+            self.id,
+            self.date,
+            self.execute,
+            progress=self.progress,
+            fields=self.fields,
+        )
+        with metrics.STAGE_SECONDS.time(stage="fetch"):
+            yield from wall.iter_pages()
+        self._posts = wall._posts
+        self._fetched = True
+        self.version = next(versions)
 
-    @staticmethod
-    def get_period(duration: str) -> Tuple[str, int]:
-        """Get period and timestamp of its beginning.
-        :param duration: duration of period (year, month, day, hour)
-        :type duration: str
-        :return: tuple with period and timestamp of its beginning
-        :rtype: tuple with str and float
-        """
-
-        if duration == "month":
-            period = datetime.date.today().strftime("%m.%Y")
-            point = time.mktime(time.strptime(period, "%m.%Y"))
-        if duration == "year":
-            period = datetime.date.today().strftime("%Y")
-            point = time.mktime(time.strptime(period, "%Y"))
-        if duration == "day":
-            period = datetime.date.today().strftime("%d.%m.%Y")
-            point = time.mktime(time.strptime(period, "%d.%m.%Y"))
-        if duration == "hour":
-            period = datetime.datetime.now().strftime("%H.%d.%m.%Y")
-            point = time.mktime(time.strptime(period, "%H.%d.%m.%Y"))
-        return period, point
-
-    def get_statistic(self, duration: str = "month") -> dict:
-        """Pick statistic (count of posts, average count of likes, comments,
-        reposts) for all periods.
-        :param duration: duration of period to get statistics (year, month, day or hour)
+    def stream_statistic(
+        self,
+        duration: str = "month",
+        tz: Union[datetime.tzinfo, None] = None,
+        pages: Union[Iterable[PostTable], None] = None,
+    ) -> Iterator[Statistic]:
+        """Pick statistic like 'get_statistic', but if posts weren't got yet,
+        get them page by page and give every period as soon as a page with
+        older posts is got, so the first periods are ready after one request.
+        Posts are kept in the wall afterthat. Walls with store always get
+        all posts first.
+        Pages come from the newest and every period is summed once with
+        a cursor. Posts out of order, like the pinned one on the first page,
+        are kept aside until their period is given, and the last post of
+        a page tells which periods are finished.
+        :param duration: duration of period to get statistics (year, quarter,
+        month, week, day, hour or N minutes like '15min')
         :type point: str
-        :return: dict of statistics with periods as keys
-        :rtype: dict
+        :param tz: timezone of periods, local time is used if not given
+        :type tz: tzinfo or None
+        :param pages: pages of the wall got by another fetch to use instead
+        of getting them, posts aren't kept in the wall then
+        :type pages: iterable with PostTable or None
+        :return: statistics from the current period to the period of the oldest post
+        :rtype: iterator with Statistic
         """
-        period, point = Wall.get_period(duration)
-        posts = self.posts
-        length = 0
-        while length < len(posts):
-            statistic = self.get_statistic_for_period(posts[length:], period, point)
-            length += statistic.posts
-            period, point = Wall.change_period(duration, period, point)
-            yield statistic
+        if pages is None:
+            if self._fetched or self._posts or self.store is not None:
+                yield from self.get_statistic(duration, tz)
+                return
+            pages = self.iter_pages()
+
+        calendar = self.iter_periods(duration, tz)
+        period, point = next(calendar)
+        sums = np.zeros(4, dtype=np.int64)
+        late_dates = np.empty(0, dtype=np.int64)
+        late = np.empty((0, 4), dtype=np.int64)
+        for page in pages:
+            if not len(page):
+                continue
+            ones = np.ones(len(page), dtype=np.int64)
+            values = np.column_stack(
+                (ones, page.likes, page.comments, page.reposts)
+            ).astype(np.int64)
+            newer = np.maximum.accumulate(page.date[::-1])[::-1]
+            ordered = np.append(page.date[:-1] >= newer[1:], True)
+            if not ordered.all():
+                dates = np.concatenate((late_dates, page.date[~ordered]))
+                order = np.argsort(-dates, kind="stable")
+                late_dates = dates[order]
+                late = np.concatenate((late, values[~ordered]))[order]
+            dates = page.date[ordered]
+            totals = np.concatenate(
+                (np.zeros((1, 4), dtype=np.int64), np.cumsum(values[ordered], axis=0))
+            )
+            watermark, start = int(dates[-1]), 0
+            while True:
+                end = int(np.searchsorted(-dates, -point, side="right"))
+                sums += totals[end] - totals[start]
+                start = end
+                if point <= watermark:
+                    break
+                count = int(np.searchsorted(-late_dates, -point, side="right"))
+                sums += late[:count].sum(axis=0)
+                late_dates, late = late_dates[count:], late[count:]
+                yield Statistic.from_sums(period, *sums.tolist())
+                sums[:] = 0
+                period, point = next(calendar)
+        while sums[0] or len(late_dates):
+            count = int(np.searchsorted(-late_dates, -point, side="right"))
+            sums += late[:count].sum(axis=0)
+            late_dates, late = late_dates[count:], late[count:]
+            yield Statistic.from_sums(period, *sums.tolist())
+            sums[:] = 0
+            period, point = next(calendar)
+
+
+def fetch_walls(walls: Sequence[Wall]) -> List[Union[Exception, None]]:
+    """Get posts of several walls at once. Pages of all walls which weren't
+    got yet are got with one pool of threads, walls with store are
+    refreshed one by one.
+    :param walls: walls to get posts of
+    :type walls: sequence of Wall
+    :return: error of every wall or None if its posts are got
+    :rtype: list with Exception or None
+    """
+    errors = [None] * len(walls)
+    services = []
+    for index, wall in enumerate(walls):
+        if wall._fetched or wall._posts:
+            continue
+        if wall.store is not None:
+            try:
+                wall.posts
+            except Exception as error:
+                errors[index] = error
+            continue
+        services.append(
+            (
+                index,
+                ServiceWall(
+                    wall.id,
+                    wall.date,
+                    wall.execute,
+                    progress=wall.progress,
+                    fields=wall.fields,
+                ),
+            )
+        )
+    failures = get_walls_posts([service for _, service in services])
+    for (index, service), error in zip(services, failures):
+        if error is not None:
+            errors[index] = error
+            continue
+        wall = walls[index]
+        wall._posts = service._posts
+        wall._fetched = True
+        wall.version = next(versions)
+    return errors
+
+
+def compare_walls(
+    walls: Sequence[Wall],
+    duration: str = "month",
+    tz: Union[datetime.tzinfo, None] = None,
+) -> Tuple[List[str], List[List[Statistic]]]:
+    """Get posts of several walls at once and pick their statistic for
+    the same periods: from the current one to the period of the oldest
+    post on all walls. Periods without posts have zero statistic.
+    :param walls: walls to compare
+    :type walls: sequence of Wall
+    :param duration: duration of period (year, quarter, month, week, day,
+    hour or N minutes like '15min')
+    :type duration: str
+    :param tz: timezone of periods, local time is used if not given
+    :type tz: tzinfo or None
+    :return: periods and statistics of every wall for them
+    :rtype: tuple with list of str and list of lists with Statistic
+    :raises Exception: error of the first wall which posts can't be got
+    """
+    for error in fetch_walls(walls):
+        if error is not None:
+            raise error
+    dates = [int(wall.posts.date[-1]) for wall in walls if len(wall.posts)]
+    if not dates:
+        return [], [[] for _ in walls]
+    labels, points = periods.get_boundaries(duration, min(dates), tz)
+    statistics = [wall.summarize(labels, points) for wall in walls]
+    return labels, statistics
+
+
+def compare(
+    ids: Iterable[int],
+    date: Union[str, None] = None,
+    duration: str = "month",
+    execute: bool = False,
+    tz: Union[datetime.tzinfo, None] = None,
+) -> Tuple[List[str], List[List[Statistic]]]:
+    """Compare statistic of walls with given ids since the same date.
+    :param ids: ids of users or groups, group ids should start with '-'
+    :type ids: iterable with int
+    :param date: date to get posts since
+    :type date: str or None
+    :param duration: duration of period (year, month, day, hour)
+    :type duration: str
+    :param execute: should posts be got in batches with 'execute' method
+    :type execute: bool
+    :param tz: timezone of periods, local time is used if not given
+    :type tz: tzinfo or None
+    :return: periods and statistics of every wall for them
+    :rtype: tuple with list of str and list of lists with Statistic
+    """
+    walls = [Wall(id, date, execute=execute, fields=PostTable.STATS) for id in ids]
+    return compare_walls(walls, duration, tz)
@@ -0,0 +1,125 @@
+"""Module with functions describing distribution of likes, comments and
+reposts of posts in periods: medians, percentiles and top posts. Posts are
+sorted by their values inside periods with one global 'lexsort', because
+periods are consecutive parts of posts sorted by date, so no period is
+sorted on its own.
+"""
+
+from typing import Dict, List
+
+import numpy as np
+
+from model import periods
+from model.service import PostTable
+
+COLUMNS = ("likes", "comments", "reposts")
+QUANTILES = {"median": 0.5, "p90": 0.9, "p99": 0.99}
+
+
+def sort_in_periods(values: np.ndarray, bounds: np.ndarray) -> np.ndarray:
+    """Get order of posts which sorts values inside every period. Equal
+    values keep newer posts last.
+    :param values: values of posts sorted by date from the newest
+    :type values: array of int
+    :param bounds: positions of periods from 'periods.get_bounds'
+    :type bounds: array of int
+    :return: positions of posts
+    :rtype: array of int
+    """
+    count = int(bounds[-1])
+    groups = np.repeat(np.arange(len(bounds) - 1), np.diff(bounds))
+    return np.lexsort((-np.arange(count), values[:count], groups))
+
+
+def get_quantiles(
+    values: np.ndarray, bounds: np.ndarray, quantile: float
+) -> List[float]:
+    """Get quantile of values in every period with linear interpolation,
+    like 'numpy.quantile'. It's 0 for periods without posts.
+    :param values: values sorted inside periods with 'sort_in_periods'
+    :type values: array of int
+    :param bounds: positions of periods from 'periods.get_bounds'
+    :type bounds: array of int
+    :param quantile: quantile from 0 to 1
+    :type quantile: float
+    :return: quantiles rounded to 2 digits
+    :rtype: list with float
+    """
+    starts, counts = bounds[:-1], np.diff(bounds)
+    if not len(values):
+        return [0] * len(counts)
+    position = np.maximum(counts - 1, 0) * quantile
+    low = np.floor(position).astype(np.int64)
+    high = np.ceil(position).astype(np.int64)
+    last = len(values) - 1
+    lower = values[np.minimum(starts + low, last)].astype(np.float64)
+    upper = values[np.minimum(starts + high, last)].astype(np.float64)
+    result = lower + (upper - lower) * (position - low)
+    return np.where(counts > 0, result, 0).round(2).tolist()
+
+
+def get_top(
+    ids: np.ndarray, order: np.ndarray, bounds: np.ndarray, count: int
+) -> List[List[int]]:
+    """Get ids of posts with the greatest values in every period.
+    :param ids: ids of posts sorted by date from the newest
+    :type ids: array of int
+    :param order: positions of posts from 'sort_in_periods'
+    :type order: array of int
+    :param bounds: positions of periods from 'periods.get_bounds'
+    :type bounds: array of int
+    :param count: max count of posts for period
+    :type count: int
+    :return: ids from the greatest value for every period
+    :rtype: list with lists of int
+    """
+    positions = bounds[1:, None] - 1 - np.arange(count)
+    valid = positions >= bounds[:-1, None]
+    if not len(order):
+        return [[] for _ in valid]
+    top = ids[order[np.maximum(positions, 0)]]
+    return [row[mask].tolist() for row, mask in zip(top, valid)]
+
+
+def describe(
+    posts: PostTable, points: np.ndarray, top: int = 3, key: str = "likes"
+) -> List[Dict[str, object]]:
+    """Get medians, 90th and 99th percentiles of likes, comments and reposts
+    and top posts for periods with given beginnings.
+    :param posts: table of posts sorted by date from the newest
+    :type posts: PostTable
+    :param points: timestamps of beginnings of periods from the newest
+    :type points: array of int
+    :param top: count of top posts for period
+    :type top: int
+    :param key: column by which posts are chosen for top (likes, comments
+    or reposts)
+    :type key: str
+    :return: for every period dict with 'median', 'p90', 'p99' (dicts with
+    values for every column) and 'top' (ids of posts)
+    :rtype: list with dicts
+    :raises ValueError: if key is wrong
+    """
+    if key not in COLUMNS:
+        raise ValueError(f"Wrong key: {key}")
+    bounds = periods.get_bounds(posts.date, points)
+    values = {}
+    for column in COLUMNS:
+        data = posts.column(column)
+        order = sort_in_periods(data, bounds)
+        values[column] = {
+            name: get_quantiles(data[order], bounds, quantile)
+            for name, quantile in QUANTILES.items()
+        }
+        if column == key:
+            tops = get_top(posts.id, order, bounds, top)
+    return [
+        {
+            **{
+                name: {column: values[column][name][index] for column in COLUMNS}
+                for name in QUANTILES
+            },
+            "top": tops[index],
+        }
+        for index in range(len(bounds) - 1)
+    ]
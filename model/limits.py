@@ -0,0 +1,152 @@
+"""Module with classes limiting requests to VK API from all threads.
+'TokenBucket' limits rate of requests, 'AdaptiveLimiter' limits count
+of simultaneous requests. Both of them grow slowly while VK answers
+and shrink twice when it says that requests are too frequent (AIMD),
+so throughput settles at the highest rate VK allows. Coroutines wait
+for both limits in the event loop with 'acquire_async' and 'enter_async',
+so they never hold threads while waiting.
+"""
+
+import asyncio
+import threading
+import time
+
+POLL = 0.005
+
+
+class TokenBucket:
+    """Token bucket with adaptive rate.
+    :param rate: count of requests per second
+    :type rate: float
+    :param burst: max count of requests at once
+    :type burst: int
+    :param minimum: min rate after slowing down
+    :type minimum: float
+    :param maximum: max rate after speeding up
+    :type maximum: float
+    :param step: increase of rate after every successful request
+    :type step: float
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        burst: int = 1,
+        minimum: float = 0.5,
+        maximum: float = 100,
+        step: float = 0.1,
+    ) -> None:
+        self.rate = rate
+        self.burst = burst
+        self.minimum = minimum
+        self.maximum = maximum
+        self.step = step
+        self._tokens = burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def try_acquire(self) -> float:
+        """Take a token if there is one.
+        :return: 0 if the token is taken, otherwise seconds to wait for it
+        :rtype: float
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self.burst, self._tokens + (now - self._updated) * self.rate
+            )
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0
+            return (1 - self._tokens) / self.rate
+
+    def acquire(self) -> None:
+        """Wait for a token."""
+        wait = self.try_acquire()
+        while wait:
+            time.sleep(wait)
+            wait = self.try_acquire()
+
+    async def acquire_async(self) -> None:
+        """Wait for a token in the event loop."""
+        wait = self.try_acquire()
+        while wait:
+            await asyncio.sleep(wait)
+            wait = self.try_acquire()
+
+    def speed_up(self) -> None:
+        """Increase rate additively."""
+        with self._lock:
+            self.rate = min(self.maximum, self.rate + self.step)
+
+    def slow_down(self) -> None:
+        """Decrease rate multiplicatively."""
+        with self._lock:
+            self.rate = max(self.minimum, self.rate / 2)
+
+
+class AdaptiveLimiter:
+    """Limit of simultaneous requests which grows by one after 'limit'
+    successful requests and halves on throttling. Used as context manager
+    around a request.
+    :param limit: initial limit
+    :type limit: int
+    :param minimum: min limit
+    :type minimum: int
+    :param maximum: max limit
+    :type maximum: int
+    """
+
+    def __init__(self, limit: int = 8, minimum: int = 1, maximum: int = 36) -> None:
+        self.limit = limit
+        self.minimum = minimum
+        self.maximum = maximum
+        self.active = 0
+        self._successes = 0
+        self._condition = threading.Condition()
+
+    def __enter__(self) -> "AdaptiveLimiter":
+        with self._condition:
+            self._condition.wait_for(lambda: self.active < self.limit)
+            self.active += 1
+        return self
+
+    def try_enter(self) -> bool:
+        """Take a place for a request if the limit isn't reached.
+        :return: if the place is taken, it should be freed with '__exit__'
+        :rtype: bool
+        """
+        with self._condition:
+            if self.active < self.limit:
+                self.active += 1
+                return True
+            return False
+
+    async def enter_async(self) -> "AdaptiveLimiter":
+        """Wait for a place for a request in the event loop, it should be
+        freed with '__exit__'.
+        """
+        while not self.try_enter():
+            await asyncio.sleep(POLL)
+        return self
+
+    def __exit__(self, *args) -> None:
+        with self._condition:
+            self.active -= 1
+            self._condition.notify_all()
+
+    def success(self) -> None:
+        """Take successful request into account."""
+        with self._condition:
+            self._successes += 1
+            if self._successes >= self.limit and self.limit < self.maximum:
+                self._successes = 0
+                self.limit += 1
+                self._condition.notify_all()
+
+    def throttled(self) -> None:
+        """Take throttled request into account."""
+        with self._condition:
+            self._successes = 0
+            self.limit = max(self.minimum, self.limit // 2)
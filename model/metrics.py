@@ -0,0 +1,202 @@
+"""Module with metrics of the app in Prometheus text format: counters,
+gauges and histograms with labels. All metrics are kept in 'registry'
+and can be rendered with 'registry.render()'.
+"""
+
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Sequence, Tuple
+
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+COUNT_BUCKETS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000)
+
+
+class Metric:
+    """Metric with values for every set of labels.
+    :param name: name of the metric
+    :type name: str
+    :param help: description of the metric
+    :type help: str
+    """
+
+    type = "untyped"
+
+    def __init__(self, name: str, help: str) -> None:
+        self.name = name
+        self.help = help
+        self._values = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(labels: Dict[str, object]) -> Tuple[Tuple[str, str], ...]:
+        """Get hashable key of labels."""
+        return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+    @staticmethod
+    def format(key: Tuple[Tuple[str, str], ...]) -> str:
+        """Format labels like '{method="wall.get"}'."""
+        if not key:
+            return ""
+        labels = ",".join(
+            '{}="{}"'.format(
+                name,
+                value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"),
+            )
+            for name, value in key
+        )
+        return f"{{{labels}}}"
+
+    def get(self, **labels) -> float:
+        """Get value for given labels."""
+        with self._lock:
+            return self._values.get(self.key(labels), 0)
+
+    def samples(self) -> List[str]:
+        """Get lines with values of the metric."""
+        with self._lock:
+            values = list(self._values.items())
+        return [f"{self.name}{self.format(key)} {value}" for key, value in values]
+
+    def render(self) -> str:
+        """Render metric in Prometheus text format."""
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type}"]
+        return "\n".join(lines + self.samples())
+
+
+class Counter(Metric):
+    """Metric which only grows."""
+
+    type = "counter"
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        """Increase value for given labels."""
+        key = self.key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    """Metric which can be set to any value."""
+
+    type = "gauge"
+
+    def set(self, value: float, **labels) -> None:
+        """Set value for given labels."""
+        with self._lock:
+            self._values[self.key(labels)] = value
+
+
+class Histogram(Metric):
+    """Metric counting observed values in buckets.
+    :param buckets: upper bounds of buckets
+    :type buckets: sequence of float
+    """
+
+    type = "histogram"
+
+    def __init__(
+        self, name: str, help: str, buckets: Sequence[float] = LATENCY_BUCKETS
+    ) -> None:
+        super().__init__(name, help)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float, **labels) -> None:
+        """Put value in its bucket."""
+        key = self.key(labels)
+        with self._lock:
+            counts, total = self._values.get(key, ([0] * (len(self.buckets) + 1), 0))
+            counts[bisect.bisect_left(self.buckets, value)] += 1
+            self._values[key] = (counts, total + value)
+
+    @contextmanager
+    def time(self, **labels) -> Iterator[None]:
+        """Observe time spent inside the context."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def get(self, **labels) -> float:
+        """Get count of observed values for given labels."""
+        with self._lock:
+            counts, _ = self._values.get(self.key(labels), ([0], 0))
+            return sum(counts)
+
+    def samples(self) -> List[str]:
+        """Get lines with cumulative buckets, sum and count."""
+        with self._lock:
+            values = [
+                (key, list(counts), total)
+                for key, (counts, total) in self._values.items()
+            ]
+        lines = []
+        for key, counts, total in values:
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), counts):
+                cumulative += count
+                labels = self.format(key + (("le", str(bound)),))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            lines.append(f"{self.name}_sum{self.format(key)} {total}")
+            lines.append(f"{self.name}_count{self.format(key)} {cumulative}")
+        return lines
+
+
+class Registry:
+    """Collection of metrics."""
+
+    def __init__(self) -> None:
+        self.metrics = []
+
+    def register(self, metric: Metric) -> Metric:
+        """Add metric to the registry."""
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        """Render all metrics in Prometheus text format."""
+        return "\n".join(metric.render() for metric in self.metrics) + "\n"
+
+
+registry = Registry()
+
+VK_CALL_SECONDS = registry.register(
+    Histogram("vk_call_seconds", "Latency of calls to VK API by method.")
+)
+VK_ERRORS = registry.register(
+    Counter("vk_errors_total", "Errors of VK API calls by code.")
+)
+WALL_PAGES = registry.register(
+    Histogram("wall_pages", "Count of pages got for one wall.", COUNT_BUCKETS)
+)
+PAGES = registry.register(Counter("pages_total", "Count of got pages."))
+EMPTY_PAGES = registry.register(
+    Counter("pages_empty_total", "Count of got pages without items.")
+)
+WASTED_PAGES = registry.register(
+    Counter("pages_wasted_total", "Count of got pages without suitable posts.")
+)
+VK_CONNECTIONS = registry.register(
+    Gauge("vk_connections", "Connections to VK API hosts by state (opened, idle).")
+)
+VK_POOL_REQUESTS = registry.register(
+    Gauge("vk_pool_requests", "Requests made through pools of VK API hosts.")
+)
+CACHE_REQUESTS = registry.register(
+    Counter("wall_cache_requests_total", "Requests of walls from cache by result.")
+)
+CACHE_EVICTIONS = registry.register(
+    Counter("wall_cache_evictions_total", "Walls removed from cache by reason.")
+)
+CACHE_WALLS = registry.register(Gauge("wall_cache_walls", "Count of kept walls."))
+CACHE_POSTS = registry.register(
+    Gauge("wall_cache_posts", "Count of posts kept in memory by cache.")
+)
+STAGE_SECONDS = registry.register(
+    Histogram("stage_seconds", "Time spent in stages of requests.")
+)
+REQUEST_SECONDS = registry.register(
+    Histogram("http_request_seconds", "Time of handling requests by endpoint.")
+)
@@ -0,0 +1,193 @@
+"""Module with functions parsing 'wall.get' responses. Items are parsed
+straight into columns of posts and links on attachments are taken with
+the function for attachment's type from 'LINKS'. JSON is decoded with
+'orjson' if it's installed.
+"""
+
+import json
+from typing import Callable, Collection, Dict, Tuple, Union
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+PHOTO_TYPES = "wzyrqpoxms"
+
+
+def loads(data: Union[bytes, str]) -> object:
+    """Decode JSON with the fastest available decoder.
+    :param data: JSON document
+    :type data: bytes or str
+    :return: decoded object
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def find_url(item: dict) -> Union[str, None]:
+    """Get the first url found in json object of attachment.
+    :param item: json object with info about attachment
+    :type item: dict
+    :return: link on attachment
+    :rtype: str or None
+    """
+    for key, value in item.items():
+        if key == "url":
+            return value
+        if hasattr(value, "items"):
+            return find_url(value)
+        if isinstance(value, list):
+            try:
+                return find_url(value[-1])
+            except IndexError:
+                continue
+    return None
+
+
+def photo_link(photo: dict) -> Union[str, None]:
+    """Get link on the largest size of photo."""
+    original = photo.get("orig_photo")
+    if original:
+        return original["url"]
+    sizes = photo.get("sizes")
+    if not sizes:
+        return find_url(photo)
+    if all("width" in size for size in sizes):
+        return max(sizes, key=lambda size: size["width"] * size["height"])["url"]
+    return min(
+        sizes,
+        key=lambda size: PHOTO_TYPES.find(size.get("type", "")) % len(PHOTO_TYPES),
+    )["url"]
+
+
+def vk_link(kind: str) -> Callable[[dict], str]:
+    """Get function making link on vk.com object of given kind,
+    for example 'https://vk.com/video-1_2'."""
+
+    def link(item: dict) -> str:
+        return f"https://vk.com/{kind}{item['owner_id']}_{item['id']}"
+
+    return link
+
+
+def url_link(item: dict) -> Union[str, None]:
+    """Get link from 'url' field of attachment."""
+    return item.get("url") or find_url(item)
+
+
+def view_link(item: dict) -> Union[str, None]:
+    """Get link from 'view_url' field of attachment."""
+    return item.get("view_url") or find_url(item)
+
+
+def audio_link(item: dict) -> str:
+    """Get link on audio, its own url is often empty."""
+    return item.get("url") or vk_link("audio")(item)
+
+
+def market_link(item: dict) -> str:
+    """Get link on product."""
+    owner = item["owner_id"]
+    return f"https://vk.com/market{owner}?w=product{owner}_{item['id']}"
+
+
+LINKS: Dict[str, Callable[[dict], Union[str, None]]] = {
+    "photo": photo_link,
+    "posted_photo": photo_link,
+    "video": vk_link("video"),
+    "audio": audio_link,
+    "doc": url_link,
+    "graffiti": url_link,
+    "link": url_link,
+    "note": view_link,
+    "page": view_link,
+    "poll": vk_link("poll"),
+    "album": vk_link("album"),
+    "market": market_link,
+    "podcast": vk_link("podcast"),
+}
+
+
+def get_link(attachment: dict) -> Union[str, None]:
+    """Get link on attachment with the function for its type. Unknown
+    types are searched for the first url.
+    :param attachment: json object with type of attachment and info about it
+    :type attachment: dict
+    :return: link on attachment
+    :rtype: str or None
+    """
+    kind = attachment.get("type")
+    item = attachment.get(kind)
+    link = LINKS.get(kind)
+    if link is None or not isinstance(item, dict):
+        return find_url(attachment)
+    try:
+        return link(item)
+    except (KeyError, TypeError):
+        return find_url(item)
+
+
+def read_items(
+    items: list,
+    since: int = 0,
+    until: Union[int, None] = None,
+    fields: Union[Collection[str], None] = None,
+) -> Tuple[Dict[str, list], bool]:
+    """Parse items of one 'wall.get' page in columns of posts. Items older
+    than 'since' stop parsing, items not older than 'until' are skipped.
+    Pinned post comes first whatever its date is, so it's skipped when it's
+    older than 'since' and never stops parsing.
+    Texts and links which aren't in 'fields' are not parsed and left None.
+    :param items: items of the page
+    :type items: list
+    :param since: timestamp to get posts since
+    :type since: int
+    :param until: timestamp to get posts until
+    :type until: int or None
+    :param fields: fields to keep, all of them if not given
+    :type fields: collection with str or None
+    :return: columns (id, date, text, attachments, links, likes, comments,
+    reposts) and if search should be continued
+    :rtype: tuple with dict and bool
+    """
+    ids, dates, texts, attachments, links = [], [], [], [], []
+    likes, comments, reposts = [], [], []
+    flag = len(items) >= 100
+    keep_text = fields is None or "text" in fields
+    keep_links = fields is None or "links" in fields
+    for item in items:
+        date = item["date"]
+        if date < since:
+            if item.get("is_pinned"):
+                continue
+            flag = False
+            break
+        if until is not None and date >= until:
+            continue
+        elements = item.get("attachments")
+        attachments.append(len(elements) if elements else 0)
+        if not keep_links:
+            links.append(None)
+        elif elements:
+            links.append([get_link(element) for element in elements])
+        else:
+            links.append([])
+        ids.append(item["id"])
+        dates.append(date)
+        texts.append(item["text"] if keep_text else None)
+        likes.append(item["likes"]["count"] if "likes" in item else 0)
+        comments.append(item["comments"]["count"])
+        reposts.append(item["reposts"]["count"] if "reposts" in item else 0)
+    columns = {
+        "id": ids,
+        "date": dates,
+        "text": texts,
+        "attachments": attachments,
+        "links": links,
+        "likes": likes,
+        "comments": comments,
+        "reposts": reposts,
+    }
+    return columns, flag
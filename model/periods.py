@@ -0,0 +1,298 @@
+"""Module with calendar of periods for statistic. Beginnings of periods
+(year, quarter, month, week, day, hour or N minutes) are computed with
+date arithmetic in given timezone instead of parsing strings, and can be
+got for the whole range of posts at once as an array for the aggregator.
+'sum_periods' sums columns of rows sorted by date in all periods at once.
+"""
+
+import datetime
+import re
+import time
+from typing import Iterable, Iterator, List, Tuple, Union
+from zoneinfo import ZoneInfo
+
+import numpy as np
+
+CALENDAR = ("year", "quarter", "month", "week", "day")
+MINUTES = re.compile(r"([1-9][0-9]*)min")
+DAY_MINUTES = 1440
+WEEK = 604800
+
+
+def get_timezone(name: Union[str, None]) -> Union[datetime.tzinfo, None]:
+    """Get timezone by its name like 'Europe/Moscow'.
+    :param name: name of the timezone, local time is used if not given
+    :type name: str or None
+    :return: timezone or None for local time
+    :rtype: tzinfo or None
+    :raises KeyError: if there's no such timezone
+    """
+    return ZoneInfo(name) if name else None
+
+
+def get_minutes(duration: str) -> Union[int, None]:
+    """Get length of period of fixed length in minutes.
+    :param duration: duration of period ('hour' or like '15min')
+    :type duration: str
+    :return: count of minutes or None for calendar periods and wrong
+    durations
+    :rtype: int or None
+    """
+    if duration == "hour":
+        return 60
+    match = MINUTES.fullmatch(duration)
+    if match is None or DAY_MINUTES % int(match.group(1)):
+        return None
+    return int(match.group(1))
+
+
+def is_duration(duration: str) -> bool:
+    """Check if periods of given duration can be made. Periods of N minutes
+    should divide a day.
+    :param duration: duration of period
+    :type duration: str
+    :rtype: bool
+    """
+    return duration in CALENDAR or get_minutes(duration) is not None
+
+
+def get_label(duration: str, start: datetime.datetime) -> str:
+    """Get name of period like '03.2021' by its beginning."""
+    if duration == "year":
+        return str(start.year)
+    if duration == "quarter":
+        return f"Q{(start.month - 1) // 3 + 1}.{start.year}"
+    if duration == "month":
+        return f"{start.month:02}.{start.year}"
+    if duration in ("week", "day"):
+        return f"{start.day:02}.{start.month:02}.{start.year}"
+    if duration == "hour":
+        return f"{start.hour:02}.{start.day:02}.{start.month:02}.{start.year}"
+    return (
+        f"{start.hour:02}:{start.minute:02}."
+        f"{start.day:02}.{start.month:02}.{start.year}"
+    )
+
+
+def get_start(
+    duration: str, moment: datetime.datetime
+) -> Union[datetime.datetime, datetime.date]:
+    """Get beginning of calendar period with given moment: datetime
+    for years, quarters and months or date for weeks and days."""
+    if duration == "year":
+        return moment.replace(month=1, day=1, hour=0, minute=0, second=0, microsecond=0)
+    if duration in ("quarter", "month"):
+        month = (
+            moment.month - (moment.month - 1) % 3
+            if duration == "quarter"
+            else moment.month
+        )
+        return moment.replace(
+            month=month, day=1, hour=0, minute=0, second=0, microsecond=0
+        )
+    day = moment.date()
+    if duration == "week":
+        day -= datetime.timedelta(days=day.weekday())
+    return day
+
+
+def get_previous(
+    duration: str, start: Union[datetime.datetime, datetime.date]
+) -> Union[datetime.datetime, datetime.date]:
+    """Get beginning of calendar period before the given one."""
+    if duration == "year":
+        return start.replace(year=start.year - 1)
+    if duration in ("quarter", "month"):
+        months = start.year * 12 + start.month - 1 - (3 if duration == "quarter" else 1)
+        return start.replace(year=months // 12, month=months % 12 + 1)
+    return start - datetime.timedelta(days=7 if duration == "week" else 1)
+
+
+def iter_periods(
+    duration: str,
+    tz: Union[datetime.tzinfo, None] = None,
+    now: Union[float, None] = None,
+) -> Iterator[Tuple[str, int]]:
+    """Get periods from the current one to the past endlessly.
+    :param duration: duration of period (year, quarter, month, week, day,
+    hour or N minutes like '15min')
+    :type duration: str
+    :param tz: timezone of periods, local time is used if not given
+    :type tz: tzinfo or None
+    :param now: timestamp of the moment in the current period
+    :type now: float or None
+    :return: names of periods with timestamps of their beginnings
+    :rtype: iterator with tuples
+    :raises ValueError: if duration is wrong
+    """
+    moment = datetime.datetime.fromtimestamp(time.time() if now is None else now, tz)
+    minutes = get_minutes(duration)
+    if minutes is not None:
+        minute = (moment.hour * 60 + moment.minute) // minutes * minutes
+        start = moment.replace(
+            hour=minute // 60, minute=minute % 60, second=0, microsecond=0
+        )
+        point = int(start.timestamp())
+        while True:
+            yield get_label(duration, start), point
+            point -= minutes * 60
+            start = datetime.datetime.fromtimestamp(point, tz)
+    if duration not in CALENDAR:
+        raise ValueError(f"Wrong duration: {duration}")
+    start = get_start(duration, moment)
+    while True:
+        if isinstance(start, datetime.datetime):
+            point = start.timestamp()
+        else:
+            point = datetime.datetime(
+                start.year, start.month, start.day, tzinfo=tz
+            ).timestamp()
+        yield get_label(duration, start), int(point)
+        start = get_previous(duration, start)
+
+
+def get_offset(point: int, tz: Union[datetime.tzinfo, None]) -> int:
+    """Get offset of the timezone from UTC in seconds at given moment."""
+    if tz is None:
+        return time.localtime(point).tm_gmtoff
+    return int(datetime.datetime.fromtimestamp(point, tz).utcoffset().total_seconds())
+
+
+def get_offsets(points: np.ndarray, tz: Union[datetime.tzinfo, None]) -> np.ndarray:
+    """Get offsets of the timezone from UTC for timestamps sorted from the
+    newest with fixed step. Offsets are taken at the ends of every week
+    of timestamps, inside weeks where they differ the change is found
+    by binary search.
+    :param points: timestamps
+    :type points: array of int
+    :param tz: timezone, local time is used if not given
+    :type tz: tzinfo or None
+    :return: offsets in seconds
+    :rtype: array of int
+    """
+    offsets = np.empty(len(points), dtype=np.int64)
+    if len(points) < 2:
+        offsets[:] = [get_offset(int(point), tz) for point in points]
+        return offsets
+    step = max(1, WEEK // int(points[0] - points[1]))
+    for low in range(0, len(points), step):
+        high = min(low + step, len(points)) - 1
+        first = get_offset(int(points[low]), tz)
+        last = get_offset(int(points[high]), tz)
+        if first == last:
+            offsets[low : high + 1] = first
+            continue
+        left, right = low, high
+        while right - left > 1:
+            middle = (left + right) // 2
+            if get_offset(int(points[middle]), tz) == first:
+                left = middle
+            else:
+                right = middle
+        offsets[low:right] = first
+        offsets[right : high + 1] = last
+    return offsets
+
+
+def get_labels(duration: str, points: np.ndarray, offsets: np.ndarray) -> List[str]:
+    """Get names of periods of fixed length by timestamps of their
+    beginnings and offsets of timezone, without making datetimes."""
+    moments = (points + offsets).astype("datetime64[s]")
+    days = moments.astype("datetime64[D]")
+    months = moments.astype("datetime64[M]")
+    columns = (
+        (moments.astype("datetime64[m]") - moments.astype("datetime64[h]"))
+        .astype(int)
+        .tolist(),
+        (moments.astype("datetime64[h]") - days).astype(int).tolist(),
+        ((days - months).astype(int) + 1).tolist(),
+        (months.astype(int) % 12 + 1).tolist(),
+        (moments.astype("datetime64[Y]").astype(int) + 1970).tolist(),
+    )
+    if duration == "hour":
+        return [
+            f"{hour:02}.{day:02}.{month:02}.{year}"
+            for _, hour, day, month, year in zip(*columns)
+        ]
+    return [
+        f"{hour:02}:{minute:02}.{day:02}.{month:02}.{year}"
+        for minute, hour, day, month, year in zip(*columns)
+    ]
+
+
+def get_boundaries(
+    duration: str,
+    oldest: int,
+    tz: Union[datetime.tzinfo, None] = None,
+    now: Union[float, None] = None,
+) -> Tuple[List[str], np.ndarray]:
+    """Get all periods from the current one to the period with given
+    timestamp at once. Periods of fixed length are computed with arrays.
+    :param duration: duration of period (year, quarter, month, week, day,
+    hour or N minutes like '15min')
+    :type duration: str
+    :param oldest: timestamp in the last period, usually date of the oldest post
+    :type oldest: int
+    :param tz: timezone of periods, local time is used if not given
+    :type tz: tzinfo or None
+    :param now: timestamp of the moment in the current period
+    :type now: float or None
+    :return: names of periods and timestamps of their beginnings
+    :rtype: tuple with list of str and array of int
+    :raises ValueError: if duration is wrong
+    """
+    minutes = get_minutes(duration)
+    if minutes is not None:
+        _, start = next(iter_periods(duration, tz, now))
+        step = minutes * 60
+        count = max(0, -(-(start - oldest) // step)) + 1
+        points = start - step * np.arange(count, dtype=np.int64)
+        return get_labels(duration, points, get_offsets(points, tz)), points
+
+    labels, points = [], []
+    for label, point in iter_periods(duration, tz, now):
+        labels.append(label)
+        points.append(point)
+        if point <= oldest:
+            break
+    return labels, np.array(points, dtype=np.int64)
+
+
+def get_bounds(dates: np.ndarray, points: np.ndarray) -> np.ndarray:
+    """Get positions of the first rows of periods with given beginnings
+    and position after the last period.
+    :param dates: dates of rows sorted from the newest
+    :type dates: array of int
+    :param points: timestamps of beginnings of periods from the newest
+    :type points: array of int
+    :return: positions, period i has rows from bounds[i] to bounds[i + 1]
+    :rtype: array of int
+    """
+    ends = np.searchsorted(-dates, -np.asarray(points), side="right")
+    return np.concatenate(([0], ends)).astype(np.int64)
+
+
+def sum_periods(
+    dates: np.ndarray, points: np.ndarray, columns: Iterable[np.ndarray]
+) -> Tuple[List[int], List[List[int]]]:
+    """Get counts of rows and sums of columns in periods with given
+    beginnings. Ends of all periods are found by one binary search and
+    sums are taken from cumulative sums. Every period ends where
+    the previous one begins.
+    :param dates: dates of rows sorted from the newest
+    :type dates: array of int
+    :param points: timestamps of beginnings of periods from the newest
+    :type points: array of int
+    :param columns: columns of rows to sum
+    :type columns: iterable with arrays of int
+    :return: counts of rows and sums of every column for every period
+    :rtype: tuple with list of int and list of lists with int
+    """
+    bounds = get_bounds(dates, points)
+    sums = [
+        np.diff(
+            np.concatenate(([0], np.cumsum(column, dtype=np.int64)))[bounds]
+        ).tolist()
+        for column in columns
+    ]
+    return np.diff(bounds).tolist(), sums
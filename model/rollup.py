@@ -0,0 +1,150 @@
+"""Module with class 'Rollup' which keeps counts of posts and sums of likes,
+comments and reposts of the wall by hours. Statistic for longer periods
+is picked from these sums, so changing the period doesn't go over posts
+again. New posts are merged in without building the rollup again.
+"""
+
+from typing import Tuple
+
+import numpy as np
+
+from model import periods
+from model.service import PostTable
+
+HOUR = 3600
+
+
+def aligned(points: np.ndarray, step: int = HOUR) -> bool:
+    """Check if all given timestamps are beginnings of buckets, so periods
+    starting at them can be picked from rollup.
+    :param points: timestamps
+    :type points: array of int
+    :param step: length of buckets in seconds
+    :type step: int
+    :rtype: bool
+    """
+    return not np.any(np.asarray(points) % step)
+
+
+class Rollup:
+    """Counts of posts and sums of likes, comments and reposts by buckets
+    of fixed length. Only buckets with posts are kept, from the newest.
+    :param starts: timestamps of beginnings of buckets
+    :type starts: array of int
+    :param counts: counts of posts in buckets
+    :type counts: array of int
+    :param likes: sums of likes in buckets
+    :type likes: array of int
+    :param comments: sums of comments in buckets
+    :type comments: array of int
+    :param reposts: sums of reposts in buckets
+    :type reposts: array of int
+    :param step: length of buckets in seconds
+    :type step: int
+    """
+
+    COLUMNS = ("counts", "likes", "comments", "reposts")
+
+    def __init__(
+        self,
+        starts: np.ndarray = (),
+        counts: np.ndarray = (),
+        likes: np.ndarray = (),
+        comments: np.ndarray = (),
+        reposts: np.ndarray = (),
+        step: int = HOUR,
+    ) -> None:
+        self.starts = np.asarray(starts, dtype=np.int64)
+        self.counts = np.asarray(counts, dtype=np.int64)
+        self.likes = np.asarray(likes, dtype=np.int64)
+        self.comments = np.asarray(comments, dtype=np.int64)
+        self.reposts = np.asarray(reposts, dtype=np.int64)
+        self.step = step
+
+    @classmethod
+    def from_posts(cls, posts: PostTable, step: int = HOUR) -> "Rollup":
+        """Build rollup from posts sorted by date from the newest.
+        :param posts: table of posts
+        :type posts: PostTable
+        :param step: length of buckets in seconds
+        :type step: int
+        :return: rollup of the posts
+        :rtype: Rollup
+        """
+        if not len(posts):
+            return cls(step=step)
+        keys = posts.date // step * step
+        firsts = np.concatenate(([0], np.flatnonzero(np.diff(keys)) + 1))
+        return cls(
+            keys[firsts],
+            np.diff(np.append(firsts, len(keys))),
+            *(
+                np.add.reduceat(column.astype(np.int64), firsts)
+                for column in (posts.likes, posts.comments, posts.reposts)
+            ),
+            step=step,
+        )
+
+    def merge(self, other: "Rollup") -> "Rollup":
+        """Get rollup with buckets of both rollups, sums of equal buckets
+        are added up. Only buckets are merged, so it doesn't depend on
+        count of posts.
+        :param other: rollup with the same step
+        :type other: Rollup
+        :return: merged rollup
+        :rtype: Rollup
+        """
+        starts = np.concatenate((self.starts, other.starts))
+        order = np.argsort(-starts, kind="stable")
+        starts = starts[order]
+        if not len(starts):
+            return Rollup(step=self.step)
+        firsts = np.concatenate(([0], np.flatnonzero(np.diff(starts)) + 1))
+        return Rollup(
+            starts[firsts],
+            *(
+                np.add.reduceat(
+                    np.concatenate(
+                        (self.__getattribute__(name), other.__getattribute__(name))
+                    )[order],
+                    firsts,
+                )
+                for name in self.COLUMNS
+            ),
+            step=self.step,
+        )
+
+    def since(self, point: int) -> "Rollup":
+        """Get rollup of buckets beginning not earlier than given timestamp,
+        which should be a beginning of bucket. Arrays are shared.
+        :param point: timestamp
+        :type point: int
+        :return: part of the rollup
+        :rtype: Rollup
+        """
+        count = int(np.searchsorted(-self.starts, -point, side="right"))
+        return Rollup(
+            self.starts[:count],
+            *(self.__getattribute__(name)[:count] for name in self.COLUMNS),
+            step=self.step,
+        )
+
+    def aggregate(self, points: np.ndarray) -> Tuple[list, list, list, list]:
+        """Pick counts of posts and sums of likes, comments and reposts for
+        periods with given beginnings, from the newest. Every period ends
+        where the previous one begins.
+        :param points: aligned timestamps of beginnings of periods
+        :type points: array of int
+        :return: counts, sums of likes, comments and reposts for periods
+        :rtype: tuple with lists
+        """
+        _, sums = periods.sum_periods(
+            self.starts,
+            points,
+            (self.__getattribute__(name) for name in self.COLUMNS),
+        )
+        return tuple(sums)
+
+    def __len__(self) -> int:
+        """Count of buckets."""
+        return len(self.starts)
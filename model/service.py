@@ -1,18 +1,94 @@
-"""Module has service classes of 'Post' and 'ServiceWall'.
-'Post' keeps info about one post. 'ServiceWall' takes id of the wall's
-owner and date since which posts on the wall are interesting.
-It can get all corresponding posts and put it in attribute '.posts'
+"""Module has service classes of 'Post', 'PostTable' and 'ServiceWall'.
+'Post' keeps info about one post. 'PostTable' keeps info about many posts
+in columns: numeric info in typed NumPy arrays, texts and links in lists.
+'ServiceWall' takes id of the wall's owner and date since which posts
+on the wall are interesting. It can get all corresponding posts and put
+it in attribute '._posts' as 'PostTable'. 'get_walls_posts' gets posts of
+several walls with shared threads.
 """
+
+import itertools
+import json
+import random
 import threading
 import time
+from collections import abc
 from concurrent.futures import ThreadPoolExecutor
-from typing import List, Union
+from typing import (
+    Callable,
+    Collection,
+    Iterable,
+    Iterator,
+    List,
+    Sequence,
+    Tuple,
+    Union,
+)
+from urllib.parse import urlencode
 
+import numpy as np
 import requests
 
-from config import API, TOKEN, V
+from config import API, API_RATE, TOKEN, V
+from model import metrics, parser
+from model.limits import AdaptiveLimiter, TokenBucket
+from model.vk import VKClient
+
+EXECUTE_LIMIT = 25
+RETRIES = 6
+BACKOFF = 0.25
+THROTTLE_ERRORS = {6, 9}
+TRANSIENT_ERRORS = {1, 10}
+RETRY_ERRORS = THROTTLE_ERRORS | TRANSIENT_ERRORS
+
+client = VKClient(pool_size=36)
+bucket = TokenBucket(API_RATE, burst=3)
+limiter = AdaptiveLimiter(maximum=36)
+
+
+class VKError(Exception):
+    """Error returned by VK API.
+    :param code: code of the error
+    :type code: int
+    :param message: description of the error
+    :type message: str
+    """
+
+    def __init__(self, code: int, message: str) -> None:
+        super().__init__(f"VK API error {code}: {message}")
+        self.code = code
+        self.message = message
+
 
-thread_local = threading.local()
+def get_backoff(attempt: int) -> float:
+    """Get random delay before retry of the call growing exponentially.
+    :param attempt: number of the attempt starting from 1 for the first retry
+    :type attempt: int
+    :return: delay in seconds
+    :rtype: float
+    """
+    return BACKOFF * 2 ** (attempt - 1) * (1 + random.random())
+
+
+def get_response(answer: dict) -> Union[dict, list]:
+    """Get 'response' part of VK API answer. Shared limits speed up after
+    the answer without error and slow down if VK throttles the call.
+    :param answer: parsed answer of VK API
+    :type answer: dict
+    :return: 'response' part of the answer
+    :rtype: dict or list
+    :raises VKError: if VK returns an error
+    """
+    if "error" not in answer:
+        limiter.success()
+        bucket.speed_up()
+        return answer.get("response", {})
+    code = answer["error"].get("error_code", 0)
+    metrics.VK_ERRORS.inc(code=code)
+    if code in THROTTLE_ERRORS:
+        limiter.throttled()
+        bucket.slow_down()
+    raise VKError(code, answer["error"].get("error_msg", ""))
 
 
 class Post:
@@ -75,6 +151,275 @@ class Post:
         return str(self.id)
 
 
+class ListView(abc.Sequence):
+    """Read-only part of a list which shares items with it instead of
+    copying them. Slices of the view are lists again.
+    :param items: list to look at
+    :type items: list
+    :param key: part of the list
+    :type key: slice
+    """
+
+    __slots__ = ("items", "range")
+
+    def __init__(self, items: list, key: slice = slice(None)) -> None:
+        if isinstance(items, ListView):
+            self.items = items.items
+            self.range = items.range[key]
+        else:
+            self.items = items
+            self.range = range(len(items))[key]
+
+    def __len__(self) -> int:
+        """Count of items in the view."""
+        return len(self.range)
+
+    def __getitem__(self, key: Union[int, slice]) -> object:
+        """Get one item or list with items of the view by slice."""
+        if isinstance(key, slice):
+            part = self.range[key]
+            if part.step == 1:
+                return self.items[part.start : part.stop]
+            return [self.items[index] for index in part]
+        return self.items[self.range[key]]
+
+    def __iter__(self) -> Iterator:
+        """Iterate over items of the view."""
+        if self.range.step == 1:
+            return itertools.islice(self.items, self.range.start, self.range.stop)
+        return (self.items[index] for index in self.range)
+
+    def __eq__(self, other: object) -> bool:
+        """Compare items with items of another sequence."""
+        if not isinstance(other, (list, tuple, ListView)):
+            return NotImplemented
+        return len(self) == len(other) and all(
+            left == right for left, right in zip(self, other)
+        )
+
+    def __repr__(self) -> str:
+        """String representation of ListView's instances."""
+        return f"ListView({list(self)!r})"
+
+
+class PostTable:
+    """Columnar storage for posts from the wall.
+    :param id: ids of the posts
+    :type id: sequence of int
+    :param date: dates of the posts' publication
+    :type date: sequence of int
+    :param text: texts of the posts
+    :type text: sequence of str
+    :param attachments: counts of attachments
+    :type attachments: sequence of int
+    :param links: links on attachments of every post
+    :type links: sequence of lists
+    :param likes: counts of likes
+    :type likes: sequence of int
+    :param comments: counts of comments
+    :type comments: sequence of int
+    :param reposts: counts of reposts
+    :type reposts: sequence of int
+
+    Texts and links given as ListView aren't copied, so slices of the
+    table share them with it.
+    """
+
+    FIELDS = (
+        "id",
+        "date",
+        "text",
+        "attachments",
+        "links",
+        "likes",
+        "comments",
+        "reposts",
+    )
+    DTYPES = {
+        "id": np.int64,
+        "date": np.int64,
+        "attachments": np.int16,
+        "likes": np.int32,
+        "comments": np.int32,
+        "reposts": np.int32,
+    }
+    STATS = tuple(DTYPES)
+
+    __slots__ = FIELDS
+
+    def __init__(
+        self,
+        id: Sequence[int] = (),
+        date: Sequence[int] = (),
+        text: Sequence[str] = (),
+        attachments: Sequence[int] = (),
+        links: Sequence[List[str]] = (),
+        likes: Sequence[int] = (),
+        comments: Sequence[int] = (),
+        reposts: Sequence[int] = (),
+    ) -> None:
+        self.id = np.asarray(id, dtype=self.DTYPES["id"])
+        self.date = np.asarray(date, dtype=self.DTYPES["date"])
+        self.text = text if isinstance(text, ListView) else list(text)
+        self.attachments = np.asarray(attachments, dtype=self.DTYPES["attachments"])
+        self.links = links if isinstance(links, ListView) else list(links)
+        self.likes = np.asarray(likes, dtype=self.DTYPES["likes"])
+        self.comments = np.asarray(comments, dtype=self.DTYPES["comments"])
+        self.reposts = np.asarray(reposts, dtype=self.DTYPES["reposts"])
+
+    @classmethod
+    def from_posts(cls, posts: Iterable[Post]) -> "PostTable":
+        """Build table from Post objects.
+        :param posts: posts to put in the table
+        :type posts: iterable with Post objects
+        :return: table with given posts
+        :rtype: PostTable
+        """
+        posts = list(posts)
+        return cls(
+            *([post.__getattribute__(field) for post in posts] for field in cls.FIELDS)
+        )
+
+    @classmethod
+    def concat(cls, tables: Iterable["PostTable"]) -> "PostTable":
+        """Join several tables in one keeping their order.
+        :param tables: tables to join
+        :type tables: iterable with PostTable
+        :return: joined table
+        :rtype: PostTable
+        """
+        tables = list(tables)
+        if not tables:
+            return cls()
+        columns = {}
+        for field in cls.FIELDS:
+            if field in cls.DTYPES:
+                columns[field] = np.concatenate(
+                    [table.__getattribute__(field) for table in tables]
+                )
+            else:
+                columns[field] = [
+                    value for table in tables for value in table.__getattribute__(field)
+                ]
+        return cls(**columns)
+
+    def take(self, indices: Union[np.ndarray, Sequence[int]]) -> "PostTable":
+        """Get new table with posts placed on given indices.
+        :param indices: positions of posts in the table
+        :type indices: array or sequence of int
+        :return: table with chosen posts
+        :rtype: PostTable
+        """
+        indices = np.asarray(indices, dtype=np.intp)
+        columns = {}
+        for field in self.FIELDS:
+            column = self.__getattribute__(field)
+            if field in self.DTYPES:
+                columns[field] = column[indices]
+            else:
+                columns[field] = [column[index] for index in indices]
+        return PostTable(**columns)
+
+    def sort(self, reverse: bool = False) -> "PostTable":
+        """Get new table sorted by date. Posts with equal dates keep
+        their order as list.sort does.
+        :param reverse: should the newest posts go first
+        :type reverse: bool
+        :return: sorted table
+        :rtype: PostTable
+        """
+        keys = -self.date if reverse else self.date
+        return self.take(np.argsort(keys, kind="stable"))
+
+    def column(self, field: str) -> Union[np.ndarray, list]:
+        """Get one column of the table.
+        :param field: name of the column (id, date, text, attachments,
+        links, likes, comments, reposts)
+        :type field: str
+        :return: values of the column
+        :rtype: numpy array or list
+        """
+        if field not in self.FIELDS:
+            raise KeyError(field)
+        return self.__getattribute__(field)
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate size of the table in memory without texts and links."""
+        return sum(self.__getattribute__(field).nbytes for field in self.DTYPES)
+
+    def __len__(self) -> int:
+        """Count of posts in the table."""
+        return len(self.date)
+
+    def __getitem__(self, key: Union[int, slice]) -> Union[Post, "PostTable"]:
+        """Get one post as Post object or part of the table by slice.
+        Parts share arrays, texts and links with the table."""
+        if isinstance(key, slice):
+            return PostTable(
+                **{
+                    field: (
+                        self.__getattribute__(field)[key]
+                        if field in self.DTYPES
+                        else ListView(self.__getattribute__(field), key)
+                    )
+                    for field in self.FIELDS
+                }
+            )
+        return Post(
+            int(self.id[key]),
+            int(self.date[key]),
+            self.text[key],
+            int(self.attachments[key]),
+            self.links[key],
+            int(self.likes[key]),
+            int(self.comments[key]),
+            int(self.reposts[key]),
+        )
+
+    def __iter__(self) -> Iterator[Post]:
+        """Iterate over posts as Post objects."""
+        for index in range(len(self)):
+            yield self[index]
+
+    def __repr__(self) -> str:
+        """String representation of PostTable's instances."""
+        return f"PostTable({len(self)} posts)"
+
+
+class Progress:
+    """Keeps progress of getting posts from the wall.
+    :param pages: count of got pages
+    :type pages: int
+    :param posts: count of got posts
+    :type posts: int
+    :param oldest: date of the oldest got post
+    :type oldest: int or None
+    """
+
+    __slots__ = ("pages", "posts", "oldest", "_lock")
+
+    def __init__(self) -> None:
+        self.pages = 0
+        self.posts = 0
+        self.oldest = None
+        self._lock = threading.Lock()
+
+    def update(self, page: PostTable) -> None:
+        """Take one more got page into account.
+        :param page: posts from the page
+        :type page: PostTable
+        """
+        with self._lock:
+            self.pages += 1
+            self.posts += len(page)
+            if len(page):
+                oldest = int(page.date.min())
+                self.oldest = (
+                    oldest if self.oldest is None else min(self.oldest, oldest)
+                )
+
+
 class ServiceWall:
     """Service class to save info about all posts from the wall since
     given date.
@@ -82,27 +427,72 @@ class ServiceWall:
     :type id: int
     :param date: date to get posts since
     :type date: str or None, after init it will be int
-    :param _posts: list for saving posts from the wall
-    :type _posts: list
+    :param execute: should pages be got in batches with 'execute' method
+    :type execute: bool
+    :param until: timestamp to get posts until, newer posts are skipped
+    :type until: int or None
+    :param progress: progress to update with every got page
+    :type progress: Progress or None
+    :param fields: fields of posts to keep, all of them if not given,
+    texts and links which aren't kept are None
+    :type fields: collection with str or None
+    :param _posts: table for saving posts from the wall
+    :type _posts: PostTable
+    :param _pages: tables with posts from every got page
+    :type _pages: list
     """
 
-    def __init__(self, id: int, date: Union[str, None] = None) -> None:
+    def __init__(
+        self,
+        id: int,
+        date: Union[str, None] = None,
+        execute: bool = False,
+        until: Union[int, None] = None,
+        progress: Union[Progress, None] = None,
+        fields: Union[Collection[str], None] = None,
+    ) -> None:
         self.id = id
+        self.date = self.parse_date(date)
+        self.execute = execute
+        self.until = until
+        self.progress = progress
+        self.fields = fields
+        self._posts = PostTable()
+        self._pages = []
+
+    @staticmethod
+    def parse_date(date: Union[str, None]) -> int:
+        """Get timestamp of date like '23.12.2020' or 0 if it's wrong.
+        :param date: date to parse
+        :type date: str or None
+        :return: timestamp
+        :rtype: int
+        """
         try:
-            self.date = int(time.mktime(time.strptime(date, "%d.%m.%Y")))
+            return int(time.mktime(time.strptime(date, "%d.%m.%Y")))
         except (ValueError, TypeError):
-            self.date = 0
-        self._posts = []
+            return 0
+
+    @staticmethod
+    def get_session() -> requests.Session:
+        """Gets requests.Session of the process-wide VK client."""
+        return client.session
 
     @staticmethod
-    def get_session():
-        """Gets requests.Session for one thread."""
-        if not hasattr(thread_local, "session"):
-            thread_local.session = requests.Session()
-        return thread_local.session
+    def get_url(method: str, **params) -> str:
+        """Get url to call VK API method with token and version.
+        :param method: name of the method, for example 'wall.get'
+        :type method: str
+        :param params: parameters of the method
+        :type params: dict
+        :return: url of the call
+        :rtype: str
+        """
+        params.update(access_token=TOKEN, v=V)
+        return f"{API}/{method}?{urlencode(params)}"
 
     def get_posts(self, offset: int = 0) -> bool:
-        """Get 100 or less posts from the wall and put it in '_posts'.
+        """Get 100 or less posts from the wall and put it in '_pages'.
         If date from which we search posts is reached function stops get posts
         and returns False.
         :param offset: shift in search
@@ -110,38 +500,181 @@ class ServiceWall:
         :return: if search should be continued
         :rtype: bool
         """
-        flag = True
-        params = (
-            f"owner_id={self.id}&count=100&offset={offset}&access_token={TOKEN}&v={V}"
+        return self.parse_page(self.get_page(offset).get("items", {}))
+
+    def get_page(self, offset: int = 0, count: int = 100) -> dict:
+        """Get one page of 'wall.get' response without parsing.
+        :param offset: shift in search
+        :type offset: int
+        :param count: count of posts on the page, not more than 100
+        :type count: int
+        :return: response with total count of posts and items
+        :rtype: dict
+        """
+        url = self.get_url("wall.get", owner_id=self.id, count=count, offset=offset)
+        return self.call(url)
+
+    def call(self, url: str, data: Union[dict, None] = None) -> Union[dict, list]:
+        """Call VK API method through shared rate and concurrency limits.
+        Calls which are throttled or failed by VK or network are retried
+        with exponential backoff, throttling also slows all threads down.
+        :param url: url of the call
+        :type url: str
+        :param data: data to post, the call is made with GET if not given
+        :type data: dict or None
+        :return: 'response' part of the answer
+        :rtype: dict or list
+        :raises VKError: if VK returns an error which can't be retried
+        or the call fails too many times
+        """
+        error = VKError(0, "no attempts were made")
+        method = url.split("?", 1)[0].rsplit("/", 1)[-1]
+        for attempt in range(RETRIES):
+            if attempt:
+                time.sleep(get_backoff(attempt))
+            with limiter:
+                bucket.acquire()
+                try:
+                    with metrics.VK_CALL_SECONDS.time(method=method):
+                        with client.request(url, data) as response:
+                            answer = parser.loads(response.content)
+                except (requests.RequestException, ValueError) as exception:
+                    error = VKError(0, str(exception))
+                    metrics.VK_ERRORS.inc(code=0)
+                    continue
+            try:
+                return get_response(answer)
+            except VKError as exception:
+                if exception.code not in RETRY_ERRORS:
+                    raise
+                error = exception
+        raise error
+
+    def plan_offsets(self) -> range:
+        """Get the first page and plan offsets of pages which should be got
+        after it. Total count of posts is taken from the first page. If date
+        from which we search posts is set, the first page starting with
+        an older post is found by binary search, so pages after it are never
+        requested. The same way pages with posts newer than 'until' are
+        skipped.
+        :return: offsets of the rest pages
+        :rtype: range
+        """
+        page = self.get_page()
+        if not self.parse_page(page.get("items", {})):
+            return range(0)
+        first, last = 1, -(-page.get("count", 0) // 100)
+        if self.until is not None:
+            first = max(first, self.find_page(self.until, first, last) - 1)
+        if self.date:
+            last = self.find_page(self.date, first, last)
+        return range(first * 100, last * 100, 100)
+
+    def find_page(self, date: int, low: int, high: int) -> int:
+        """Find the first page starting with a post older than given date
+        by binary search with requests of one post.
+        :param date: timestamp to compare posts with
+        :type date: int
+        :param low: index of the first page to search from
+        :type low: int
+        :param high: index of the page after the last one
+        :type high: int
+        :return: index of the page or 'high' if there's no such page
+        :rtype: int
+        """
+        while low < high:
+            middle = (low + high) // 2
+            items = self.get_page(middle * 100, 1).get("items", [])
+            if items and items[0]["date"] >= date:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def get_posts_batch(self, offsets: Sequence[int]) -> bool:
+        """Get up to 25 pages of posts from the wall with one call of
+        'execute' method and put them in '_pages'. Every page is parsed
+        like in 'get_posts', pages failed inside 'execute' are got again
+        one by one.
+        :param offsets: shifts in search, not more than 25
+        :type offsets: sequence of int
+        :return: if search should be continued
+        :rtype: bool
+        """
+        results = self.call(
+            self.get_url("execute"), {"code": self.get_execute_code(offsets)}
         )
-        url = f"{API}/wall.get?{params}"
-        session = self.get_session()
-        with session.get(url) as response:
-            info = response.json().get("response", {}).get("items", {})
-            for item in info:
-                if item["date"] < self.date:
-                    flag = False
-                    break
-                id = item["id"]
-                date = item["date"]
-                text = item["text"]
-                links = []
-                is_attachments = item.get("attachments", None)
-                if is_attachments:
-                    for element in item["attachments"]:
-                        links.append(ServiceWall.get_links(element))
-                attachments = len(item["attachments"]) if is_attachments else 0
-                likes = item.get("likes", {}).get("count", 0)
-                reposts = item.get("reposts", {}).get("count", 0)
-                comments = item["comments"]["count"]
-                post = Post(
-                    id, date, text, attachments, links, likes, comments, reposts
-                )
-                self._posts.append(post)
-            if len(info) < 100:
-                flag = False
+        flags = [
+            self.parse_page(result["items"]) if result else self.get_posts(offset)
+            for offset, result in zip(offsets, results)
+        ]
+        return len(flags) == len(offsets) and all(flags)
+
+    def get_execute_code(self, offsets: Sequence[int]) -> str:
+        """Get VKScript code of 'execute' call which gets pages with given
+        offsets. Parameters are written as JSON, so the id can't change
+        the code.
+        :param offsets: shifts in search, not more than 25
+        :type offsets: sequence of int
+        :return: code returning list of pages
+        :rtype: str
+        """
+        calls = ",".join(
+            "API.wall.get({})".format(
+                json.dumps({"owner_id": self.id, "count": 100, "offset": offset})
+            )
+            for offset in offsets
+        )
+        return f"return [{calls}];"
+
+    def parse_page(self, info: list) -> bool:
+        """Parse items of one 'wall.get' page and put them in '_pages'.
+        :param info: items of the page
+        :type info: list
+        :return: if search should be continued
+        :rtype: bool
+        """
+        page, flag = self.read_page(info)
+        self.count_page(info, page)
+        self.add_page(page)
         return flag
 
+    @staticmethod
+    def count_page(info: list, page: PostTable) -> None:
+        """Count got page in metrics: pages without items are empty, pages
+        without suitable posts are wasted.
+        :param info: items of the page
+        :type info: list
+        :param page: suitable posts from the page
+        :type page: PostTable
+        """
+        metrics.PAGES.inc()
+        if not info:
+            metrics.EMPTY_PAGES.inc()
+        elif not len(page):
+            metrics.WASTED_PAGES.inc()
+
+    def add_page(self, page: PostTable) -> None:
+        """Put parsed page in '_pages' and update progress.
+        :param page: posts from the page
+        :type page: PostTable
+        """
+        self._pages.append(page)
+        if self.progress is not None:
+            self.progress.update(page)
+
+    def read_page(self, info: list) -> Tuple[PostTable, bool]:
+        """Parse items of one 'wall.get' page. Items older than date from
+        which we search posts are skipped, as well as items not older
+        than 'until'.
+        :param info: items of the page
+        :type info: list
+        :return: posts from the page and if search should be continued
+        :rtype: tuple with PostTable and bool
+        """
+        columns, flag = parser.read_items(info, self.date, self.until, self.fields)
+        return PostTable(**columns), flag
+
     @staticmethod
     def get_links(item: dict) -> Union[str, None]:
         """Get links on attachments.
@@ -150,34 +683,119 @@ class ServiceWall:
         :return: link on attachment
         :rtype: str or None
         """
-        for key, value in item.items():
-            if key == "url":
-                return value
-            if hasattr(value, "items"):
-                return ServiceWall.get_links(value)
-            if isinstance(value, list):
-                try:
-                    return ServiceWall.get_links(value[-1])
-                except IndexError:
-                    continue
-        return None
+        return parser.find_url(item)
+
+    def plan_tasks(self) -> List[Tuple[Callable[..., bool], object]]:
+        """Plan offsets of pages and split them in tasks for threads:
+        one page for 'get_posts' or up to 25 pages for 'get_posts_batch'
+        with 'execute'.
+        :return: functions with their arguments
+        :rtype: list with tuples
+        """
+        offsets = self.plan_offsets()
+        if self.execute:
+            return [
+                (self.get_posts_batch, offsets[index : index + EXECUTE_LIMIT])
+                for index in range(0, len(offsets), EXECUTE_LIMIT)
+            ]
+        return [(self.get_posts, offset) for offset in offsets]
+
+    def join_pages(self) -> None:
+        """Join got pages in '_posts' and sort it by date from the newest."""
+        metrics.WALL_PAGES.observe(len(self._pages))
+        self._posts = PostTable.concat(self._pages).sort(reverse=True)
+        self._pages = []
 
     def get_all_posts(self) -> None:
-        """Get all suitable posts from the wall and put it in '_posts'
-        using threads to do it faster. sorts '_posts' by date."""
-
-        def inner(start: int) -> bool:
-            """Get posts with 36 threads.
-            :param start: shift from which we are searching
-            :type start: int
-            :return: if get posts should be continued
-            :rtype: bool
+        """Get all suitable posts from the wall and put it in '_posts'.
+        Only planned pages are got, with 36 threads to do it faster
+        (with 'execute' every thread gets 25 pages at once).
+        Joins got pages in one table and sorts it by date.
+        :raises Exception: error of the fetch, for example VKError"""
+        (error,) = get_walls_posts([self])
+        if error is not None:
+            raise error
+
+    def iter_pages(self) -> Iterator[PostTable]:
+        """Get suitable posts page by page from the newest. Planned pages
+        are got with 36 threads like in 'get_all_posts', but every page is
+        given as soon as it and all newer pages are ready. When all pages
+        are given, they are joined in '_posts'.
+        :return: pages with posts in order of offsets
+        :rtype: iterator with PostTable
+        """
+
+        def inner(offset: int) -> PostTable:
+            """Get one page of posts.
+            :param offset: shift in search
+            :type offset: int
+            :return: posts from the page
+            :rtype: PostTable
             """
-            with ThreadPoolExecutor(max_workers=36) as pool:
-                result = pool.map(self.get_posts, range(start, start + 3501, 100))
-                return all(result)
-
-        start = 0
-        while inner(start):
-            start += 3500
-        self._posts.sort(reverse=True)
+            info = self.get_page(offset).get("items", {})
+            page, _ = self.read_page(info)
+            self.count_page(info, page)
+            self.add_page(page)
+            return page
+
+        offsets = self.plan_offsets()
+        yield from list(self._pages)
+        with ThreadPoolExecutor(max_workers=36) as pool:
+            yield from pool.map(inner, offsets)
+        self.join_pages()
+
+
+def get_walls_posts(
+    walls: Sequence[ServiceWall], workers: int = 36
+) -> List[Union[Exception, None]]:
+    """Get all suitable posts of several walls with one pool of threads.
+    First pages of all walls are planned at once, then their tasks are
+    taken in turn from every wall, so all walls go through the same
+    concurrency and rate limits and finish together. Error of one wall
+    stops only its tasks.
+    :param walls: walls to get posts of
+    :type walls: sequence of ServiceWall
+    :param workers: count of threads
+    :type workers: int
+    :return: error of every wall or None if its posts are got
+    :rtype: list with Exception or None
+    """
+    errors = [None] * len(walls)
+
+    def run(index: int, task: Callable[..., object], *args) -> object:
+        """Run task of the wall with given index unless it has failed.
+        :param index: index of the wall
+        :type index: int
+        :param task: function to run
+        :type task: callable
+        :return: result of the task or None if it has failed
+        :rtype: object
+        """
+        if errors[index] is not None:
+            return None
+        try:
+            return task(*args)
+        except Exception as error:
+            errors[index] = error
+            return None
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        plans = list(
+            pool.map(
+                lambda index: run(index, walls[index].plan_tasks) or [],
+                range(len(walls)),
+            )
+        )
+        tasks = [
+            task
+            for turn in itertools.zip_longest(
+                *([(index, *task) for task in plan] for index, plan in enumerate(plans))
+            )
+            for task in turn
+            if task is not None
+        ]
+        list(pool.map(lambda task: run(*task), tasks))
+    for wall, error in zip(walls, errors):
+        if error is None:
+            wall.join_pages()
+    return errors
@@ -0,0 +1,137 @@
+"""Module with class 'PostStore' which keeps parsed posts from walls in
+local SQLite database. Posts are kept by id of the wall's owner together
+with the date since which the wall was got, so the next time only posts
+newer than cached ones should be requested from VK.
+"""
+
+import json
+import sqlite3
+from contextlib import closing
+from typing import Iterable, Union
+
+from model.service import PostTable
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS walls (
+    owner_id INTEGER PRIMARY KEY,
+    since INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS posts (
+    owner_id INTEGER NOT NULL,
+    id INTEGER NOT NULL,
+    date INTEGER NOT NULL,
+    text TEXT NOT NULL,
+    attachments INTEGER NOT NULL,
+    links TEXT NOT NULL,
+    likes INTEGER NOT NULL,
+    comments INTEGER NOT NULL,
+    reposts INTEGER NOT NULL,
+    PRIMARY KEY (owner_id, id)
+);
+CREATE INDEX IF NOT EXISTS posts_by_date ON posts (owner_id, date);
+"""
+
+
+class PostStore:
+    """SQLite storage of posts from walls.
+    :param path: path to database file
+    :type path: str
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        with closing(self.connect()) as connection:
+            connection.executescript(SCHEMA)
+
+    def connect(self) -> sqlite3.Connection:
+        """Open new connection to the database, so the store can be used
+        from several threads."""
+        return sqlite3.connect(self.path)
+
+    def get_since(self, owner_id: int) -> Union[int, None]:
+        """Get date since which posts of the wall are kept.
+        :param owner_id: id of the wall's owner
+        :type owner_id: int
+        :return: timestamp or None if the wall wasn't saved
+        :rtype: int or None
+        """
+        with closing(self.connect()) as connection:
+            row = connection.execute(
+                "SELECT since FROM walls WHERE owner_id = ?", (int(owner_id),)
+            ).fetchone()
+        return row[0] if row else None
+
+    def get_newest_date(self, owner_id: int) -> Union[int, None]:
+        """Get date of the newest kept post of the wall.
+        :param owner_id: id of the wall's owner
+        :type owner_id: int
+        :return: timestamp or None if there are no posts
+        :rtype: int or None
+        """
+        with closing(self.connect()) as connection:
+            row = connection.execute(
+                "SELECT MAX(date) FROM posts WHERE owner_id = ?", (int(owner_id),)
+            ).fetchone()
+        return row[0]
+
+    def load(self, owner_id: int, since: int = 0) -> PostTable:
+        """Get kept posts of the wall since given date.
+        :param owner_id: id of the wall's owner
+        :type owner_id: int
+        :param since: timestamp to get posts since
+        :type since: int
+        :return: table with posts sorted by date from the newest
+        :rtype: PostTable
+        """
+        with closing(self.connect()) as connection:
+            rows = connection.execute(
+                "SELECT id, date, text, attachments, links, likes, comments, reposts "
+                "FROM posts WHERE owner_id = ? AND date >= ? ORDER BY date DESC, id DESC",
+                (int(owner_id), since),
+            ).fetchall()
+        if not rows:
+            return PostTable()
+        columns = list(zip(*rows))
+        columns[4] = [json.loads(links) for links in columns[4]]
+        return PostTable(*columns)
+
+    def save(
+        self, owner_id: int, posts: PostTable, since: Union[int, None] = None
+    ) -> None:
+        """Put posts of the wall in the database. Posts which are already
+        kept are updated.
+        :param owner_id: id of the wall's owner
+        :type owner_id: int
+        :param posts: posts to put
+        :type posts: PostTable
+        :param since: date since which all posts of the wall were got,
+        None if only part of the newest posts was got
+        :type since: int or None
+        """
+        owner_id = int(owner_id)
+        with closing(self.connect()) as connection, connection:
+            connection.executemany(
+                "INSERT OR REPLACE INTO posts VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                self.rows(owner_id, posts),
+            )
+            if since is not None:
+                connection.execute(
+                    "INSERT INTO walls VALUES (?, ?) ON CONFLICT (owner_id) "
+                    "DO UPDATE SET since = MIN(since, excluded.since)",
+                    (owner_id, since),
+                )
+
+    @staticmethod
+    def rows(owner_id: int, posts: PostTable) -> Iterable[tuple]:
+        """Get rows of 'posts' table from PostTable."""
+        return zip(
+            (owner_id for _ in range(len(posts))),
+            posts.id.tolist(),
+            posts.date.tolist(),
+            posts.text,
+            posts.attachments.tolist(),
+            (json.dumps(links) for links in posts.links),
+            posts.likes.tolist(),
+            posts.comments.tolist(),
+            posts.reposts.tolist(),
+        )
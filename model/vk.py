@@ -0,0 +1,82 @@
+"""Module with class 'VKClient' which keeps one pooled HTTP session for all
+calls to VK API in the process. Connections are kept alive and reused by
+all threads, rounds of requests and walls, responses are compressed.
+Statistic of connection pools is put in metrics with 'measure'.
+"""
+
+import threading
+from typing import Union
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from model import metrics
+
+
+class VKClient:
+    """Process-wide HTTP client for VK API.
+    :param pool_size: max count of connections to one host
+    :type pool_size: int
+    :param hosts: count of hosts to keep connection pools for
+    :type hosts: int
+    """
+
+    def __init__(self, pool_size: int = 36, hosts: int = 4) -> None:
+        self.pool_size = pool_size
+        self.adapter = HTTPAdapter(
+            pool_connections=hosts, pool_maxsize=pool_size, pool_block=True
+        )
+        self.session = requests.Session()
+        self.session.mount("https://", self.adapter)
+        self.session.mount("http://", self.adapter)
+        self.session.headers.update(
+            {"Accept-Encoding": "gzip, deflate", "Connection": "keep-alive"}
+        )
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    def request(self, url: str, data: Union[dict, None] = None) -> requests.Response:
+        """Make request with pooled session. Response should be closed
+        to give its connection back to the pool.
+        :param url: url of the request
+        :type url: str
+        :param data: data to post, the request is made with GET if not given
+        :type data: dict or None
+        :return: response
+        :rtype: requests.Response
+        """
+        with self._lock:
+            self.requests += 1
+        return self.session.request("POST" if data else "GET", url, data=data)
+
+    def stats(self) -> dict:
+        """Get statistic of connection pools.
+        :return: count of requests and for every host count of opened,
+        idle connections and requests made through them
+        :rtype: dict
+        """
+        pools = self.adapter.poolmanager.pools
+        hosts = {}
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            hosts[f"{pool.scheme}://{pool.host}:{pool.port}"] = {
+                "opened": pool.num_connections,
+                "idle": sum(conn is not None for conn in list(pool.pool.queue)),
+                "requests": pool.num_requests,
+                "size": self.pool_size,
+            }
+        return {"requests": self.requests, "hosts": hosts}
+
+    def measure(self) -> None:
+        """Put counts of opened and idle connections and requests of every
+        host in metrics."""
+        for host, pool in self.stats()["hosts"].items():
+            metrics.VK_CONNECTIONS.set(pool["opened"], host=host, state="opened")
+            metrics.VK_CONNECTIONS.set(pool["idle"], host=host, state="idle")
+            metrics.VK_POOL_REQUESTS.set(pool["requests"], host=host)
+
+    def close(self) -> None:
+        """Close all pooled connections."""
+        self.session.close()
@@ -0,0 +1,29 @@
+import pytest
+
+import model.service
+from benchmarks.server import FakeVKServer
+from model.limits import AdaptiveLimiter, TokenBucket
+
+
+def make_item(id, date, likes=0, comments=0, reposts=0, attachments=None):
+    item = {
+        "id": id,
+        "date": date,
+        "text": f"post {id}",
+        "likes": {"count": likes},
+        "comments": {"count": comments},
+        "reposts": {"count": reposts},
+    }
+    if attachments:
+        item["attachments"] = attachments
+    return item
+
+
+@pytest.fixture
+def fake_vk(monkeypatch):
+    with FakeVKServer({}) as server:
+        monkeypatch.setattr(model.service, "API", server.url)
+        monkeypatch.setattr(model.service, "BACKOFF", 0.01)
+        monkeypatch.setattr(model.service, "bucket", TokenBucket(1000, burst=100))
+        monkeypatch.setattr(model.service, "limiter", AdaptiveLimiter(36))
+        yield server
@@ -0,0 +1,212 @@
+import json
+import time
+
+import pytest
+
+import view.app
+from model import metrics
+from tests.conftest import make_item
+
+
+@pytest.fixture
+def client(fake_vk, monkeypatch):
+    now = int(time.time())
+    fake_vk.walls = {
+        "1": [make_item(index, now - index * 3600, likes=index) for index in range(50)],
+        "2": [make_item(index, now - index * 600) for index in range(20)],
+    }
+    monkeypatch.setattr(view.app, "TOKEN", "token")
+    view.app.walls.clear()
+    with view.app.app.test_client() as client:
+        yield client
+
+
+def test_compare_sends_periods_of_every_wall(client):
+    response = client.get("/compare/0?ids=1,2&interval=hour")
+    assert response.status_code == 200
+    data = response.get_json()
+    assert len(data["walls"]["1"]) == len(data["walls"]["2"]) == len(data["periods"])
+    assert sum(item["posts"] for item in data["walls"]["1"]) == 50
+
+
+def test_posts_answers_not_modified_for_the_same_table(client):
+    view.app.walls.get("1", "0")
+    response = client.get("/posts/1/0?interval=day")
+    assert response.status_code == 200
+    assert b"<table" in response.data
+    assert response.last_modified is not None
+    again = client.get(
+        "/posts/1/0?interval=day", headers={"If-None-Match": response.headers["ETag"]}
+    )
+    assert again.status_code == 304
+    other = client.get(
+        "/posts/1/0?interval=hour", headers={"If-None-Match": response.headers["ETag"]}
+    )
+    assert other.status_code == 200
+
+
+def test_posts_redirects_interval_form(client):
+    view.app.walls.get("1", "0")
+    response = client.post("/posts/1/0", data={"interval": "week", "look": "table"})
+    assert response.status_code == 302
+    assert "interval=week" in response.headers["Location"]
+
+
+def test_posts_downloads_csv_when_wall_is_not_kept(client, monkeypatch):
+    monkeypatch.setitem(view.app.app.config, "WTF_CSRF_ENABLED", False)
+    response = client.post("/posts/2/0", data={"id": "y", "likes": "y"})
+    assert response.mimetype == "text/csv"
+    assert len(response.data.decode().splitlines()) == 21
+
+
+def test_compare_sends_errors_of_walls(client, fake_vk):
+    fake_vk.errors = {"3": 15}
+    response = client.get("/compare/0?ids=1,3,2&interval=day")
+    assert response.status_code == 200
+    data = response.get_json()
+    assert list(data["walls"]) == ["1", "2"]
+    assert data["errors"] == {"3": {"code": 15, "message": "error 15"}}
+    assert view.app.walls.peek("1", "0") is not None
+
+
+def test_compare_sends_cached_json(client):
+    response = client.get("/compare/0?ids=1,2&interval=day")
+    assert response.status_code == 200
+    data = response.get_json()
+    assert len(data["walls"]["1"]) == len(data["walls"]["2"]) == len(data["periods"])
+    assert sum(item["posts"] for item in data["walls"]["2"]) == 20
+    again = client.get(
+        "/compare/0?ids=1,2&interval=day",
+        headers={"If-None-Match": response.headers["ETag"]},
+    )
+    assert again.status_code == 304
+
+
+def test_api_statistics_sends_json_and_ndjson(client):
+    response = client.get("/api/walls/2/statistics?duration=hour")
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data["duration"] == "hour"
+    assert sum(item["posts"] for item in data["periods"]) == 20
+    again = client.get(
+        "/api/walls/2/statistics?duration=hour",
+        headers={"If-None-Match": response.headers["ETag"]},
+    )
+    assert again.status_code == 304
+    stream = client.get(
+        "/api/walls/2/statistics?duration=hour",
+        headers={"Accept": "application/x-ndjson"},
+    )
+    assert stream.mimetype == "application/x-ndjson"
+    lines = [json.loads(line) for line in stream.data.splitlines()]
+    assert lines == data["periods"]
+    assert client.get("/api/walls/2/statistics?duration=2h").status_code == 400
+
+
+def test_api_posts_pages_by_cursor(client):
+    response = client.get("/api/walls/1/posts?fields=id,likes&limit=20")
+    data = response.get_json()
+    assert data["posts"][0] == {"id": 0, "likes": 0}
+    assert len(data["posts"]) == 20
+    ids = [post["id"] for post in data["posts"]]
+    while data["next"] is not None:
+        assert 'rel="next"' in response.headers["Link"]
+        response = client.get(
+            f"/api/walls/1/posts?fields=id,likes&limit=20&cursor={data['next']}"
+        )
+        data = response.get_json()
+        ids += [post["id"] for post in data["posts"]]
+    assert ids == list(range(50))
+    assert "Link" not in response.headers
+    assert client.get("/api/walls/1/posts?fields=id,secret").status_code == 400
+    assert client.get("/api/walls/1/posts?cursor=!").status_code == 400
+
+
+def test_api_posts_streams_all_posts_in_ndjson(client):
+    response = client.get("/api/walls/1/posts?fields=id,text&format=ndjson")
+    assert response.mimetype == "application/x-ndjson"
+    lines = [json.loads(line) for line in response.data.splitlines()]
+    assert len(lines) == 50
+    assert lines[1] == {"id": 1, "text": "post 1"}
+
+
+def test_plot_draws_svg_without_matplotlib(client):
+    response = client.get("/plot/1/0/day.svg")
+    assert response.status_code == 200
+    assert response.mimetype == "image/svg+xml"
+    assert response.data.startswith(b"<svg")
+
+
+def test_statistics_are_rendered_from_the_given_wall(client, fake_vk):
+    old = view.app.walls.get("2", "0")
+    fake_vk.walls["2"] = fake_vk.walls["2"][:5]
+    view.app.walls.clear()
+    new = view.app.walls.get("2", "0")
+    assert old.version != new.version
+    for wall, count in ((new, 5), (old, 20)):
+        body, _, _ = view.app.render_statistics((wall,), "2", "0", "hour")
+        assert sum(item["posts"] for item in json.loads(body)["periods"]) == count
+        image, _, _ = view.app.get_plot((wall,), "2", "0", "hour", "svg")
+        assert view.app.get_plot((wall,), "2", "0", "hour", "svg")[0] is image
+
+
+def test_api_statistics_adds_distribution_with_top(client):
+    response = client.get("/api/walls/1/statistics?duration=year&top=2")
+    data = response.get_json()["periods"]
+    assert sum(period["posts"] for period in data) == 50
+    assert data[-1]["top"][0] == 49
+    assert all(period["top"] == sorted(period["top"])[::-1] for period in data)
+    assert all("p99" in period for period in data)
+    assert client.get("/api/walls/1/statistics?top=-1").status_code == 400
+
+
+def test_posts_stream_keeps_wall_in_cache(client):
+    response = client.get("/posts/2/0/stream?interval=hour")
+    assert b"<table" in response.data
+    assert view.app.walls.peek("2", "0") is not None
+
+
+def test_posts_stream_follows_job_of_loading_page(client, fake_vk):
+    fake_vk.latency = 0.1
+    follows = metrics.CACHE_REQUESTS.get(method="stream", result="follow")
+    response = client.get("/posts/2/0")
+    assert b"Getting posts" in response.data
+    while "2" not in view.app.walls._pending:
+        time.sleep(0.01)
+    response = client.get("/posts/2/0/stream?interval=hour")
+    assert b"<table" in response.data
+    assert metrics.CACHE_REQUESTS.get(method="stream", result="follow") == follows + 1
+    first_pages = [
+        params for params in fake_vk.method_calls("wall.get") if params["offset"] == "0"
+    ]
+    assert len(first_pages) == 1
+
+
+def test_api_statistics_ndjson_fetches_wall_through_cache(client, fake_vk):
+    response = client.get("/api/walls/2/statistics?duration=hour&format=ndjson")
+    assert sum(json.loads(line)["posts"] for line in response.data.splitlines()) == 20
+    calls = len(fake_vk.calls)
+    assert view.app.walls.peek("2", "0") is not None
+    client.get("/api/walls/2/statistics?duration=day&format=ndjson")
+    assert len(fake_vk.calls) == calls
+
+
+def test_vk_errors_are_sent_as_json(client, fake_vk):
+    fake_vk.failures = [15]
+    response = client.get("/api/walls/1/statistics?date=0")
+    assert response.status_code == 404
+    assert response.get_json()["code"] == 404
+    assert "VK API error 15" in response.get_json()["description"]
+    fake_vk.failures = [5]
+    response = client.get("/api/walls/1/statistics?date=0")
+    assert response.status_code == 502
+    assert response.get_json()["name"] == "Bad Gateway"
+
+
+def test_metrics_has_connections_of_vk_client(client, fake_vk):
+    client.get("/api/walls/2/statistics?duration=day")
+    text = client.get("/metrics").data.decode()
+    host = fake_vk.url.rsplit("/", 1)[0]
+    assert f'vk_connections{{host="{host}",state="opened"}}' in text
+    assert f'vk_connections{{host="{host}",state="idle"}}' in text
+    assert f'vk_pool_requests{{host="{host}"}}' in text
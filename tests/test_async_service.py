@@ -0,0 +1,100 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import aiohttp
+import pytest
+
+from model import service
+from model.async_service import AsyncServiceWall
+from model.limits import AdaptiveLimiter
+from model.service import ServiceWall, VKError
+from tests.conftest import make_item
+
+
+def fill_wall(fake_vk, count):
+    fake_vk.items = [
+        make_item(count - index, 1600000000 - index * 600, likes=index % 11)
+        for index in range(count)
+    ]
+
+
+def test_async_service_wall_gets_same_posts_as_service_wall(fake_vk):
+    fill_wall(fake_vk, 750)
+    wall = ServiceWall(1)
+    wall.get_all_posts()
+    async_wall = AsyncServiceWall(1, concurrency=4)
+    async_wall.get_all_posts()
+    assert len(async_wall._posts) == 750
+    assert async_wall._posts.id.tolist() == wall._posts.id.tolist()
+    assert async_wall._posts.likes.tolist() == wall._posts.likes.tolist()
+
+
+def test_async_service_wall_stops_on_date(fake_vk):
+    fill_wall(fake_vk, 500)
+    wall = AsyncServiceWall(1, concurrency=2)
+    wall.date = 1600000000 - 150 * 600
+    wall.get_all_posts()
+    assert len(wall._posts) == 151
+    assert len(fake_vk.method_calls("wall.get")) == 2
+
+
+def test_async_service_walls_share_one_session(fake_vk):
+    fill_wall(fake_vk, 250)
+
+    async def fetch(walls):
+        async with aiohttp.ClientSession() as session:
+            await asyncio.gather(*(wall.fetch_all_posts(session) for wall in walls))
+
+    walls = [AsyncServiceWall(1, concurrency=3), AsyncServiceWall(2, concurrency=3)]
+    asyncio.run(fetch(walls))
+    assert [len(wall._posts) for wall in walls] == [250, 250]
+
+
+def test_async_service_wall_retries_throttled_calls(fake_vk):
+    fill_wall(fake_vk, 300)
+    fake_vk.failures = [6, 10, 9]
+    wall = AsyncServiceWall(1, concurrency=2)
+    wall.get_all_posts()
+    assert wall._posts.id.tolist() == list(range(300, 0, -1))
+    assert service.limiter.limit < 36
+
+
+def test_async_service_wall_raises_error_which_cant_be_retried(fake_vk):
+    fill_wall(fake_vk, 300)
+    fake_vk.failures = [15]
+    with pytest.raises(VKError) as error:
+        AsyncServiceWall(1, concurrency=2).get_all_posts()
+    assert error.value.code == 15
+
+
+def test_async_service_wall_with_default_limiter_and_many_threads(fake_vk, monkeypatch):
+    fill_wall(fake_vk, 3000)
+    fake_vk.latency = 0.01
+    monkeypatch.setattr(service, "limiter", AdaptiveLimiter(maximum=36))
+
+    async def fetch(wall):
+        asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(12))
+        await asyncio.wait_for(wall.fetch_all_posts(), 10)
+
+    wall = AsyncServiceWall(1, concurrency=36)
+    asyncio.run(fetch(wall))
+    assert len(wall._posts) == 3000
+    assert service.limiter.active == 0
+
+
+def test_async_service_wall_frees_limiter_when_cancelled(fake_vk, monkeypatch):
+    fill_wall(fake_vk, 300)
+    limiter = AdaptiveLimiter(1, maximum=1)
+    monkeypatch.setattr(service, "limiter", limiter)
+    limiter.__enter__()
+
+    async def fetch(wall):
+        task = asyncio.ensure_future(wall.fetch_all_posts())
+        await asyncio.sleep(0.05)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(fetch(AsyncServiceWall(1, concurrency=2)))
+    limiter.__exit__()
+    assert limiter.active == 0
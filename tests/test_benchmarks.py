@@ -0,0 +1,18 @@
+from benchmarks.payloads import make_items
+from benchmarks.run import compare
+from benchmarks.server import FakeVKServer
+
+
+def test_fake_vk_server_throttles_over_rate():
+    server = FakeVKServer({"-1": make_items(150)}, rate=5)
+    answers = [server.handle("wall.get", {"owner_id": "-1"}) for _ in range(10)]
+    assert answers[0]["response"]["count"] == 150
+    assert answers[-1]["error"]["error_code"] == 6
+    assert server.throttled == 4
+    server.httpd.server_close()
+
+
+def test_compare_finds_regressions_over_threshold():
+    baseline = {"results": {"fast": {"best": 0.1}, "slow": {"best": 0.1}}}
+    results = {"fast": {"best": 0.11}, "slow": {"best": 0.2}, "new": {"best": 1}}
+    assert compare(results, baseline, 0.2) == ["slow: 100.0 ms -> 200.0 ms"]
@@ -0,0 +1,236 @@
+import threading
+import time
+
+import pytest
+
+from model.client import Wall
+from model.service import ServiceWall, VKError
+from tests.conftest import make_item
+from view.cache import WallCache
+
+DAY = 86400
+START = ServiceWall.parse_date("01.01.2021")
+
+
+def fill_wall(fake_vk, days):
+    fake_vk.items = [
+        make_item(index, START + index * DAY + 60) for index in range(days - 1, -1, -1)
+    ]
+
+
+def test_wall_cache_keeps_wall_until_ttl(fake_vk):
+    fill_wall(fake_vk, 10)
+    created = []
+    cache = WallCache(lambda id, date: created.append(id) or Wall(id, date), ttl=0.05)
+    assert len(cache.get(1, "01.01.2021").posts) == 10
+    cache.get(1, "01.01.2021")
+    time.sleep(0.06)
+    cache.get(1, "01.01.2021")
+    assert created == [1, 1]
+
+
+def test_wall_cache_starts_ttl_after_slow_fetch(fake_vk):
+    fill_wall(fake_vk, 10)
+    fake_vk.latency = 0.3
+    cache = WallCache(Wall, ttl=0.2)
+    cache.get(1, "01.01.2021")
+    assert len(cache) == 1
+    calls = len(fake_vk.calls)
+    assert cache.peek(1, "01.01.2021") is not None
+    cache.get(1, "01.01.2021")
+    assert len(fake_vk.calls) == calls
+
+
+def test_wall_cache_cuts_narrower_date_from_kept_wall(fake_vk):
+    fill_wall(fake_vk, 10)
+    cache = WallCache(Wall)
+    cache.get(1, "01.01.2021")
+    calls = len(fake_vk.calls)
+    wall = cache.get(1, "06.01.2021")
+    assert wall.posts.id.tolist() == [9, 8, 7, 6, 5]
+    assert len(fake_vk.calls) == calls
+    assert len(cache) == 1
+
+
+def test_wall_cache_fetches_only_older_tail_for_wider_date(fake_vk):
+    fake_vk.items = [
+        make_item(index, START + index * 3600 + 60) for index in range(1999, -1, -1)
+    ]
+    cache = WallCache(Wall)
+    newer = cache.get(1, "01.03.2021")
+    calls = len(fake_vk.calls)
+    wider = cache.get(1, "01.01.2021")
+    assert wider.posts.id.tolist() == list(range(1999, -1, -1))
+    pages = [
+        int(params["offset"])
+        for params in fake_vk.method_calls("wall.get")[calls:]
+        if params["count"] == "100"
+    ]
+    assert not set(pages) & {100, 200, 300, 400}
+    assert cache.posts == 2000
+    assert cache.get(1, "01.03.2021").posts.id.tolist() == newer.posts.id.tolist()
+
+
+def test_wall_cache_evicts_least_recently_used_over_budget(fake_vk):
+    fill_wall(fake_vk, 10)
+    created = []
+    cache = WallCache(
+        lambda id, date: created.append(id) or Wall(id, date), max_posts=25
+    )
+    cache.get(1, None)
+    cache.get(2, None)
+    cache.get(1, None)
+    cache.get(3, None)
+    assert len(cache) == 2
+    assert cache.posts == 20
+    cache.get(1, None)
+    cache.get(2, None)
+    assert created == [1, 2, 3, 2]
+
+
+def test_wall_cache_fetches_wall_once_for_concurrent_callers(fake_vk):
+    fill_wall(fake_vk, 10)
+    fake_vk.latency = 0.1
+    created = []
+    cache = WallCache(lambda id, date: created.append(id) or Wall(id, date))
+    result = []
+    threads = [
+        threading.Thread(target=lambda: result.append(cache.get(1, None)))
+        for _ in range(5)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert created == [1]
+    assert [len(wall.posts) for wall in result] == [10] * 5
+
+
+def test_wall_cache_does_not_keep_failed_fetch():
+    def factory(id, date):
+        raise ValueError(id)
+
+    cache = WallCache(factory)
+    with pytest.raises(ValueError):
+        cache.get(1, None)
+    assert len(cache) == 0
+
+
+def test_wall_cache_put_keeps_wider_wall(fake_vk):
+    fill_wall(fake_vk, 10)
+    cache = WallCache(Wall)
+    cache.get(1, "01.01.2021")
+    narrower = Wall(1, "05.01.2021")
+    narrower.posts
+    cache.put(1, narrower)
+    assert cache.posts == 10
+    cache.put(2, narrower)
+    assert len(cache) == 2
+    assert cache.peek(2, "05.01.2021").posts.id.tolist() == [9, 8, 7, 6, 5, 4]
+    assert cache.peek(2, "01.01.2021") is None
+
+
+def test_wall_cache_fills_missing_fields_of_kept_wall(fake_vk):
+    fill_wall(fake_vk, 10)
+    cache = WallCache(lambda id, date: Wall(id, date, fields=("date", "likes")))
+    cache.get(1, "01.01.2021")
+    assert cache.peek(1, "01.01.2021", fields=("text",)) is None
+    calls = len(fake_vk.calls)
+    wall = cache.get(1, "05.01.2021", fields=("text",))
+    assert wall.posts.text == [f"post {index}" for index in range(9, 3, -1)]
+    assert len(fake_vk.calls) > calls
+    assert cache.peek(1, "01.01.2021", fields=("text",)) is not None
+
+
+def test_wall_cache_stream_registers_fetch_as_pending(fake_vk):
+    fill_wall(fake_vk, 10)
+    fake_vk.latency = 0.05
+    created = []
+    cache = WallCache(lambda id, date: created.append(id) or Wall(id, date))
+    stream = cache.stream(
+        1, "01.01.2021", lambda wall, pages: wall.stream_statistic("day", pages=pages)
+    )
+    next(stream)
+    results = []
+    thread = threading.Thread(target=lambda: results.append(cache.get(1, "01.01.2021")))
+    thread.start()
+    statistic = list(stream)
+    thread.join()
+    assert created == [1]
+    assert len(results[0].posts) == 10
+    assert sum(item.posts for item in statistic) <= 10
+    assert len(cache) == 1
+
+
+def test_wall_cache_stream_closed_early_lets_others_fetch(fake_vk):
+    fill_wall(fake_vk, 10)
+    cache = WallCache(Wall)
+    stream = cache.stream(
+        1, "01.01.2021", lambda wall, pages: wall.stream_statistic("day", pages=pages)
+    )
+    next(stream)
+    stream.close()
+    assert len(cache.get(1, "01.01.2021").posts) == 10
+
+
+def test_wall_cache_stream_follows_pages_of_running_get(fake_vk):
+    fill_wall(fake_vk, 1000)
+    fake_vk.latency = 0.2
+    cache = WallCache(Wall)
+    thread = threading.Thread(target=cache.get, args=(1, "01.01.2021"))
+    thread.start()
+    while 1 not in cache._pending:
+        time.sleep(0.01)
+    stream = cache.stream(
+        1, "01.01.2021", lambda wall, pages: wall.stream_statistic("day", pages=pages)
+    )
+    first = next(stream)
+    assert thread.is_alive()
+    statistic = [first, *stream]
+    thread.join()
+    assert sum(item.posts for item in statistic) == 1000
+    first_pages = [
+        params for params in fake_vk.method_calls("wall.get") if params["offset"] == "0"
+    ]
+    assert len(first_pages) == 1
+    assert len(cache.get(1, "01.01.2021").posts) == 1000
+
+
+def test_wall_cache_stream_closed_early_finishes_fetch_for_readers(fake_vk):
+    fill_wall(fake_vk, 300)
+    cache = WallCache(Wall)
+
+    def produce(wall, pages):
+        return wall.stream_statistic("day", pages=pages)
+
+    owner = cache.stream(1, "01.01.2021", produce)
+    next(owner)
+    reader = cache.stream(1, "01.01.2021", produce)
+    first = next(reader)
+    owner.close()
+    statistic = [first, *reader]
+    assert sum(item.posts for item in statistic) == 300
+    assert len(cache) == 1
+    assert not cache._pending
+
+
+def test_wall_cache_get_many_registers_fetches_as_pending(fake_vk):
+    fill_wall(fake_vk, 10)
+    fake_vk.errors = {"3": 30}
+    fake_vk.latency = 0.1
+    created = []
+    cache = WallCache(lambda id, date: created.append(id) or Wall(id, date))
+    results = []
+    thread = threading.Thread(
+        target=lambda: results.extend(cache.get_many([1, 2, 3], "01.01.2021"))
+    )
+    thread.start()
+    while len(cache._pending) < 3:
+        time.sleep(0.01)
+    assert len(cache.get(2, "01.01.2021").posts) == 10
+    thread.join()
+    assert created == [1, 2, 3]
+    assert [len(wall.posts) for wall in results[:2]] == [10, 10]
+    assert isinstance(results[2], VKError) and results[2].code == 30
+    assert len(cache) == 2
+    assert not cache._pending
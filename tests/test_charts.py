@@ -0,0 +1,55 @@
+import subprocess
+import sys
+from xml.etree import ElementTree
+
+import pytest
+
+from view.charts import MatplotlibRenderer, Renderer, SVGRenderer, get_renderer
+
+DATA = [("03.2021", 4, 10.5, 2, 0), ("02.2021", 0, 0, 0, 0), ("01.2021", 2, 3, 1, 1)]
+
+
+def test_svg_renderer_draws_bars_of_every_series():
+    image = SVGRenderer().render(DATA, "svg")
+    root = ElementTree.fromstring(image)
+    groups = root.findall("{http://www.w3.org/2000/svg}g")
+    assert [group.get("fill") for group in groups] == ["grey", "red", "green", "blue"]
+    assert [len(group) for group in groups] == [2, 2, 2, 1]
+    assert b"03.2021" in image
+
+
+def test_svg_renderer_draws_empty_statistic():
+    root = ElementTree.fromstring(SVGRenderer().render([], "svg"))
+    assert root.get("width") == "640"
+
+
+def test_get_ticks_uses_round_steps():
+    assert SVGRenderer.get_ticks(10.5) == [0, 5, 10, 15]
+    assert SVGRenderer.get_ticks(40) == [0, 10, 20, 30, 40]
+    assert SVGRenderer.get_ticks(0) == [0, 0.2, 0.4, 0.6, 0.8, 1]
+
+
+def test_get_renderer_falls_back_to_renderer_with_format():
+    assert isinstance(get_renderer("svg"), SVGRenderer)
+    assert isinstance(get_renderer("svg", "matplotlib"), MatplotlibRenderer)
+    assert isinstance(get_renderer("png"), MatplotlibRenderer)
+    with pytest.raises(ValueError):
+        get_renderer("gif")
+
+
+def test_app_does_not_import_matplotlib():
+    code = "import sys, view.app; print('matplotlib' in sys.modules)"
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+    assert result.stdout.strip() == "False"
+
+
+def test_renderer_without_render_cant_be_created():
+    class Empty(Renderer):
+        formats = ("svg",)
+
+    with pytest.raises(TypeError):
+        Renderer()
+    with pytest.raises(TypeError):
+        Empty()
@@ -1,8 +1,10 @@
 import csv
+import io
 import time
 
-from model.client import Wall
-from model.service import Post
+from model.client import Wall, compare
+from model.service import Post, PostTable, ServiceWall
+from tests.conftest import make_item
 
 
 def test_init_wall_for_user():
@@ -23,21 +25,26 @@ def test_posts_for_wall():
     assert wall.posts == [1]
 
 
-def test_get_csv(tmp_path):
-    path = tmp_path / "text.csv"
+def test_get_csv():
     wall = Wall(1)
-    wall._posts = [Post("id", "date", "text", 1, ["link"], 2, 3, 4)]
-    wall.get_csv("id", "text", path=path)
-    with open(path, "r") as fi:
-        reader = csv.reader(fi)
-        for row in reader:
-            expected = row
-    assert expected == ["id", "text"]
+    wall._posts = PostTable.from_posts([Post(1, 10, "text", 1, ["link"], 2, 3, 4)])
+    rows = list(csv.reader(io.StringIO("".join(wall.get_csv("id", "text")))))
+    assert rows == [["id", "text"], ["1", "text"]]
+
+
+def test_get_csv_yields_parts():
+    wall = Wall(1)
+    wall._posts = PostTable.from_posts(
+        Post(index, 10, "", 0, ["link"], index, 0, 0) for index in range(5)
+    )
+    parts = list(wall.get_csv("id", "links", chunk=2))
+    assert len(parts) == 4
+    assert parts[-1] == "4,['link']\r\n"
 
 
 def test_get_statistic_for_period():
     wall = Wall(1)
-    wall._posts = [Post("id", 10, "text", 1, ["link"], 1, 1, 1)]
+    wall._posts = PostTable.from_posts([Post(1, 10, "text", 1, ["link"], 1, 1, 1)])
     stat = wall.get_statistic_for_period(wall._posts, "period", 0)
     assert stat.period == "period"
     assert stat.posts == 1
@@ -56,44 +63,199 @@ def test_get_statistic_for_period_handles_zero_division_error():
     assert stat.reposts == 0
 
 
-def test_change_period_with_year():
-    result = Wall.change_period("year", "2021", 122)
-    assert result[0] == "2020"
+def test_get_statistic_for_period_stops_on_older_posts():
+    posts = PostTable.from_posts(
+        [
+            Post(3, 30, "text", 0, [], 4, 2, 0),
+            Post(2, 20, "text", 0, [], 2, 1, 1),
+            Post(1, 10, "text", 0, [], 9, 9, 9),
+        ]
+    )
+    stat = Wall.get_statistic_for_period(posts, "period", 15)
+    assert stat.posts == 2
+    assert stat.likes == 3.00
+    assert stat.comments == 1.50
+    assert stat.reposts == 0.50
+
+
+def test_get_statistic_matches_statistic_for_period():
+    now = int(time.time())
+    wall = Wall(1)
+    wall._posts = PostTable.from_posts(
+        Post(index, now - index * 20000, "", 0, [], index % 7, index % 5, index % 3)
+        for index in range(300)
+    )
+    expected = []
+    posts, length = wall._posts, 0
+    for period, point in Wall.iter_periods("day"):
+        if length >= len(posts):
+            break
+        stat = Wall.get_statistic_for_period(posts[length:], period, point)
+        length += stat.posts
+        expected.append((stat.period, stat.posts, stat.likes, stat.comments))
+    result = [
+        (stat.period, stat.posts, stat.likes, stat.comments)
+        for stat in wall.get_statistic("day")
+    ]
+    assert result == expected
+
+
+def test_get_since_cuts_posts_by_date():
+    since = ServiceWall.parse_date("02.01.2021")
+    wall = Wall(1, "01.01.2021")
+    wall._posts = PostTable.from_posts(
+        Post(index, since + 100 - index * 50, "", 0, [], 0, 0, 0) for index in range(4)
+    )
+    wall._fetched = True
+    assert wall.covers("02.01.2021")
+    assert not wall.covers("31.12.2020")
+    narrowed = wall.get_since("02.01.2021")
+    assert narrowed.date == "02.01.2021"
+    assert narrowed.posts.id.tolist() == [0, 1, 2]
+    assert narrowed.posts.date.base is not None
+    assert narrowed.posts.text.items is wall.posts.text
+
+
+def test_get_since_takes_rollup_lazily():
+    since = ServiceWall.parse_date("02.01.2021")
+    wall = Wall(1, "01.01.2021")
+    wall._posts = PostTable.from_posts(
+        Post(index, since + 7200 - index * 3600, "", 0, [], index, 0, 0)
+        for index in range(4)
+    )
+    wall._fetched = True
+    wall.version = 1
+    narrowed = wall.get_since("02.01.2021")
+    assert wall._rollup is None and narrowed._rollup is None
+    assert narrowed.rollup.likes.tolist() == [0, 1, 2]
+    assert narrowed.rollup.starts.base is not None
+    assert wall._rollup is not None
+
+
+def test_locate_finds_post_after_cursor():
+    wall = Wall(1)
+    wall._posts = PostTable.from_posts(
+        Post(id, date, "", 0, [], 0, 0, 0)
+        for id, date in ((5, 300), (4, 200), (3, 200), (2, 200), (1, 100))
+    )
+    wall._fetched = True
+    assert wall.locate(300, 5) == 1
+    assert wall.locate(200, 3) == 3
+    assert wall.locate(200, 6) == 1
+    assert wall.locate(250, 0) == 1
+    assert wall.locate(50, 0) == 5
+
+
+def test_get_records_yields_chosen_fields_by_parts():
+    wall = Wall(1)
+    wall._posts = PostTable.from_posts(
+        Post(index, 1000 - index, "", 0, [], index, 0, 0) for index in range(5)
+    )
+    wall._fetched = True
+    parts = list(wall.get_records(("id", "likes"), 1, 4, chunk=2))
+    assert parts == [
+        [{"id": 1, "likes": 1}, {"id": 2, "likes": 2}],
+        [{"id": 3, "likes": 3}],
+    ]
+
+
+def test_stream_statistic_matches_get_statistic(fake_vk):
+    now = int(time.time())
+    fake_vk.items = [
+        make_item(index, now - index * 7000, likes=index % 9) for index in range(450)
+    ]
+    expected = [
+        (stat.period, stat.posts, stat.likes) for stat in Wall(1).get_statistic("day")
+    ]
+    wall = Wall(1)
+    result = [
+        (stat.period, stat.posts, stat.likes) for stat in wall.stream_statistic("day")
+    ]
+    assert result == expected
+    assert len(wall.posts) == 450
+
+
+def test_stream_statistic_with_old_pinned_post(fake_vk):
+    now = int(time.time())
+    pinned = dict(make_item(1000, now - 800 * 86400, likes=7), is_pinned=1)
+    fake_vk.items = [pinned] + [
+        make_item(index, now - index * 3000, likes=index % 5) for index in range(450)
+    ]
+    expected = [
+        (stat.period, stat.posts, stat.likes) for stat in Wall(1).get_statistic("day")
+    ]
+    result = [
+        (stat.period, stat.posts, stat.likes)
+        for stat in Wall(1).stream_statistic("day")
+    ]
+    assert result == expected
+    assert sum(posts for _, posts, _ in result) == 451
 
 
-def test_change_period_with_month():
-    result = Wall.change_period("month", "12.2021", 122)
-    assert result[0] == "11.2021"
+def test_stream_statistic_gives_period_when_fetch_passes_it(monkeypatch):
+    _, point = next(Wall.iter_periods("hour"))
+    pages = [
+        PostTable.from_posts([Post(3, point + 10, "", 0, [], 1, 0, 0)]),
+        PostTable.from_posts([Post(2, point - 10, "", 0, [], 2, 0, 0)]),
+        PostTable.from_posts([Post(1, point - 7300, "", 0, [], 3, 0, 0)]),
+    ]
+    got = []
 
+    def iter_pages(self):
+        for page in pages:
+            got.append(page)
+            yield page
+        self._posts = PostTable.concat(pages)
 
-def test_change_period_with_month_between_two_years():
-    result = Wall.change_period("month", "1.2021", 122)
-    assert result[0] == "12.2020"
+    monkeypatch.setattr(ServiceWall, "iter_pages", iter_pages)
+    stream = Wall(1).stream_statistic("hour")
+    first = next(stream)
+    assert (first.posts, first.likes, len(got)) == (1, 1.00, 2)
+    assert [stat.posts for stat in stream] == [1, 0, 1]
 
 
-def test_change_period_with_day():
-    arg1 = "11.01.2021"
-    arg2 = time.mktime(time.strptime(arg1, "%d.%m.%Y"))
-    result = Wall.change_period("day", arg1, arg2)
-    assert result[0] == "10.01.2021"
+def test_stats_only_wall_fills_text_for_csv(fake_vk):
+    now = int(time.time())
+    fake_vk.items = [make_item(index, now - index * 60) for index in range(150)]
+    wall = Wall(1, fields=PostTable.STATS)
+    assert wall.posts.text == [None] * 150
+    assert wall.posts.links == [None] * 150
+    assert not wall.keeps(("id", "text"))
+    rows = list(csv.reader(io.StringIO("".join(wall.get_csv("id", "text")))))
+    assert rows[1] == ["0", "post 0"]
+    assert wall.keeps(("text",))
+    assert not wall.keeps(("links",))
 
 
-def test_change_period_with_day_between_two_months():
-    arg1 = "01.01.2021"
-    arg2 = time.mktime(time.strptime(arg1, "%d.%m.%Y"))
-    result = Wall.change_period("day", arg1, arg2)
-    assert result[0] == "31.12.2020"
+def test_fill_changes_fields_after_posts_are_got_again(fake_vk, monkeypatch):
+    now = int(time.time())
+    fake_vk.items = [make_item(index, now - index * 60) for index in range(10)]
+    wall = Wall(1, fields=PostTable.STATS)
+    wall.posts
+    get_all_posts = ServiceWall.get_all_posts
+    seen = []
 
+    def check(self):
+        seen.append(wall.keeps(("text",)))
+        get_all_posts(self)
 
-def test_change_period_with_hour():
-    arg1 = "12.11.01.2021"
-    arg2 = time.mktime(time.strptime(arg1, "%H.%d.%m.%Y"))
-    result = Wall.change_period("hour", arg1, arg2)
-    assert result[0] == "11.11.01.2021"
+    monkeypatch.setattr(ServiceWall, "get_all_posts", check)
+    wall.fill(("text",))
+    assert seen == [False]
+    assert wall.keeps(("text",))
+    assert wall.posts.text[0] == "post 0"
 
 
-def test_change_period_with_hour_between_two_days():
-    arg1 = "00.01.01.2021"
-    arg2 = time.mktime(time.strptime(arg1, "%H.%d.%m.%Y"))
-    result = Wall.change_period("hour", arg1, arg2)
-    assert result[0] == "23.31.12.2020"
+def test_compare_aligns_periods_of_walls(fake_vk):
+    now = int(time.time())
+    fake_vk.walls = {
+        "1": [make_item(index, now - index * 3600, likes=2) for index in range(120)],
+        "2": [make_item(index, now - index * 60) for index in range(10)],
+    }
+    periods, (first, second) = compare([1, 2], duration="day")
+    expected = [stat.period for stat in Wall(1).get_statistic("day")]
+    assert periods == expected
+    assert [stat.period for stat in first] == [stat.period for stat in second]
+    assert sum(stat.posts for stat in first) == 120
+    assert sum(stat.posts for stat in second) == 10
+    assert second[-1].posts == 0
@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+
+from model.client import Wall
+from model.distribution import describe
+from model.periods import get_bounds
+from model.service import PostTable
+
+START = 1609459200
+
+
+def make_posts(rows):
+    ids, dates, likes = zip(*rows)
+    count = len(rows)
+    return PostTable(
+        ids, dates, [""] * count, [0] * count, [[]] * count, likes, likes, [0] * count
+    )
+
+
+def test_describe_matches_numpy_quantiles():
+    rng = np.random.default_rng(0)
+    dates = np.sort(rng.integers(START, START + 100 * 3600, 2000))[::-1]
+    likes = rng.integers(0, 1000, 2000)
+    posts = make_posts(list(zip(range(2000, 0, -1), dates, likes)))
+    points = START + 3600 * np.arange(99, -1, -1)
+    result = describe(posts, points, top=2)
+    bounds = get_bounds(posts.date, points)
+    for index, item in enumerate(result):
+        values = likes[bounds[index] : bounds[index + 1]]
+        if not len(values):
+            assert item["median"]["likes"] == 0 and item["top"] == []
+            continue
+        assert item["median"]["likes"] == round(float(np.median(values)), 2)
+        assert item["p90"]["comments"] == round(float(np.quantile(values, 0.9)), 2)
+        assert item["p99"]["reposts"] == 0
+        ids = posts.id[bounds[index] : bounds[index + 1]]
+        assert likes[np.isin(posts.id, item["top"])].min() >= np.sort(values)[-2]
+        assert set(item["top"]) <= set(ids.tolist())
+
+
+def test_describe_keeps_newer_post_first_in_top_for_equal_likes():
+    posts = make_posts([(3, START + 30, 5), (2, START + 20, 5), (1, START + 10, 9)])
+    [item] = describe(posts, np.array([START]), top=5)
+    assert item["top"] == [1, 3, 2]
+    assert item["median"] == {"likes": 5, "comments": 5, "reposts": 0}
+    with pytest.raises(ValueError):
+        describe(posts, np.array([START]), key="views")
+
+
+def test_get_distribution_adds_distribution_to_statistic():
+    wall = Wall(1)
+    wall._posts = make_posts([(3, START + 30, 5), (2, START + 20, 1), (1, 100, 9)])
+    wall._fetched = True
+    statistic = wall.get_distribution("year", top=1)
+    expected = list(wall.get_statistic("year"))
+    assert [item.posts for item in statistic] == [item.posts for item in expected]
+    assert statistic[-1].top == [1]
+    assert statistic[-1].p99 == {"likes": 9, "comments": 9, "reposts": 0}
+    assert expected[-1].median is None
@@ -0,0 +1,50 @@
+import threading
+import time
+
+from view.jobs import JobManager
+
+
+def wait(job):
+    job.future.exception()
+    while job.finished is None:
+        time.sleep(0.01)
+
+
+def test_job_manager_runs_job_with_progress():
+    manager = JobManager(workers=1)
+    job = manager.submit("key", lambda progress: progress)
+    assert job.future.result() is job.progress
+    assert manager.get(job.id) is job
+    assert job.status()["state"] == "done"
+
+
+def test_job_manager_does_not_duplicate_running_job():
+    manager = JobManager(workers=2)
+    event = threading.Event()
+    first = manager.submit("key", lambda progress: event.wait())
+    second = manager.submit("key", lambda progress: None)
+    assert first is second
+    event.set()
+    wait(first)
+    third = manager.submit("key", lambda progress: None)
+    assert third is not first
+
+
+def test_job_status_has_error_of_failed_job():
+    def fail(progress):
+        raise ValueError("wrong id")
+
+    manager = JobManager(workers=1)
+    job = manager.submit("key", fail)
+    job.future.exception()
+    status = job.status()
+    assert status["state"] == "failed"
+    assert status["error"] == "wrong id"
+
+
+def test_job_manager_forgets_old_jobs():
+    manager = JobManager(workers=1, keep=0)
+    job = manager.submit("first", lambda progress: None)
+    wait(job)
+    manager.submit("second", lambda progress: None)
+    assert manager.get(job.id) is None
@@ -0,0 +1,81 @@
+import asyncio
+import threading
+import time
+
+from model.limits import AdaptiveLimiter, TokenBucket
+
+
+def test_token_bucket_limits_rate():
+    bucket = TokenBucket(50, burst=1)
+    start = time.monotonic()
+    for _ in range(6):
+        bucket.acquire()
+    assert time.monotonic() - start >= 0.09
+
+
+def test_token_bucket_adapts_rate():
+    bucket = TokenBucket(10, minimum=2, maximum=11, step=0.5)
+    bucket.slow_down()
+    bucket.slow_down()
+    bucket.slow_down()
+    assert bucket.rate == 2
+    for _ in range(30):
+        bucket.speed_up()
+    assert bucket.rate == 11
+
+
+def test_adaptive_limiter_increases_additively_and_halves():
+    limiter = AdaptiveLimiter(4, maximum=6)
+    for _ in range(4):
+        limiter.success()
+    assert limiter.limit == 5
+    limiter.throttled()
+    assert limiter.limit == 2
+    limiter.throttled()
+    limiter.throttled()
+    assert limiter.limit == 1
+
+
+def test_adaptive_limiter_limits_simultaneous_calls():
+    limiter = AdaptiveLimiter(2)
+    active = []
+
+    def work():
+        with limiter:
+            active.append(limiter.active)
+            time.sleep(0.02)
+
+    threads = [threading.Thread(target=work) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert max(active) == 2
+
+
+def test_token_bucket_acquires_in_event_loop():
+    bucket = TokenBucket(50, burst=1)
+
+    async def acquire():
+        for _ in range(6):
+            await bucket.acquire_async()
+
+    start = time.monotonic()
+    asyncio.run(acquire())
+    assert time.monotonic() - start >= 0.09
+
+
+def test_adaptive_limiter_enters_in_event_loop():
+    limiter = AdaptiveLimiter(1)
+    limiter.__enter__()
+
+    async def enter():
+        task = asyncio.ensure_future(limiter.enter_async())
+        await asyncio.sleep(0.02)
+        assert not task.done()
+        limiter.__exit__()
+        assert await task is limiter
+
+    asyncio.run(enter())
+    assert limiter.active == 1
+    assert not limiter.try_enter()
@@ -0,0 +1,46 @@
+from model import metrics
+from model.service import ServiceWall
+from tests.conftest import make_item
+
+
+def test_counter_renders_labels():
+    counter = metrics.Counter("calls_total", "Calls.")
+    counter.inc(method="wall.get")
+    counter.inc(2, method="wall.get")
+    counter.inc(method='say "hi"')
+    assert counter.render().splitlines() == [
+        "# HELP calls_total Calls.",
+        "# TYPE calls_total counter",
+        'calls_total{method="wall.get"} 3',
+        'calls_total{method="say \\"hi\\""} 1',
+    ]
+
+
+def test_histogram_renders_cumulative_buckets():
+    histogram = metrics.Histogram("latency_seconds", "Latency.", (0.1, 1))
+    for value in (0.05, 0.5, 0.7, 3):
+        histogram.observe(value, stage="fetch")
+    assert histogram.samples() == [
+        'latency_seconds_bucket{stage="fetch",le="0.1"} 1',
+        'latency_seconds_bucket{stage="fetch",le="1"} 3',
+        'latency_seconds_bucket{stage="fetch",le="+Inf"} 4',
+        'latency_seconds_sum{stage="fetch"} 4.25',
+        'latency_seconds_count{stage="fetch"} 4',
+    ]
+    assert histogram.get(stage="fetch") == 4
+
+
+def test_wall_fetch_counts_calls_and_pages(fake_vk):
+    fake_vk.items = [make_item(index, 100000 - index * 10) for index in range(250)]
+    calls = metrics.VK_CALL_SECONDS.get(method="wall.get")
+    pages = metrics.PAGES.get()
+    wasted = metrics.WASTED_PAGES.get()
+    wall = ServiceWall(1)
+    wall.until = 100000 - 1500
+    wall.get_all_posts()
+    assert metrics.VK_CALL_SECONDS.get(method="wall.get") - calls == len(
+        fake_vk.method_calls("wall.get")
+    )
+    assert metrics.PAGES.get() - pages == 3
+    assert metrics.WASTED_PAGES.get() - wasted == 1
+    assert "vk_call_seconds_bucket" in metrics.registry.render()
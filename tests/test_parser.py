@@ -0,0 +1,80 @@
+import json
+
+from model import parser
+from tests.conftest import make_item
+
+
+def test_loads_decodes_bytes():
+    assert parser.loads(b'{"response": {"count": 1}}') == {"response": {"count": 1}}
+
+
+def test_loads_without_orjson(monkeypatch):
+    monkeypatch.setattr(parser, "orjson", None)
+    assert parser.loads(json.dumps([1, 2])) == [1, 2]
+
+
+def test_find_url_in_nested_list():
+    assert parser.find_url({"key": ["value", {"url": "link"}]}) == "link"
+
+
+def test_photo_link_takes_largest_size():
+    photo = {
+        "sizes": [
+            {"type": "s", "url": "small", "width": 75, "height": 50},
+            {"type": "x", "url": "large", "width": 604, "height": 403},
+            {"type": "m", "url": "medium", "width": 130, "height": 87},
+        ]
+    }
+    assert parser.get_link({"type": "photo", "photo": photo}) == "large"
+
+
+def test_photo_link_uses_type_order_without_sizes():
+    photo = {"sizes": [{"type": "m", "url": "medium"}, {"type": "z", "url": "big"}]}
+    assert parser.get_link({"type": "photo", "photo": photo}) == "big"
+
+
+def test_photo_link_prefers_original():
+    photo = {"orig_photo": {"url": "original"}, "sizes": [{"url": "size"}]}
+    assert parser.get_link({"type": "photo", "photo": photo}) == "original"
+
+
+def test_video_and_poll_links_are_built_from_ids():
+    video = {"type": "video", "video": {"owner_id": -1, "id": 2, "image": []}}
+    poll = {"type": "poll", "poll": {"owner_id": -1, "id": 3}}
+    assert parser.get_link(video) == "https://vk.com/video-1_2"
+    assert parser.get_link(poll) == "https://vk.com/poll-1_3"
+
+
+def test_unknown_type_falls_back_to_first_url():
+    attachment = {"type": "sticker", "sticker": {"images": [{"url": "image"}]}}
+    assert parser.get_link(attachment) == "image"
+
+
+def test_broken_attachment_falls_back_to_first_url():
+    attachment = {"type": "video", "video": {"player": {"url": "player"}}}
+    assert parser.get_link(attachment) == "player"
+
+
+def test_read_items_keeps_bounds():
+    items = [make_item(i, 100 - i, likes=i) for i in range(10)]
+    columns, flag = parser.read_items(items, since=93, until=99)
+    assert columns["id"] == [2, 3, 4, 5, 6, 7]
+    assert columns["likes"] == [2, 3, 4, 5, 6, 7]
+    assert columns["links"] == [[]] * 6
+    assert flag is False
+
+
+def test_read_items_continues_on_full_page():
+    items = [make_item(i, 1000 - i) for i in range(100)]
+    columns, flag = parser.read_items(items)
+    assert len(columns["id"]) == 100
+    assert flag is True
+
+
+def test_read_items_drops_fields_out_of_projection():
+    attachment = {"type": "doc", "doc": {"url": "doc"}}
+    items = [make_item(1, 10, attachments=[attachment])]
+    columns, _ = parser.read_items(items, fields=("id", "date"))
+    assert columns["text"] == [None]
+    assert columns["links"] == [None]
+    assert columns["attachments"] == [1]
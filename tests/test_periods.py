@@ -0,0 +1,92 @@
+import itertools
+import time
+from zoneinfo import ZoneInfo
+
+import numpy as np
+import pytest
+
+from model import periods
+
+NOW = time.mktime((2021, 3, 15, 13, 47, 0, 0, 0, -1))
+
+
+@pytest.mark.parametrize(
+    "duration, expected",
+    [
+        ("year", ["2021", "2020", "2019"]),
+        ("quarter", ["Q1.2021", "Q4.2020", "Q3.2020"]),
+        ("month", ["03.2021", "02.2021", "01.2021"]),
+        ("week", ["15.03.2021", "08.03.2021", "01.03.2021"]),
+        ("day", ["15.03.2021", "14.03.2021", "13.03.2021"]),
+        ("hour", ["13.15.03.2021", "12.15.03.2021", "11.15.03.2021"]),
+        ("15min", ["13:45.15.03.2021", "13:30.15.03.2021", "13:15.15.03.2021"]),
+    ],
+)
+def test_iter_periods_labels(duration, expected):
+    result = itertools.islice(periods.iter_periods(duration, now=NOW), 3)
+    assert [label for label, _ in result] == expected
+
+
+@pytest.mark.parametrize(
+    "duration, now, expected",
+    [
+        ("year", (2021, 1, 1, 0), ["2021", "2020"]),
+        ("month", (2021, 1, 11, 0), ["01.2021", "12.2020"]),
+        ("day", (2021, 1, 1, 0), ["01.01.2021", "31.12.2020"]),
+        ("hour", (2021, 1, 1, 0), ["00.01.01.2021", "23.31.12.2020"]),
+    ],
+)
+def test_iter_periods_passes_year(duration, now, expected):
+    moment = time.mktime((*now, 30, 0, 0, 0, -1))
+    result = itertools.islice(periods.iter_periods(duration, now=moment), 2)
+    assert [label for label, _ in result] == expected
+
+
+def test_iter_periods_points_match_local_time():
+    result = itertools.islice(periods.iter_periods("month", now=NOW), 2)
+    assert [point for _, point in result] == [
+        int(time.mktime(time.strptime("03.2021", "%m.%Y"))),
+        int(time.mktime(time.strptime("02.2021", "%m.%Y"))),
+    ]
+
+
+def test_iter_periods_rejects_wrong_duration():
+    assert not periods.is_duration("7min")
+    assert periods.is_duration("90min")
+    with pytest.raises(ValueError):
+        next(periods.iter_periods("decade"))
+
+
+def test_iter_periods_in_timezone_keeps_dst():
+    tz = ZoneInfo("America/New_York")
+    result = list(itertools.islice(periods.iter_periods("hour", tz, 1615716000), 5))
+    assert [label[:2] for label, _ in result] == ["06", "05", "04", "03", "01"]
+    day, previous = itertools.islice(periods.iter_periods("day", tz, 1615802400), 2)
+    assert day[1] - previous[1] == 23 * 3600
+
+
+@pytest.mark.parametrize("duration", ["hour", "30min", "day", "month"])
+@pytest.mark.parametrize("name", [None, "America/New_York", "Asia/Kolkata"])
+def test_get_boundaries_matches_iter_periods(duration, name):
+    tz = periods.get_timezone(name)
+    oldest = int(NOW) - 400 * 86400
+    labels, points = periods.get_boundaries(duration, oldest, tz, NOW)
+    expected = list(
+        itertools.islice(periods.iter_periods(duration, tz, NOW), len(labels))
+    )
+    assert list(zip(labels, points.tolist())) == expected
+    assert points[-1] <= oldest < points[-2]
+
+
+def test_get_bounds_splits_rows_by_periods():
+    bounds = periods.get_bounds(np.array([120, 110, 95]), np.array([115, 100, 90]))
+    assert bounds.tolist() == [0, 1, 2, 3]
+
+
+def test_sum_periods_counts_and_sums_rows():
+    dates = np.array([40, 30, 20, 5])
+    likes = np.array([4, 2, 1, 3])
+    points = np.array([25, 15, 10, 0, -10])
+    counts, (sums,) = periods.sum_periods(dates, points, [likes])
+    assert counts == [2, 1, 0, 1, 0]
+    assert sums == [6, 1, 0, 3, 0]
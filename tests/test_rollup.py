@@ -0,0 +1,65 @@
+import numpy as np
+
+from model.client import Wall
+from model.rollup import HOUR, Rollup, aligned
+from model.service import Post, PostTable, ServiceWall
+from tests.conftest import make_item
+
+START = ServiceWall.parse_date("01.01.2021")
+
+
+def make_posts(dates):
+    return PostTable.from_posts(
+        Post(index, date, "", 0, [], index % 7, index % 3, index % 2)
+        for index, date in enumerate(sorted(dates, reverse=True))
+    )
+
+
+def test_rollup_sums_posts_by_hours():
+    posts = make_posts([START + 10, START + 20, START + HOUR, START + 3 * HOUR + 5])
+    rollup = Rollup.from_posts(posts)
+    assert rollup.starts.tolist() == [START + 3 * HOUR, START + HOUR, START]
+    assert rollup.counts.tolist() == [1, 1, 2]
+    assert rollup.likes.tolist() == [0, 1, 5]
+
+
+def test_rollup_merge_equals_rollup_of_all_posts():
+    dates = np.random.default_rng(0).integers(START, START + 30 * 86400, 500)
+    newer, older = make_posts(dates[:300]), make_posts(dates[300:])
+    merged = Rollup.from_posts(newer).merge(Rollup.from_posts(older))
+    expected = Rollup.from_posts(PostTable.concat([newer, older]).sort(reverse=True))
+    for name in ("starts",) + Rollup.COLUMNS:
+        assert merged.__getattribute__(name).tolist() == (
+            expected.__getattribute__(name).tolist()
+        )
+
+
+def test_rollup_aggregate_matches_posts():
+    dates = np.random.default_rng(1).integers(START, START + 90 * 86400, 1000)
+    posts = make_posts(dates)
+    points = START + 86400 * np.arange(89, -1, -1)
+    labels = [str(point) for point in points]
+    counts, likes, _, _ = Rollup.from_posts(posts).aggregate(points)
+    statistic = Wall.aggregate_boundaries(posts, labels, points)
+    assert counts == [stat.posts for stat in statistic]
+    assert sum(likes) == int(posts.likes.sum())
+    assert aligned(points) and not aligned(points + 60)
+
+
+def test_wall_merges_rollup_when_extended(fake_vk):
+    fake_vk.items = [
+        make_item(index, START + (40 - index) * 86400 + 60, likes=index)
+        for index in range(40)
+    ]
+    wall = Wall(1, "11.01.2021")
+    before = list(wall.get_statistic("day"))
+    kept = wall.rollup
+    assert list(wall.get_statistic("month")) and wall.rollup is kept
+    wall.extend("01.01.2021")
+    assert wall.rollup is not kept
+    assert len(wall.rollup) == 40
+    expected = Rollup.from_posts(wall.posts)
+    assert wall.rollup.likes.tolist() == expected.likes.tolist()
+    view = wall.get_since("11.01.2021")
+    result = [stat.posts for stat in view.get_statistic("day")]
+    assert result == [stat.posts for stat in before]
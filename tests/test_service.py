@@ -1,6 +1,12 @@
+import json
+import re
 from unittest.mock import Mock
 
-from model.service import Post, ServiceWall
+import pytest
+
+from model import service
+from model.service import Post, PostTable, Progress, ServiceWall, VKError
+from tests.conftest import make_item
 
 
 def test_init_post():
@@ -21,6 +27,58 @@ def test_post_lt_compares_date():
     assert obj1 < obj2
 
 
+def test_post_table_from_posts_keeps_columns():
+    table = PostTable.from_posts(
+        [
+            Post(1, 10, "first", 1, ["link"], 2, 3, 4),
+            Post(2, 20, "second", 0, [], 5, 6, 7),
+        ]
+    )
+    assert len(table) == 2
+    assert table.date.tolist() == [10, 20]
+    assert table.likes.dtype == PostTable.DTYPES["likes"]
+    assert table.text == ["first", "second"]
+    assert table.links == [["link"], []]
+
+
+def test_post_table_item_is_post():
+    table = PostTable([1], [10], ["text"], [1], [["link"]], [2], [3], [4])
+    post = table[0]
+    assert isinstance(post, Post)
+    assert (post.id, post.date, post.text, post.links) == (1, 10, "text", ["link"])
+    assert (post.attachments, post.likes, post.comments, post.reposts) == (1, 2, 3, 4)
+
+
+def test_post_table_sort_reverse_is_stable():
+    table = PostTable(
+        [1, 2, 3],
+        [10, 30, 10],
+        ["a", "b", "c"],
+        [0] * 3,
+        [[]] * 3,
+        [0] * 3,
+        [0] * 3,
+        [0] * 3,
+    )
+    result = table.sort(reverse=True)
+    assert result.id.tolist() == [2, 1, 3]
+    assert result.text == ["b", "a", "c"]
+
+
+def test_post_table_concat_and_slice():
+    first = PostTable([1], [10], ["a"], [0], [[]], [1], [1], [1])
+    second = PostTable(
+        [2, 3], [20, 30], ["b", "c"], [0, 0], [[], []], [2, 3], [2, 3], [2, 3]
+    )
+    table = PostTable.concat([first, second])
+    assert table.id.tolist() == [1, 2, 3]
+    assert table[1:].text == ["b", "c"]
+    assert table[1:].text.items is table.text
+    assert table[1:][:-1].text == ["b"]
+    assert table[::-1].links[1:] == [[], []]
+    assert len(PostTable.concat([])) == 0
+
+
 def test_init_service_wall_with_correct_args():
     wall = ServiceWall(1111, "12.12.2012")
     assert wall.id == 1111
@@ -47,3 +105,150 @@ def test_get_links_when_url_in_values():
 def test_get_links_when_url_in_list_inside_values():
     link = ServiceWall.get_links({"key": ["value", {"url": "link"}]})
     assert link == "link"
+
+
+def test_get_url_adds_token_and_version():
+    url = ServiceWall.get_url("wall.get", owner_id=1, count=100)
+    assert url.startswith(f"{service.API}/wall.get?owner_id=1&count=100&access_token=")
+    assert url.endswith(f"&v={service.V}")
+
+
+def test_parse_page_skips_old_posts():
+    wall = ServiceWall(1)
+    wall.date = 15
+    flag = wall.parse_page(
+        [
+            make_item(2, 20, likes=3, attachments=[{"link": {"url": "link"}}]),
+            make_item(1, 10),
+        ]
+    )
+    assert flag is False
+    assert wall._pages[0].id.tolist() == [2]
+    assert wall._pages[0].links == [["link"]]
+
+
+def test_get_all_posts_from_fake_server(fake_vk):
+    fake_vk.items = [make_item(index, 4000 - index) for index in range(3600)]
+    wall = ServiceWall(1)
+    wall.get_all_posts()
+    assert wall._posts.id.tolist() == list(range(3600))
+
+
+def test_get_posts_batch_packs_offsets_in_one_execute(fake_vk):
+    fake_vk.items = [make_item(index, 4000 - index) for index in range(250)]
+    wall = ServiceWall(1)
+    flag = wall.get_posts_batch(range(0, 300, 100))
+    assert flag is False
+    assert [len(page) for page in wall._pages] == [100, 100, 50]
+    assert len(fake_vk.method_calls("execute")) == 1
+    assert not fake_vk.method_calls("wall.get")
+
+
+def test_get_execute_code_keeps_id_in_string():
+    id = '1,"count":100}),API.account.ban({"owner_id":1'
+    code = ServiceWall(id).get_execute_code([0, 100])
+    script = re.sub(r'"(?:\\.|[^"\\])*"', '""', code)
+    calls = re.findall(r"API\.\w+\.\w+", script)
+    assert calls == ["API.wall.get", "API.wall.get"]
+    argument, _ = json.JSONDecoder().raw_decode(code, len("return [API.wall.get("))
+    assert argument == {"owner_id": id, "count": 100, "offset": 0}
+    assert "id=1%2C" in ServiceWall.get_url("wall.get", owner_id=id)
+
+
+def test_get_all_posts_with_execute(fake_vk):
+    fake_vk.items = [make_item(index, 9000 - index) for index in range(5000)]
+    wall = ServiceWall(1, execute=True)
+    wall.get_all_posts()
+    assert wall._posts.id.tolist() == list(range(5000))
+    assert len(fake_vk.method_calls("execute")) <= 35
+
+
+def test_plan_offsets_for_short_wall_needs_one_request(fake_vk):
+    fake_vk.items = [make_item(index, 100 - index) for index in range(50)]
+    wall = ServiceWall(1)
+    assert wall.plan_offsets() == range(0)
+    assert len(fake_vk.method_calls("wall.get")) == 1
+    assert len(wall._pages[0]) == 50
+
+
+def test_plan_offsets_without_date_uses_count(fake_vk):
+    fake_vk.items = [make_item(index, 10000 - index) for index in range(1050)]
+    wall = ServiceWall(1)
+    assert wall.plan_offsets() == range(100, 1100, 100)
+    assert len(fake_vk.method_calls("wall.get")) == 1
+
+
+def test_plan_offsets_finds_date_by_binary_search(fake_vk):
+    fake_vk.items = [make_item(index, 100000 - index) for index in range(10000)]
+    wall = ServiceWall(1)
+    wall.date = 100000 - 249
+    assert wall.plan_offsets() == range(100, 300, 100)
+    assert len(fake_vk.method_calls("wall.get")) <= 8
+
+
+def test_get_all_posts_gets_only_planned_pages(fake_vk):
+    fake_vk.items = [make_item(index, 100000 - index) for index in range(10000)]
+    wall = ServiceWall(1)
+    wall.date = 100000 - 249
+    wall.get_all_posts()
+    assert wall._posts.id.tolist() == list(range(250))
+    assert len(fake_vk.method_calls("wall.get")) <= 10
+
+
+def test_get_all_posts_skips_old_pinned_post(fake_vk):
+    pinned = dict(make_item(10000, 1000), is_pinned=1)
+    fake_vk.items = [pinned] + [
+        make_item(index, 100000 - index) for index in range(1000)
+    ]
+    wall = ServiceWall(1)
+    wall.date = 100000 - 249
+    assert wall.plan_offsets() == range(100, 300, 100)
+    wall = ServiceWall(1)
+    wall.date = 100000 - 249
+    wall.get_all_posts()
+    assert wall._posts.id.tolist() == list(range(250))
+
+
+def test_progress_counts_pages_and_oldest_date():
+    progress = Progress()
+    wall = ServiceWall(1, progress=progress)
+    wall.parse_page([make_item(3, 30), make_item(2, 20)])
+    wall.parse_page([make_item(1, 10)])
+    wall.parse_page([])
+    assert (progress.pages, progress.posts, progress.oldest) == (3, 3, 10)
+
+
+def test_get_all_posts_retries_throttled_and_failed_calls(fake_vk):
+    fake_vk.items = [make_item(index, 4000 - index) for index in range(1000)]
+    fake_vk.failures = [6, 6, 10, 9, 1]
+    wall = ServiceWall(1)
+    wall.get_all_posts()
+    assert wall._posts.id.tolist() == list(range(1000))
+    assert service.limiter.limit < 36
+
+
+def test_call_raises_error_which_cant_be_retried(fake_vk):
+    fake_vk.failures = [15]
+    with pytest.raises(VKError) as error:
+        ServiceWall(1).get_posts()
+    assert error.value.code == 15
+
+
+def test_call_gives_up_after_retries(fake_vk):
+    fake_vk.failures = [6] * service.RETRIES
+    with pytest.raises(VKError) as error:
+        ServiceWall(1).get_posts()
+    assert error.value.code == 6
+
+
+def test_get_walls_posts_shares_one_pool(fake_vk):
+    fake_vk.walls = {
+        "1": [make_item(index, 5000 - index) for index in range(250)],
+        "-2": [make_item(index, 900 - index) for index in range(30)],
+    }
+    fake_vk.latency = 0.01
+    walls = [ServiceWall(1), ServiceWall(-2, execute=True)]
+    service.get_walls_posts(walls)
+    assert walls[0]._posts.id.tolist() == list(range(250))
+    assert walls[1]._posts.id.tolist() == list(range(30))
+    assert walls[0]._pages == walls[1]._pages == []
@@ -0,0 +1,51 @@
+from model.client import Wall
+from model.service import PostTable
+from model.storage import PostStore
+from tests.conftest import make_item
+
+
+def make_table(*ids):
+    return PostTable(
+        ids,
+        [id * 10 for id in ids],
+        [f"post {id}" for id in ids],
+        [1] * len(ids),
+        [[f"link {id}"] for id in ids],
+        list(ids),
+        [0] * len(ids),
+        [0] * len(ids),
+    )
+
+
+def test_save_and_load_posts(tmp_path):
+    store = PostStore(str(tmp_path / "posts.db"))
+    store.save(-5, make_table(1, 3, 2), since=0)
+    posts = store.load(-5)
+    assert posts.id.tolist() == [3, 2, 1]
+    assert posts.links == [["link 3"], ["link 2"], ["link 1"]]
+    assert store.load(-5, since=20).id.tolist() == [3, 2]
+    assert store.get_newest_date(-5) == 30
+    assert len(store.load(7)) == 0
+
+
+def test_save_updates_posts_and_keeps_earliest_since(tmp_path):
+    store = PostStore(str(tmp_path / "posts.db"))
+    store.save(1, make_table(1, 2), since=10)
+    updated = make_table(2)
+    updated.likes[0] = 100
+    store.save(1, updated, since=20)
+    assert store.load(1).likes.tolist() == [100, 1]
+    assert store.get_since(1) == 10
+    assert store.get_since(2) is None
+
+
+def test_wall_with_store_gets_only_new_posts(fake_vk, tmp_path):
+    store = PostStore(str(tmp_path / "posts.db"))
+    fake_vk.items = [make_item(index, 1000 + index) for index in range(500, 0, -1)]
+    assert len(Wall(1, store=store).posts) == 500
+    calls = len(fake_vk.method_calls("wall.get"))
+
+    fake_vk.items = [make_item(index, 1000 + index) for index in range(530, 0, -1)]
+    posts = Wall(1, store=store).posts
+    assert posts.id.tolist() == list(range(530, 0, -1))
+    assert len(fake_vk.method_calls("wall.get")) - calls == 1
@@ -0,0 +1,26 @@
+from model import service
+from model.service import ServiceWall
+from model.vk import VKClient
+from tests.conftest import make_item
+
+
+def test_vk_client_reuses_connection(fake_vk):
+    client = VKClient(pool_size=2)
+    for _ in range(5):
+        with client.request(f"{fake_vk.url}/wall.get?count=1") as response:
+            assert response.json()["response"]["count"] == 0
+    stats = client.stats()
+    host = stats["hosts"][fake_vk.url.rsplit("/", 1)[0]]
+    assert stats["requests"] == 5
+    assert (host["opened"], host["idle"], host["requests"]) == (1, 1, 5)
+
+
+def test_service_walls_share_process_client(fake_vk, monkeypatch):
+    client = VKClient(pool_size=4)
+    monkeypatch.setattr(service, "client", client)
+    fake_vk.items = [make_item(index, 4000 - index) for index in range(1000)]
+    for id in (1, 2, 3):
+        ServiceWall(id).get_all_posts()
+    host = client.stats()["hosts"][fake_vk.url.rsplit("/", 1)[0]]
+    assert host["requests"] == 30
+    assert host["opened"] <= 4
@@ -1,22 +1,64 @@
-from datetime import datetime, timedelta
-from functools import lru_cache, wraps
-
-import matplotlib
-import matplotlib.patches as mpatches
-import matplotlib.pyplot as plt
-from flask import Flask, json, redirect, render_template, request, send_file, url_for
+import base64
+import binascii
+import datetime
+import hashlib
+import time
+import zlib
+from typing import Iterable, Iterator, Tuple, Union
+
+from flask import (
+    Flask,
+    Response,
+    abort,
+    g,
+    json,
+    jsonify,
+    redirect,
+    render_template,
+    request,
+    session,
+    stream_with_context,
+    url_for,
+)
 from flask_wtf import FlaskForm
-from werkzeug.exceptions import HTTPException
+from markupsafe import Markup
+from werkzeug.exceptions import BadGateway, HTTPException, NotFound
 from wtforms import BooleanField, StringField, SubmitField
 from wtforms.validators import DataRequired
 
-from config import SECRET_KEY, TOKEN
-from model.client import Wall
+from config import (
+    CACHE_MAX_POSTS,
+    CACHE_TTL,
+    JOB_WORKERS,
+    PLOT_RENDERER,
+    POSTS_DB,
+    REFRESH_WINDOW,
+    SECRET_KEY,
+    TIMEZONE,
+    TOKEN,
+)
+from model import metrics, periods
+from model.client import Statistic, Wall, compare_walls
+from model.service import PostTable, VKError, client
+from model.storage import PostStore
+from view import charts
+from view.cache import WallCache, cached_by_versions
+from view.jobs import Job, JobManager
 
 app = Flask(__name__)
 app.secret_key = SECRET_KEY
 
-matplotlib.use("Agg")
+store = PostStore(POSTS_DB) if POSTS_DB else None
+timezone = periods.get_timezone(TIMEZONE)
+
+PLOT_FORMATS = {"png": "image/png", "svg": "image/svg+xml"}
+COMPARE_LIMIT = 10
+CSRF_WINDOW = 1800
+NDJSON = "application/x-ndjson"
+API_LIMIT = 100
+API_MAX_LIMIT = 10000
+API_MAX_TOP = 100
+WALL_NOT_FOUND_ERRORS = {15, 18, 19, 30, 100, 113}
 
 
 class WallForm(FlaskForm):
@@ -96,8 +138,6 @@ def posts(id: int, date: str):
         raise TokenNotFound("Can't work without token")
 
     form = DownloadForm()
-    wall = get_wall(id, date)
-
     if form.validate_on_submit():
         params = ("id", "text", "attachments", "links", "likes", "comments", "reposts")
         mask = (
@@ -109,66 +149,135 @@ def posts(id: int, date: str):
             form.comments.data,
             form.reposts.data,
         )
-        args = (item for index, item in enumerate(params) if mask[index])
-        wall.get_csv(*args)
-        return redirect(url_for("download_file"))
+        args = tuple(item for index, item in enumerate(params) if mask[index])
+        wall = walls.get(id, date, fields=args)
+        chunks = (chunk.encode() for chunk in wall.get_csv(*args))
+        headers = {"Content-Disposition": "attachment; filename=posts.csv"}
+        if "gzip" in request.accept_encodings:
+            chunks = gzip_chunks(chunks)
+            headers["Content-Encoding"] = "gzip"
+        return Response(
+            stream_with_context(chunks), mimetype="text/csv", headers=headers
+        )
 
     if request.method == "POST":
         select = request.form.get("interval")
         look = request.form.get("look")
-        statistic = wall.get_statistic(select)
-        title = f"Statistic in {select}"
-        data = (
-            (item.period, item.posts, item.likes, item.comments, item.reposts)
-            for item in statistic
+        return redirect(url_for("posts", id=id, date=date, interval=select, look=look))
+
+    wall = walls.peek(id, date)
+    if wall is None:
+        job = fetch_wall(id, date)
+        return render_template(
+            "loading.html",
+            title="Getting posts",
+            status=url_for("job_status", id=job.id),
+            stream=url_for("posts_stream", id=id, date=date),
         )
-        if look == "plot":
-            create_plot(data)
-            return render_template(
-                "plot.html", title=title, form=form, url="/static/images/plot.png"
-            )
-        return render_template("statistic.html", title=title, data=data, form=form)
 
-    statistic = wall.get_statistic()
+    select = request.args.get("interval", "month")
+    look = request.args.get("look")
+    if not periods.is_duration(select):
+        abort(404)
+    title = f"Statistic in {select}"
+    if look == "plot":
+        url = url_for("plot", id=id, date=date, duration=select, format="svg")
+        return render_template("plot.html", title=title, form=form, url=url)
+
+    table, etag, modified = render_table((wall,), id, date, select)
+    page = render_template("statistic.html", title=title, table=table, form=form)
+    window = int(time.time() // CSRF_WINDOW)
+    etag = hashlib.sha1(
+        f"{etag}:{session.get('csrf_token')}:{window}".encode()
+    ).hexdigest()
+    return conditional(page, etag, modified, "text/html")
+
+
+@app.route("/posts/<id>/<date>/stream")
+def posts_stream(id: int, date: str):
+    """Render template with statistic of the wall part by part. If posts
+    weren't got yet, every period is sent as soon as posts for it are got.
+    :param id: id of user or group
+    :type id: str
+    :param date: date since which search posts
+    :type date: str
+    :return: streamed response
+    """
+    if not TOKEN:
+        raise TokenNotFound("Can't work without token")
+    select = request.args.get("interval", "month")
+    if not periods.is_duration(select):
+        abort(404)
+
     data = (
         (item.period, item.posts, item.likes, item.comments, item.reposts)
-        for item in statistic
+        for item in stream_statistic(id, date, select)
     )
-    return render_template(
-        "statistic.html", title="Statistic in month", data=data, form=form
+    return Response(
+        stream_template(
+            "statistic.html",
+            title=f"Statistic in {select}",
+            data=data,
+            form=DownloadForm(),
+            action=url_for("posts", id=id, date=date),
+        )
     )
 
 
-def timed_lru_cache(seconds: int, maxsize: int = 128):
-    """Decorator that changes lru_cache so it keeps information
-    during given count of seconds and clears itself afterthat.
-    :param seconds: count of seconds to keep data in cache
-    :type seconds: int
-    :param maxsize: maxsize of cache
-    :type maxsize: int
+def stream_statistic(id: int, date: str, duration: str) -> Iterator:
+    """Gives statistic of the wall through cache. If the wall isn't kept,
+    every period is given as soon as posts for it are got, by this request
+    or by the job started for the wall, and requests for the same wall
+    wait for this fetch instead of starting their own.
+    :param id: id of user or group
+    :type id: str
+    :param date: date since which search posts
+    :type date: str
+    :param duration: duration of period
+    :type duration: str
+    :return: statistic of the wall
+    :rtype: iterator with Statistic
     """
+    return walls.stream(
+        id,
+        date,
+        lambda wall, pages: wall.stream_statistic(duration, timezone, pages),
+    )
 
-    def wrapper_cache(func):
-        func = lru_cache(maxsize=maxsize)(func)
-        func.lifetime = timedelta(seconds=seconds)
-        func.expiration = datetime.utcnow() + func.lifetime
 
-        @wraps(func)
-        def wrapped_func(*args, **kwargs):
-            if datetime.utcnow() >= func.expiration:
-                func.cache_clear()
-                func.expiration = datetime.utcnow() + func.lifetime
-            return func(*args, **kwargs)
+def stream_template(name: str, **context) -> Iterator[str]:
+    """Renders template part by part.
+    :param name: name of the template
+    :type name: str
+    :param context: variables for the template
+    :type context: dict
+    :return: parts of rendered template
+    :rtype: iterator with str
+    """
+    app.update_template_context(context)
+    return stream_with_context(app.jinja_env.get_template(name).stream(context))
 
-        return wrapped_func
 
-    return wrapper_cache
+def create_wall(id: int, date: str) -> "Wall":
+    """Creates Wall instance with given id and date for cache. It keeps
+    only fields needed for statistic, others are got for downloads.
+    :param id: id of user or group
+    :type id: str
+    :param date: date since which search posts
+    :type date: str
+    :return: Wall instance
+    :rtype: Wall
+    """
+    return Wall(id, date, store=store, window=REFRESH_WINDOW, fields=PostTable.STATS)
+
+
+walls = WallCache(create_wall, ttl=CACHE_TTL, max_posts=CACHE_MAX_POSTS)
+jobs = JobManager(workers=JOB_WORKERS)
 
 
-@timed_lru_cache(300)
 def get_wall(id: int, date: str) -> "Wall":
     """Gets Wall instance with given id and date from cache
-    or creates it and puts it in cache.
+    or creates it, gets its posts and puts it in cache.
     :param id: id of user or group
     :type id: str
     :param date: date since which search posts
@@ -176,34 +285,465 @@ def get_wall(id: int, date: str) -> "Wall":
     :return: Wall instance
     :rtype: Wall
     """
-    return Wall(id, date)
-
-
-def create_plot(data):
-    periods, posts, likes, comments, reposts = zip(*data)
-
-    plt.bar(periods, posts, width=0.8, color=["grey"])
-    plt.bar(periods, likes, width=0.8, color=["red"])
-    plt.bar(periods, comments, width=0.8, color=["green"])
-    plt.bar(periods, reposts, width=0.8, color=["blue"])
-    plt.xlabel("period", fontsize=11, color="black")
-    plt.ylabel("count", fontsize=11, color="black")
-    plt.title("statistic of posts' count", fontsize=13, loc="center")
-    grey_patch = mpatches.Patch(color="grey", label="Posts")
-    red_patch = mpatches.Patch(color="red", label="Likes")
-    green_patch = mpatches.Patch(color="green", label="Comments")
-    blue_patch = mpatches.Patch(color="blue", label="Reposts")
-    plt.legend(
-        handles=[grey_patch, red_patch, green_patch, blue_patch], loc="upper right"
+    return walls.get(id, date)
+
+
+def fetch_wall(id: int, date: str) -> Job:
+    """Starts getting posts of the wall in background or gets the job
+    which is already doing it.
+    :param id: id of user or group
+    :type id: str
+    :param date: date since which search posts
+    :type date: str
+    :return: job getting posts
+    :rtype: Job
+    """
+    return jobs.submit((id, date), lambda progress: walls.get(id, date, progress))
+
+
+@app.route("/jobs/<id>")
+def job_status(id: str):
+    """Sends status of the job getting posts in JSON.
+    :param id: id of the job
+    :type id: str
+    :return: response with status
+    """
+    job = jobs.get(id)
+    if job is None:
+        return jsonify({"id": id, "state": "unknown"}), 404
+    return jsonify(job.status())
+
+
+@app.route("/compare/<date>")
+def compare(date: str):
+    """Sends statistic of several walls for the same periods in JSON.
+    Ids are given in 'ids' argument separated by commas, walls which
+    aren't kept are got at once through cache. VK errors of walls are
+    sent in 'errors' instead of their statistic.
+    :param date: date since which search posts
+    :type date: str
+    :return: response with periods and statistic of every wall
+    """
+    if not TOKEN:
+        raise TokenNotFound("Can't work without token")
+    select = request.args.get("interval", "month")
+    ids = [id for id in request.args.get("ids", "").split(",") if id]
+    if not periods.is_duration(select) or not 0 < len(ids) <= COMPARE_LIMIT:
+        abort(404)
+
+    results = walls.get_many(ids, date)
+    for result in results:
+        if isinstance(result, Exception) and not isinstance(result, VKError):
+            raise result
+    compared = tuple(
+        (id, result) for id, result in zip(ids, results) if isinstance(result, Wall)
+    )
+    errors = tuple(
+        (id, result.code, result.message)
+        for id, result in zip(ids, results)
+        if isinstance(result, VKError)
+    )
+    body, etag, modified = render_comparison(
+        tuple(wall for _, wall in compared),
+        tuple(id for id, _ in compared),
+        date,
+        select,
+        errors,
+    )
+    return conditional(body, etag, modified, "application/json")
+
+
+@cached_by_versions(maxsize=64)
+def render_comparison(
+    compared: tuple, ids: tuple, date: str, duration: str, errors: tuple
+) -> tuple:
+    """Gets comparison of walls in JSON from cache or makes it. Cache key
+    has versions of walls' posts.
+    :param compared: walls with fetched posts
+    :type compared: tuple with Wall
+    :param ids: ids of the walls
+    :type ids: tuple with str
+    :param date: date since which search posts
+    :type date: str
+    :param duration: duration of period
+    :type duration: str
+    :param errors: ids of walls which posts can't be got with codes and
+    messages of VK errors
+    :type errors: tuple with tuples
+    :return: JSON, its ETag and time of making
+    :rtype: tuple with bytes, str and datetime
+    """
+    labels, statistics = compare_walls(compared, duration, timezone)
+    body = json.dumps(
+        {
+            "periods": labels,
+            "walls": {
+                id: [
+                    {
+                        "posts": item.posts,
+                        "likes": item.likes,
+                        "comments": item.comments,
+                        "reposts": item.reposts,
+                    }
+                    for item in statistic
+                ]
+                for id, statistic in zip(ids, statistics)
+            },
+            "errors": {
+                id: {"code": code, "message": message} for id, code, message in errors
+            },
+        }
+    ).encode()
+    return body, hashlib.sha1(body).hexdigest(), now()
+
+
+@app.route("/api/walls/<id>/statistics")
+def api_statistics(id: str):
+    """Sends statistic of the wall in compact JSON or, if 'format' is
+    'ndjson' or client accepts only NDJSON, one period in line. Periods
+    in NDJSON are sent as soon as posts for them are got.
+    Arguments are 'since' (date since which search posts) and 'duration'.
+    If 'top' is given, periods also have medians and percentiles of likes,
+    comments and reposts and ids of 'top' posts with the most likes.
+    :param id: id of user or group
+    :type id: str
+    :return: response with statistic
+    """
+    if not TOKEN:
+        raise TokenNotFound("Can't work without token")
+    since = request.args.get("since", "0")
+    duration = request.args.get("duration", "month")
+    top = request.args.get("top", type=int)
+    if not periods.is_duration(duration) or (
+        top is not None and not 0 <= top <= API_MAX_TOP
+    ):
+        abort(400)
+
+    if wants_ndjson() and top is not None:
+        statistic = get_wall(id, since).get_distribution(duration, timezone, top)
+        lines = (dumps(statistic_record(item)) + b"\n" for item in statistic)
+        return Response(lines, mimetype=NDJSON)
+    if wants_ndjson():
+        lines = (
+            dumps(statistic_record(item)) + b"\n"
+            for item in stream_statistic(id, since, duration)
+        )
+        return Response(stream_with_context(lines), mimetype=NDJSON)
+
+    wall = get_wall(id, since)
+    body, etag, modified = render_statistics((wall,), id, since, duration, top)
+    return conditional(body, etag, modified, "application/json")
+
+
+@cached_by_versions(maxsize=256)
+def render_statistics(
+    walls: tuple, id: str, date: str, duration: str, top: Union[int, None] = None
+) -> tuple:
+    """Gets wall's statistic in JSON from cache or makes it. Cache key has
+    version of wall's posts.
+    :param walls: wall with fetched posts
+    :type walls: tuple with Wall
+    :param id: id of user or group
+    :type id: str
+    :param date: date since which search posts
+    :type date: str
+    :param duration: duration of period
+    :type duration: str
+    :param top: count of top posts, distribution isn't added if not given
+    :type top: int or None
+    :return: JSON, its ETag and time of making
+    :rtype: tuple with bytes, str and datetime
+    """
+    (wall,) = walls
+    if top is None:
+        statistic = wall.get_statistic(duration, timezone)
+    else:
+        statistic = wall.get_distribution(duration, timezone, top)
+    body = dumps(
+        {
+            "id": id,
+            "since": date,
+            "duration": duration,
+            "periods": [statistic_record(item) for item in statistic],
+        }
+    )
+    return body, hashlib.sha1(body).hexdigest(), now()
+
+
+@app.route("/api/walls/<id>/posts")
+def api_posts(id: str):
+    """Sends chosen fields of wall's posts from the newest page by page.
+    Arguments are 'since' (date since which search posts), 'fields'
+    separated by commas, 'limit' (count of posts in the page) and 'cursor'
+    from the previous page. JSON page has posts and cursor of the next
+    page. NDJSON has one post in line, it's streamed and has all posts if
+    'limit' isn't given. Link on the next page is in 'Link' header.
+    :param id: id of user or group
+    :type id: str
+    :return: response with posts
+    """
+    if not TOKEN:
+        raise TokenNotFound("Can't work without token")
+    since = request.args.get("since", "0")
+    fields = tuple(
+        field
+        for field in request.args.get("fields", ",".join(PostTable.STATS)).split(",")
+        if field
     )
-    plt.savefig("view/static/images/plot.png")
-    plt.close()
+    ndjson = wants_ndjson()
+    limit = request.args.get("limit", type=int)
+    if limit is None and not ndjson:
+        limit = API_LIMIT
+    if (
+        not fields
+        or not set(fields) <= set(PostTable.FIELDS)
+        or (limit is not None and not 0 < limit <= API_MAX_LIMIT)
+    ):
+        abort(400)
+    cursor = request.args.get("cursor")
+    try:
+        after = decode_cursor(cursor) if cursor else None
+    except ValueError:
+        abort(400)
+
+    wall = walls.get(id, since, fields=fields)
+    start = wall.locate(*after) if after is not None else 0
+    stop = None if limit is None else start + limit
+    last = len(wall.posts) if stop is None else min(stop, len(wall.posts))
+    headers = {}
+    following = None
+    if last < len(wall.posts) and last > start:
+        following = encode_cursor(
+            int(wall.posts.date[last - 1]), int(wall.posts.id[last - 1])
+        )
+        url = url_for(
+            "api_posts",
+            id=id,
+            since=since,
+            fields=",".join(fields),
+            limit=limit,
+            cursor=following,
+            format=request.args.get("format"),
+        )
+        headers["Link"] = f'<{url}>; rel="next"'
+    records = wall.get_records(fields, start, last)
+
+    if ndjson:
+        lines = (
+            b"".join(dumps(record) + b"\n" for record in chunk) for chunk in records
+        )
+        return Response(stream_with_context(lines), mimetype=NDJSON, headers=headers)
+    body = dumps(
+        {"posts": [record for chunk in records for record in chunk], "next": following}
+    )
+    return Response(body, mimetype="application/json", headers=headers)
+
+
+def wants_ndjson() -> bool:
+    """Checks if client asks for NDJSON with 'format' argument or
+    'Accept' header."""
+    format = request.args.get("format")
+    if format is not None:
+        return format == "ndjson"
+    return request.accept_mimetypes.best_match(["application/json", NDJSON]) == NDJSON
+
+
+def statistic_record(item: Statistic) -> dict:
+    """Gets statistic for one period as dict for JSON. Distribution is
+    added if it's picked."""
+    record = {
+        "period": item.period,
+        "posts": item.posts,
+        "likes": item.likes,
+        "comments": item.comments,
+        "reposts": item.reposts,
+    }
+    if item.median is not None:
+        record.update(median=item.median, p90=item.p90, p99=item.p99, top=item.top)
+    return record
 
 
-@app.route("/download_file")
-def download_file():
-    """Downloads csv file with statistic."""
-    return send_file("../model/files/to_download.csv")
+def dumps(value: object) -> bytes:
+    """Encodes value in JSON without spaces."""
+    return json.dumps(value, separators=(",", ":")).encode()
+
+
+def encode_cursor(date: int, id: int) -> str:
+    """Makes cursor pointing after the post with given date and id."""
+    return base64.urlsafe_b64encode(f"{date}.{id}".encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[int, int]:
+    """Gets date and id of the post from cursor.
+    :raises ValueError: if the cursor is wrong
+    """
+    try:
+        text = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+    except (binascii.Error, UnicodeDecodeError) as error:
+        raise ValueError(f"Wrong cursor: {cursor}") from error
+    date, _, id = text.partition(".")
+    return int(date), int(id)
+
+
+def create_plot(data: Iterable[tuple], format: str = "png") -> bytes:
+    """Draws bar chart of statistic with the renderer chosen in config.
+    SVG is drawn by the built-in renderer unless matplotlib is chosen,
+    PNG is drawn by matplotlib which is imported only then.
+    :param data: periods with counts of posts, likes, comments and reposts
+    :type data: iterable with tuples
+    :param format: format of the image (png or svg)
+    :type format: str
+    :return: image
+    :rtype: bytes
+    """
+    return charts.get_renderer(format, PLOT_RENDERER).render(data, format)
+
+
+@cached_by_versions(maxsize=256)
+def render_table(walls: tuple, id: str, date: str, duration: str) -> tuple:
+    """Gets table with wall's statistic from cache or renders it. Cache key
+    has version of wall's posts, so table is rendered again when they change.
+    :param walls: wall with fetched posts
+    :type walls: tuple with Wall
+    :param id: id of user or group
+    :type id: str
+    :param date: date since which search posts
+    :type date: str
+    :param duration: duration of period (year, month, day, hour)
+    :type duration: str
+    :return: table, its ETag and time of rendering
+    :rtype: tuple with Markup, str and datetime
+    """
+    (wall,) = walls
+    data = (
+        (item.period, item.posts, item.likes, item.comments, item.reposts)
+        for item in wall.get_statistic(duration, timezone)
+    )
+    with metrics.STAGE_SECONDS.time(stage="render"):
+        table = Markup(render_template("table.html", data=data))
+    return table, hashlib.sha1(table.encode()).hexdigest(), now()
+
+
+def now() -> datetime.datetime:
+    """Gets current time in UTC without microseconds for Last-Modified."""
+    return datetime.datetime.now(datetime.timezone.utc).replace(microsecond=0)
+
+
+def conditional(
+    body: object, etag: str, modified: datetime.datetime, mimetype: str
+) -> Response:
+    """Makes response with ETag and Last-Modified which is answered with
+    304 Not Modified when the client already has this version. Clients
+    should check the version every time.
+    :param body: body of the response
+    :type body: bytes or str
+    :param etag: ETag of the body
+    :type etag: str
+    :param modified: time of the last change of the body
+    :type modified: datetime
+    :param mimetype: type of the body
+    :type mimetype: str
+    :return: response or 304 response
+    :rtype: Response
+    """
+    response = Response(body, mimetype=mimetype)
+    response.set_etag(etag)
+    response.last_modified = modified
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
+
+
+@cached_by_versions(maxsize=64)
+def get_plot(walls: tuple, id: str, date: str, duration: str, format: str) -> tuple:
+    """Gets plot of wall's statistic from cache or draws it. Cache key has
+    version of wall's posts, so plot is drawn again when they change.
+    :param walls: wall with fetched posts
+    :type walls: tuple with Wall
+    :param id: id of user or group
+    :type id: str
+    :param date: date since which search posts
+    :type date: str
+    :param duration: duration of period (year, month, day, hour)
+    :type duration: str
+    :param format: format of the image (png or svg)
+    :type format: str
+    :return: image, its ETag and time of drawing
+    :rtype: tuple with bytes, str and datetime
+    """
+    (wall,) = walls
+    data = (
+        (item.period, item.posts, item.likes, item.comments, item.reposts)
+        for item in wall.get_statistic(duration, timezone)
+    )
+    with metrics.STAGE_SECONDS.time(stage="plot"):
+        image = create_plot(data, format)
+    return image, hashlib.sha1(image).hexdigest(), now()
+
+
+@app.route("/plot/<id>/<date>/<duration>.<format>")
+def plot(id: int, date: str, duration: str, format: str):
+    """Sends plot of wall's statistic. Supports conditional requests
+    with ETag, so browsers don't download the same plot again.
+    :param id: id of user or group
+    :type id: str
+    :param date: date since which search posts
+    :type date: str
+    :param duration: duration of period (year, month, day, hour)
+    :type duration: str
+    :param format: format of the image (png or svg)
+    :type format: str
+    :return: response with image
+    """
+    if not TOKEN:
+        raise TokenNotFound("Can't work without token")
+    if not periods.is_duration(duration) or format not in PLOT_FORMATS:
+        abort(404)
+
+    wall = get_wall(id, date)
+    image, etag, modified = get_plot((wall,), id, date, duration, format)
+    return conditional(image, etag, modified, PLOT_FORMATS[format])
+
+
+@app.route("/metrics")
+def metrics_text():
+    """Sends metrics of VK calls and connections, pages, cache and stages
+    of requests in Prometheus text format.
+    :return: response with metrics
+    """
+    client.measure()
+    return Response(metrics.registry.render(), mimetype="text/plain; version=0.0.4")
+
+
+@app.before_request
+def start_timer():
+    """Remembers when handling of the request started."""
+    g.started = time.perf_counter()
+
+
+@app.after_request
+def observe_request(response: Response) -> Response:
+    """Puts time of handling the request in metrics. Parts of streamed
+    responses are sent afterthat, so they aren't measured."""
+    if "started" in g:
+        metrics.REQUEST_SECONDS.observe(
+            time.perf_counter() - g.started, endpoint=request.endpoint or "unknown"
+        )
+    return response
+
+
+def gzip_chunks(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    """Compresses stream of bytes in gzip format part by part.
+    :param chunks: parts of data to compress
+    :type chunks: iterable with bytes
+    :return: parts of compressed data
+    :rtype: iterator with bytes
+    """
+    compressor = zlib.compressobj(wbits=31)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
 
 
 @app.errorhandler(404)
@@ -226,8 +766,20 @@ def handle_503(e):
     return response
 
 
+@app.errorhandler(VKError)
+def handle_vk_error(e):
+    """Handler for errors of VK API which can't be retried. Errors about
+    the wall which is private, deleted or doesn't exist are sent as 404,
+    others as 502.
+    """
+    if e.code in WALL_NOT_FOUND_ERRORS:
+        return handle_503(NotFound(str(e)))
+    return handle_503(BadGateway(str(e)))
+
+
 app.register_error_handler(404, page_not_found)
 app.register_error_handler(TokenNotFound, handle_503)
+app.register_error_handler(VKError, handle_vk_error)
 
 if __name__ == "__main__":
     app.run()
@@ -0,0 +1,488 @@
+"""Module with class 'WallCache' which keeps 'Wall' instances for the app.
+One wall is kept for every owner, so requests with different dates share
+posts. Every entry lives for its own TTL, total count of kept posts is
+limited and the least recently used walls are evicted first. Concurrent
+requests for the same wall wait for one fetch instead of starting their own.
+'Fetch' publishes pages of a wall which is got for the first time, so
+streamed statistic can be given while another request gets the posts.
+"""
+
+import functools
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import (
+    Callable,
+    Collection,
+    Hashable,
+    Iterable,
+    Iterator,
+    List,
+    Sequence,
+    Union,
+)
+
+from model import metrics
+from model.client import Wall, fetch_walls
+from model.service import PostTable, Progress, ServiceWall
+
+
+class Fetch:
+    """Fetch of the wall which is in progress. If posts of the wall are got
+    for the first time, its pages are published while they are got.
+    :param date: date since which posts are got
+    :type date: str or None
+    :param published: are pages of the wall published
+    :type published: bool
+    """
+
+    def __init__(self, date: Union[str, None], published: bool = False) -> None:
+        self.date = date
+        self.published = published
+        self.future = Future()
+        self.readers = 0
+        self._pages = []
+        self._done = False
+        self._condition = threading.Condition()
+
+    def follows(self, date: Union[str, None]) -> bool:
+        """Check if published pages are pages of the wall since given date.
+        :param date: date since which search posts
+        :type date: str or None
+        :rtype: bool
+        """
+        return self.published and (
+            ServiceWall.parse_date(date) == ServiceWall.parse_date(self.date)
+        )
+
+    def publish(self, pages: Iterable[PostTable]) -> Iterator[PostTable]:
+        """Give pages and publish them for readers.
+        :param pages: pages of the wall
+        :type pages: iterable with PostTable
+        :return: the same pages
+        :rtype: iterator with PostTable
+        """
+        for page in pages:
+            with self._condition:
+                self._pages.append(page)
+                self._condition.notify_all()
+            yield page
+
+    def finish(self, result: Union[Wall, None, BaseException]) -> None:
+        """Finish the fetch with the wall, None if it's stopped or error.
+        :param result: result of the fetch
+        :type result: Wall or None or exception
+        """
+        if isinstance(result, BaseException):
+            self.future.set_exception(result)
+        else:
+            self.future.set_result(result)
+        with self._condition:
+            self._done = True
+            self._condition.notify_all()
+
+    def read(self) -> Iterator[PostTable]:
+        """Give published pages, waiting for the next one while the fetch
+        goes on. Reader should be counted in 'readers' before.
+        :return: pages of the wall
+        :rtype: iterator with PostTable
+        :raises Exception: error of the fetch
+        """
+        index = 0
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: index < len(self._pages) or self._done)
+                if index == len(self._pages):
+                    break
+                page = self._pages[index]
+            index += 1
+            yield page
+        self.future.result()
+
+
+class WallCache:
+    """Cache of walls with fetched posts.
+    :param factory: function creating Wall from id and date
+    :type factory: callable
+    :param ttl: count of seconds to keep every wall
+    :type ttl: float
+    :param max_posts: max count of posts in all kept walls
+    :type max_posts: int
+    """
+
+    def __init__(
+        self,
+        factory: Callable[..., Wall],
+        ttl: float = 300,
+        max_posts: int = 1000000,
+    ) -> None:
+        self.factory = factory
+        self.ttl = ttl
+        self.max_posts = max_posts
+        self.posts = 0
+        self._entries = OrderedDict()
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    def peek(
+        self,
+        id: Hashable,
+        date: Union[str, None],
+        fields: Union[Collection[str], None] = None,
+    ) -> Union[Wall, None]:
+        """Get wall with posts since given date only if they are already
+        kept, without fetching anything.
+        :param id: id of user or group
+        :type id: str
+        :param date: date since which search posts
+        :type date: str or None
+        :param fields: fields of posts which should be kept, all if not given
+        :type fields: collection with str or None
+        :return: wall with posts or None
+        :rtype: Wall or None
+        """
+        with self._lock:
+            entry = self._entries.get(id)
+            if entry is None:
+                metrics.CACHE_REQUESTS.inc(method="peek", result="miss")
+                return None
+            wall, expiration, _ = entry
+            if (
+                time.monotonic() >= expiration
+                or not wall.covers(date)
+                or (fields is not None and not wall.keeps(fields))
+            ):
+                metrics.CACHE_REQUESTS.inc(method="peek", result="miss")
+                return None
+            metrics.CACHE_REQUESTS.inc(method="peek", result="hit")
+            self._entries.move_to_end(id)
+            return wall.get_since(date)
+
+    def get(
+        self,
+        id: Hashable,
+        date: Union[str, None],
+        progress: Union[Progress, None] = None,
+        fields: Union[Collection[str], None] = None,
+    ) -> Wall:
+        """Get wall with posts since given date. One wall is kept for every
+        owner and covers the earliest date asked so far: narrower ranges
+        are cut from it, for wider ones only older posts are fetched.
+        Missing fields of kept posts are got again. TTL of the wall starts
+        when its posts are got.
+        If the wall is being fetched by another thread, waits for it.
+        :param id: id of user or group
+        :type id: str
+        :param date: date since which search posts
+        :type date: str or None
+        :param progress: progress to update while posts are fetched
+        :type progress: Progress or None
+        :param fields: fields of posts which should be kept, by default
+        the ones the wall was created with
+        :type fields: collection with str or None
+        :return: wall with fetched posts
+        :rtype: Wall
+        """
+        while True:
+            with self._lock:
+                wall, expiration = None, None
+                entry = self._entries.get(id)
+                if entry is not None:
+                    wall, expiration, _ = entry
+                    if time.monotonic() >= expiration:
+                        self.pop(id, "expired")
+                        wall = None
+                    elif wall.covers(date) and (fields is None or wall.keeps(fields)):
+                        metrics.CACHE_REQUESTS.inc(method="get", result="hit")
+                        self._entries.move_to_end(id)
+                        return wall.get_since(date)
+                fetch = self._pending.get(id)
+                if fetch is None:
+                    metrics.CACHE_REQUESTS.inc(method="get", result="miss")
+                    fetch = self._pending[id] = Fetch(date, wall is None)
+                    break
+            fetch.future.result()
+
+        try:
+            if wall is None:
+                wall = self.factory(id, date)
+            version = wall.version
+            wall.progress = progress
+            if fetch.published:
+                for _ in fetch.publish(wall.iter_pages()):
+                    pass
+            wall.extend(date)
+            if fields is not None:
+                wall.fill(fields)
+        except BaseException as error:
+            with self._lock:
+                del self._pending[id]
+            fetch.finish(error)
+            raise
+        with self._lock:
+            del self._pending[id]
+            if wall.version != version:
+                expiration = time.monotonic() + self.ttl
+            self.insert(id, wall, expiration)
+        fetch.finish(wall)
+        return wall.get_since(date)
+
+    def stream(
+        self,
+        id: Hashable,
+        date: Union[str, None],
+        produce: Callable[[Wall, Union[Iterable[PostTable], None]], Iterator],
+    ) -> Iterator:
+        """Give items made by 'produce' from the wall with posts since given
+        date while its posts are got, for example streamed statistic.
+        'produce' gets the wall and its pages if they are got by the fetch
+        of another request, or None if the wall gets posts itself.
+        If the wall is got for the first time by another request with the
+        same date, items are made from its published pages. If no wall
+        is kept for the owner, the fetch is made here and registered as
+        pending, so other requests follow it instead of fetching again.
+        Otherwise items are made from the wall got with 'get'.
+        :param id: id of user or group
+        :type id: str
+        :param date: date since which search posts
+        :type date: str
+        :param produce: function making items from the wall
+        :type produce: callable
+        :return: items made from the wall
+        :rtype: iterator
+        """
+        with self._lock:
+            entry = self._entries.get(id)
+            fetch = self._pending.get(id)
+            expired = entry is None or time.monotonic() >= entry[1]
+            if fetch is not None and fetch.follows(date):
+                metrics.CACHE_REQUESTS.inc(method="stream", result="follow")
+                fetch.readers += 1
+                owner = False
+            elif fetch is None and expired:
+                metrics.CACHE_REQUESTS.inc(method="stream", result="miss")
+                if entry is not None:
+                    self.pop(id, "expired")
+                fetch = self._pending[id] = Fetch(date, True)
+                owner = True
+            else:
+                fetch = None
+        if fetch is None:
+            yield from produce(self.get(id, date), None)
+            return
+        if not owner:
+            try:
+                yield from produce(self.factory(id, date), fetch.read())
+            finally:
+                with self._lock:
+                    fetch.readers -= 1
+            return
+
+        wall = self.factory(id, date)
+        pages = fetch.publish(wall.iter_pages())
+        try:
+            try:
+                yield from produce(wall, pages)
+            except GeneratorExit:
+                with self._lock:
+                    if not fetch.readers:
+                        del self._pending[id]
+                        fetch.finish(None)
+                        raise
+                for _ in pages:
+                    pass
+                self.finish(id, wall, fetch)
+                raise
+            for _ in pages:
+                pass
+        except GeneratorExit:
+            raise
+        except BaseException as error:
+            with self._lock:
+                del self._pending[id]
+            fetch.finish(error)
+            raise
+        self.finish(id, wall, fetch)
+
+    def finish(self, id: Hashable, wall: Wall, fetch: Fetch) -> None:
+        """Put the wall got by the pending fetch in cache with new TTL.
+        :param id: id of user or group
+        :type id: str
+        :param wall: wall with fetched posts
+        :type wall: Wall
+        :param fetch: pending fetch of the wall
+        :type fetch: Fetch
+        """
+        with self._lock:
+            del self._pending[id]
+            self.insert(id, wall, time.monotonic() + self.ttl)
+        fetch.finish(wall)
+
+    def get_many(
+        self, ids: Sequence[Hashable], date: Union[str, None]
+    ) -> List[Union[Wall, Exception]]:
+        """Get walls of several owners with posts since given date like
+        'get'. Walls which aren't kept are registered as pending and got
+        at once with one pool of threads, so other requests wait for them.
+        Error of a wall is given instead of it, other walls are still got.
+        :param ids: ids of users or groups
+        :type ids: sequence of str
+        :param date: date since which search posts
+        :type date: str or None
+        :return: walls with fetched posts or errors
+        :rtype: list with Wall or Exception
+        """
+        owned = {}
+        with self._lock:
+            for id in ids:
+                entry = self._entries.get(id)
+                if id in owned or id in self._pending:
+                    continue
+                if entry is not None:
+                    if time.monotonic() < entry[1]:
+                        continue
+                    self.pop(id, "expired")
+                metrics.CACHE_REQUESTS.inc(method="get_many", result="miss")
+                owned[id] = self.factory(id, date)
+                self._pending[id] = Fetch(date)
+        try:
+            errors = fetch_walls(list(owned.values()))
+        except BaseException as error:
+            errors = [error] * len(owned)
+            raise
+        finally:
+            with self._lock:
+                fetches = [self._pending.pop(id) for id in owned]
+                expiration = time.monotonic() + self.ttl
+                for (id, wall), error in zip(owned.items(), errors):
+                    if error is None:
+                        self.insert(id, wall, expiration)
+            for fetch, wall, error in zip(fetches, owned.values(), errors):
+                fetch.finish(wall if error is None else error)
+
+        failed = dict(zip(owned, errors))
+        results = []
+        for id in ids:
+            try:
+                if failed.get(id) is not None:
+                    raise failed[id]
+                if id in owned:
+                    results.append(owned[id].get_since(date))
+                else:
+                    results.append(self.get(id, date))
+            except Exception as error:
+                results.append(error)
+        return results
+
+    def put(self, id: Hashable, wall: Wall) -> None:
+        """Put wall with fetched posts in cache unless the kept one for
+        the same owner covers its date.
+        :param id: id of user or group
+        :type id: str
+        :param wall: wall with fetched posts
+        :type wall: Wall
+        """
+        with self._lock:
+            entry = self._entries.get(id)
+            if entry is not None:
+                kept, expiration, _ = entry
+                if time.monotonic() < expiration and kept.covers(wall.date):
+                    return
+            self.insert(id, wall, time.monotonic() + self.ttl)
+
+    def insert(self, id: Hashable, wall: Wall, expiration: float) -> None:
+        """Put wall with fetched posts in cache instead of the kept one.
+        Should be called under the lock.
+        :param id: id of user or group
+        :type id: str
+        :param wall: wall with fetched posts
+        :type wall: Wall
+        :param expiration: monotonic time when the wall expires
+        :type expiration: float
+        """
+        if id in self._entries:
+            self.pop(id)
+        size = len(wall.posts)
+        self._entries[id] = (wall, expiration, size)
+        self.posts += size
+        self.evict()
+        self.measure()
+
+    def pop(self, key: Hashable, reason: Union[str, None] = None) -> None:
+        """Remove wall from cache. Should be called under the lock.
+        :param key: id of the wall
+        :type key: str
+        :param reason: reason of eviction (expired or budget) to count
+        in metrics, None if the wall is replaced
+        :type reason: str or None
+        """
+        _, _, size = self._entries.pop(key)
+        self.posts -= size
+        if reason is not None:
+            metrics.CACHE_EVICTIONS.inc(reason=reason)
+
+    def evict(self) -> None:
+        """Remove expired walls and least recently used walls while count
+        of kept posts is over budget. The newest wall is always kept.
+        Should be called under the lock."""
+        now = time.monotonic()
+        for key in [
+            key
+            for key, (_, expiration, _) in self._entries.items()
+            if expiration <= now
+        ]:
+            self.pop(key, "expired")
+        while self.posts > self.max_posts and len(self._entries) > 1:
+            self.pop(next(iter(self._entries)), "budget")
+
+    def measure(self) -> None:
+        """Put counts of kept walls and posts in metrics.
+        Should be called under the lock."""
+        metrics.CACHE_WALLS.set(len(self._entries))
+        metrics.CACHE_POSTS.set(self.posts)
+
+    def clear(self) -> None:
+        """Remove all walls from cache."""
+        with self._lock:
+            self._entries.clear()
+            self.posts = 0
+            self.measure()
+
+    def __len__(self) -> int:
+        """Count of kept walls."""
+        return len(self._entries)
+
+
+def cached_by_versions(maxsize: int = 128) -> Callable:
+    """Decorator caching results of function which gets walls as the first
+    argument, like 'lru_cache'. Results are cached by other arguments and
+    versions of walls' posts, so they are always made from the walls
+    which versions are in the key. Walls aren't kept in the cache.
+    :param maxsize: max count of kept results
+    :type maxsize: int
+    :return: decorator
+    :rtype: callable
+    """
+
+    def decorate(func: Callable) -> Callable:
+        results = OrderedDict()
+        lock = threading.Lock()
+
+        @functools.wraps(func)
+        def wrapper(walls: Sequence[Wall], *args):
+            key = (tuple(wall.version for wall in walls), *args)
+            with lock:
+                if key in results:
+                    results.move_to_end(key)
+                    return results[key]
+            result = func(walls, *args)
+            with lock:
+                results[key] = result
+                while len(results) > maxsize:
+                    results.popitem(last=False)
+            return result
+
+        return wrapper
+
+    return decorate
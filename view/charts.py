@@ -0,0 +1,193 @@
+"""Module with renderers drawing bar chart of wall's statistic: counts of
+posts and average counts of likes, comments and reposts by periods.
+'SVGRenderer' writes SVG itself without any dependencies, 'MatplotlibRenderer'
+imports matplotlib only when it draws the first plot, so workers which
+don't draw plots don't load it.
+"""
+
+import io
+import math
+from abc import ABC, abstractmethod
+from typing import Dict, Iterable, List, Tuple
+from xml.sax.saxutils import escape
+
+SERIES = (
+    ("Posts", "grey"),
+    ("Likes", "red"),
+    ("Comments", "green"),
+    ("Reposts", "blue"),
+)
+TITLE = "statistic of posts' count"
+
+
+class Renderer(ABC):
+    """Interface of renderers of bar chart. Every series is drawn over
+    the previous ones. 'formats' are formats of images renderer can draw.
+    """
+
+    formats: Tuple[str, ...] = ()
+
+    @abstractmethod
+    def render(self, data: Iterable[tuple], format: str) -> bytes:
+        """Draw bar chart of statistic.
+        :param data: periods with counts of posts, likes, comments and reposts
+        :type data: iterable with tuples
+        :param format: format of the image
+        :type format: str
+        :return: image
+        :rtype: bytes
+        """
+
+
+class MatplotlibRenderer(Renderer):
+    """Renderer drawing chart with matplotlib on its own figure."""
+
+    formats = ("png", "svg")
+
+    def render(self, data: Iterable[tuple], format: str) -> bytes:
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        from matplotlib.figure import Figure
+        from matplotlib.patches import Patch
+
+        periods, *series = tuple(zip(*data)) or ((),) * 5
+        figure = Figure()
+        FigureCanvasAgg(figure)
+        axes = figure.subplots()
+        for values, (_, color) in zip(series, SERIES):
+            axes.bar(periods, values, width=0.8, color=[color])
+        axes.set_xlabel("period", fontsize=11, color="black")
+        axes.set_ylabel("count", fontsize=11, color="black")
+        axes.set_title(TITLE, fontsize=13, loc="center")
+        axes.legend(
+            handles=[Patch(color=color, label=label) for label, color in SERIES],
+            loc="upper right",
+        )
+        image = io.BytesIO()
+        figure.savefig(image, format=format)
+        return image.getvalue()
+
+
+class SVGRenderer(Renderer):
+    """Renderer writing SVG chart by itself.
+    :param width: width of the image in pixels
+    :type width: int
+    :param height: height of the image in pixels
+    :type height: int
+    """
+
+    formats = ("svg",)
+    LEFT, RIGHT, TOP, BOTTOM = 70, 20, 40, 80
+
+    def __init__(self, width: int = 640, height: int = 480) -> None:
+        self.width = width
+        self.height = height
+
+    @staticmethod
+    def get_ticks(top: float, count: int = 5) -> List[float]:
+        """Get round values for marks of vertical axis from 0 to 'top'.
+        Step is 1, 2 or 5 multiplied by a power of 10.
+        """
+        rough = max(top, 1) / count
+        power = 10 ** math.floor(math.log10(rough))
+        step = next(
+            factor * power for factor in (1, 2, 5, 10) if factor * power >= rough
+        )
+        return [
+            round(index * step, 10)
+            for index in range(math.ceil(max(top, 1) / step) + 1)
+        ]
+
+    def render(self, data: Iterable[tuple], format: str = "svg") -> bytes:
+        if format not in self.formats:
+            raise ValueError(f"Wrong format: {format}")
+        periods, *series = tuple(zip(*data)) or ((),) * 5
+        ticks = self.get_ticks(
+            max((max(values) for values in series if values), default=0)
+        )
+        left, top = self.LEFT, self.TOP
+        width = self.width - self.LEFT - self.RIGHT
+        height = self.height - self.TOP - self.BOTTOM
+        bottom = top + height
+        scale = height / ticks[-1]
+
+        parts = [
+            f'<svg xmlns="http://www.w3.org/2000/svg" width="{self.width}" '
+            f'height="{self.height}" viewBox="0 0 {self.width} {self.height}" '
+            'font-family="sans-serif">',
+            f'<rect width="{self.width}" height="{self.height}" fill="white"/>',
+            f'<text x="{left + width / 2:.1f}" y="{top / 2 + 5:.1f}" '
+            f'font-size="13" text-anchor="middle">{escape(TITLE)}</text>',
+        ]
+        for tick in ticks:
+            y = bottom - tick * scale
+            parts.append(
+                f'<line x1="{left - 4}" y1="{y:.1f}" x2="{left}" y2="{y:.1f}" '
+                'stroke="black"/>'
+                f'<text x="{left - 7}" y="{y + 3.5:.1f}" font-size="10" '
+                f'text-anchor="end">{tick:g}</text>'
+            )
+
+        slot = width / len(periods) if periods else width
+        for values, (_, color) in zip(series, SERIES):
+            bars = (
+                f'<rect x="{left + (index + 0.1) * slot:.1f}" '
+                f'y="{bottom - value * scale:.1f}" width="{slot * 0.8:.1f}" '
+                f'height="{value * scale:.1f}"/>'
+                for index, value in enumerate(values)
+                if value
+            )
+            parts.append(f'<g fill="{color}">{"".join(bars)}</g>')
+
+        every = max(1, math.ceil(len(periods) * 14 / width))
+        for index in range(0, len(periods), every):
+            x = left + (index + 0.5) * slot
+            parts.append(
+                f'<text x="{x:.1f}" y="{bottom + 12}" font-size="10" '
+                f'text-anchor="end" transform="rotate(-45 {x:.1f} {bottom + 12})">'
+                f"{escape(str(periods[index]))}</text>"
+            )
+
+        parts.append(
+            f'<path d="M{left} {top}V{bottom}H{left + width}V{top}Z" '
+            'fill="none" stroke="black"/>'
+            f'<text x="{left + width / 2:.1f}" y="{self.height - 8}" '
+            'font-size="11" text-anchor="middle">period</text>'
+            f'<text x="14" y="{top + height / 2:.1f}" font-size="11" '
+            f'text-anchor="middle" transform="rotate(-90 14 {top + height / 2:.1f})">'
+            "count</text>"
+        )
+        x, y = left + width - 90, top + 8
+        for index, (label, color) in enumerate(SERIES):
+            parts.append(
+                f'<rect x="{x}" y="{y + index * 16}" width="18" height="9" '
+                f'fill="{color}"/><text x="{x + 24}" y="{y + index * 16 + 9}" '
+                f'font-size="10">{label}</text>'
+            )
+        parts.append("</svg>")
+        return "".join(parts).encode()
+
+
+RENDERERS: Dict[str, Renderer] = {
+    "builtin": SVGRenderer(),
+    "matplotlib": MatplotlibRenderer(),
+}
+
+
+def get_renderer(format: str, name: str = "builtin") -> Renderer:
+    """Get renderer drawing images in given format. The chosen renderer is
+    used if it can draw the format, otherwise the first one which can.
+    :param format: format of the image (png or svg)
+    :type format: str
+    :param name: name of preferred renderer (builtin or matplotlib)
+    :type name: str
+    :return: renderer
+    :rtype: Renderer
+    :raises ValueError: if no renderer can draw the format
+    """
+    preferred = RENDERERS.get(name)
+    if preferred is not None and format in preferred.formats:
+        return preferred
+    for renderer in RENDERERS.values():
+        if format in renderer.formats:
+            return renderer
+    raise ValueError(f"Wrong format: {format}")
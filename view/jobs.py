@@ -0,0 +1,109 @@
+"""Module with class 'JobManager' which runs fetches of walls in background
+on a bounded pool of threads, so requests don't wait for them. Every job
+keeps 'Progress' of its fetch which can be shown to the user.
+"""
+
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Hashable, Union
+
+from model.service import Progress
+
+
+class Job:
+    """Background fetch of one wall.
+    :param key: key of the fetch, jobs with equal keys are not duplicated
+    :type key: hashable
+    """
+
+    def __init__(self, key: Hashable) -> None:
+        self.id = uuid.uuid4().hex
+        self.key = key
+        self.progress = Progress()
+        self.future = None
+        self.finished = None
+
+    @property
+    def state(self) -> str:
+        """State of the job: running, done or failed."""
+        if not self.future.done():
+            return "running"
+        return "failed" if self.future.exception() else "done"
+
+    def status(self) -> dict:
+        """Get status of the job with its progress.
+        :return: status that can be sent as JSON
+        :rtype: dict
+        """
+        state = self.state
+        return {
+            "id": self.id,
+            "state": state,
+            "pages": self.progress.pages,
+            "posts": self.progress.posts,
+            "oldest": self.progress.oldest,
+            "error": str(self.future.exception()) if state == "failed" else None,
+        }
+
+
+class JobManager:
+    """Runs jobs on a pool of threads and keeps finished jobs for a while.
+    :param workers: count of threads
+    :type workers: int
+    :param keep: count of seconds to keep finished jobs
+    :type keep: float
+    """
+
+    def __init__(self, workers: int = 4, keep: float = 300) -> None:
+        self.keep = keep
+        self._executor = ThreadPoolExecutor(max_workers=workers)
+        self._jobs = {}
+        self._running = {}
+        self._lock = threading.Lock()
+
+    def submit(self, key: Hashable, func: Callable[[Progress], object]) -> Job:
+        """Start job or get the running one with the same key.
+        :param key: key of the job
+        :type key: hashable
+        :param func: function to run, it gets progress of the job
+        :type func: callable
+        :return: job
+        :rtype: Job
+        """
+        with self._lock:
+            self.clean()
+            job = self._running.get(key)
+            if job is not None:
+                return job
+            job = Job(key)
+            self._jobs[job.id] = self._running[key] = job
+            job.future = self._executor.submit(func, job.progress)
+        job.future.add_done_callback(lambda _: self.finish(job))
+        return job
+
+    def finish(self, job: Job) -> None:
+        """Mark job as finished, so the next job with its key can be started."""
+        with self._lock:
+            job.finished = time.monotonic()
+            if self._running.get(job.key) is job:
+                del self._running[job.key]
+
+    def get(self, id: str) -> Union[Job, None]:
+        """Get job by its id.
+        :param id: id of the job
+        :type id: str
+        :return: job or None if there's no such job
+        :rtype: Job or None
+        """
+        with self._lock:
+            return self._jobs.get(id)
+
+    def clean(self) -> None:
+        """Forget jobs finished more than 'keep' seconds ago.
+        Should be called under the lock."""
+        now = time.monotonic()
+        for id, job in list(self._jobs.items()):
+            if job.finished is not None and now - job.finished > self.keep:
+                del self._jobs[id]